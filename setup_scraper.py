@@ -65,6 +65,10 @@ def main():
     if not run_command("pip install webdriver-manager", "Installing WebDriver Manager"):
         sys.exit(1)
     
+    # Resolve ChromeDriver now so scraper runs reuse the cached driver
+    if not run_command(f'"{sys.executable}" tiktok_scraper.py --install-driver', "Provisioning ChromeDriver"):
+        print("⚠️  ChromeDriver will be resolved on first run instead")
+    
     print("\n🎉 Setup completed successfully!")
     print("\n📝 You can now run the scraper with:")
     print("   python3 tiktok_scraper.py")
@@ -72,7 +76,8 @@ def main():
     print("   https://www.tiktok.com/@d4vdd")
     print("   https://www.tiktok.com/@username")
     print("\n🔧 Notes:")
-    print("   • ChromeDriver will be downloaded automatically on first run")
+    print("   • ChromeDriver is cached in ~/.cache/tiktok-scraper and reused across runs")
+    print("   • Re-run 'python3 tiktok_scraper.py --install-driver' after a Chrome update")
     print("   • The browser window will open so you can manually navigate")
     print("   • Press ENTER in the terminal when ready to start scraping")
 
@@ -4,6 +4,60 @@ import path from 'path';
 import { HashtagData, ArtistMetrics, ArtistGrowthData, DashboardData, KPIMetrics, GenreTrendData } from '@/types/dashboard';
 
 const CUSTOM_ARTISTS_FILE = path.join(process.cwd(), 'data', 'custom-artists.json');
+// Pre-aggregated rollups exported by the Python metrics database (tiktok_db.py)
+const ROLLUPS_FILE = path.join(process.cwd(), 'data', 'dashboard-rollups.json');
+// Growth and trending scores computed from the scrape history (tiktok_analytics.py)
+const ANALYTICS_FILE = path.join(process.cwd(), 'data', 'dashboard-analytics.json');
+
+// Rollups for one genre filter ('all' or a lower-cased genre); artists and artistGrowth are
+// already ranked with the measured trending scores and growth
+interface RollupFilter {
+  kpis: KPIMetrics;
+  genreTrends: Omit<GenreTrendData, 'growth'>[];
+  hashtags: HashtagData[];
+  artists: ArtistMetrics[];
+  artistGrowth: ArtistGrowthData[];
+}
+
+// Per-artist totals and view growth from the database's artist_rollup table
+interface ArtistRollupStats {
+  videos: number;
+  views: number;
+  likes: number;
+  bookmarks: number;
+  comments: number;
+  growthPct: number | null;
+  lastScrapedAt: string | null;
+}
+
+interface DashboardRollups {
+  generatedAt: string;
+  sourceMtimeMs: number | null;
+  analyticsMtimeMs: number | null;
+  growthWindow: string;
+  artistStats: Record<string, ArtistRollupStats>;
+  filters: Record<string, RollupFilter>;
+}
+
+interface ArtistGrowthAnalytics {
+  videos: number;
+  views: number;
+  likes: number;
+  trendingScore?: number | null;
+  growthPct: number | null;
+}
+
+interface GrowthAnalytics {
+  generatedAt: string;
+  growthWindow: string;
+  artists: Record<string, ArtistGrowthAnalytics>;
+  genres: Record<string, { artists: number; growthPct: number | null }>;
+}
+
+// Parsed files are cached until their modification time changes
+let artistsCache: { mtimeMs: number; artists: ArtistMetrics[] } | null = null;
+let rollupsCache: { mtimeMs: number; rollups: DashboardRollups } | null = null;
+let analyticsCache: { mtimeMs: number; analytics: GrowthAnalytics } | null = null;
 
 // Load custom artists from the managed file
 function loadCustomArtists(): ArtistMetrics[] {
@@ -11,14 +65,103 @@ function loadCustomArtists(): ArtistMetrics[] {
     if (!fs.existsSync(CUSTOM_ARTISTS_FILE)) {
       return [];
     }
+    const { mtimeMs } = fs.statSync(CUSTOM_ARTISTS_FILE);
+    if (artistsCache && artistsCache.mtimeMs === mtimeMs) {
+      return artistsCache.artists;
+    }
     const data = fs.readFileSync(CUSTOM_ARTISTS_FILE, 'utf8');
-    return JSON.parse(data);
+    const artists: ArtistMetrics[] = JSON.parse(data);
+    artistsCache = { mtimeMs, artists };
+    return artists;
   } catch (error) {
     console.error('Error loading custom artists:', error);
     return [];
   }
 }
 
+// Modification time of a file, or null if it does not exist
+function fileMtimeMs(file: string): number | null {
+  return fs.existsSync(file) ? fs.statSync(file).mtimeMs : null;
+}
+
+// Whether a rollup was built from the file version with this modification time
+function builtFrom(builtMtimeMs: number | null, mtimeMs: number | null): boolean {
+  if (builtMtimeMs === null || mtimeMs === null) {
+    return builtMtimeMs === mtimeMs;
+  }
+  return Math.abs(builtMtimeMs - mtimeMs) <= 1;
+}
+
+// Load the rollups, or null if they are missing or older than custom-artists.json or the growth analytics
+function loadRollups(): DashboardRollups | null {
+  try {
+    if (!fs.existsSync(ROLLUPS_FILE) || !fs.existsSync(CUSTOM_ARTISTS_FILE)) {
+      return null;
+    }
+    const { mtimeMs } = fs.statSync(ROLLUPS_FILE);
+    if (!rollupsCache || rollupsCache.mtimeMs !== mtimeMs) {
+      const data = fs.readFileSync(ROLLUPS_FILE, 'utf8');
+      rollupsCache = { mtimeMs, rollups: JSON.parse(data) };
+    }
+    const rollups = rollupsCache.rollups;
+    if (rollups.sourceMtimeMs === null || !builtFrom(rollups.sourceMtimeMs, fileMtimeMs(CUSTOM_ARTISTS_FILE))) {
+      return null;
+    }
+    // Rankings embed the measured trending scores, so new analytics need a rebuild first
+    if (!builtFrom(rollups.analyticsMtimeMs ?? null, fileMtimeMs(ANALYTICS_FILE))) {
+      return null;
+    }
+    return rollups;
+  } catch (error) {
+    console.error('Error loading dashboard rollups:', error);
+    return null;
+  }
+}
+
+// Load the growth analytics, or null if they have not been computed yet
+function loadAnalytics(): GrowthAnalytics | null {
+  try {
+    if (!fs.existsSync(ANALYTICS_FILE)) {
+      return null;
+    }
+    const { mtimeMs } = fs.statSync(ANALYTICS_FILE);
+    if (!analyticsCache || analyticsCache.mtimeMs !== mtimeMs) {
+      const data = fs.readFileSync(ANALYTICS_FILE, 'utf8');
+      analyticsCache = { mtimeMs, analytics: JSON.parse(data) };
+    }
+    return analyticsCache.analytics;
+  } catch (error) {
+    console.error('Error loading growth analytics:', error);
+    return null;
+  }
+}
+
+// Artists missing from the growth analytics fall back to the database rollup's view growth
+function withRollupGrowth(analytics: GrowthAnalytics | null, rollups: DashboardRollups | null): GrowthAnalytics | null {
+  if (!rollups?.artistStats) {
+    return analytics;
+  }
+  return {
+    generatedAt: analytics?.generatedAt ?? rollups.generatedAt,
+    growthWindow: analytics?.growthWindow ?? rollups.growthWindow,
+    artists: { ...rollups.artistStats, ...analytics?.artists },
+    genres: analytics?.genres ?? {}
+  };
+}
+
+// Scraped profiles are keyed by TikTok username, as in the metrics database
+function findArtistGrowth(artist: ArtistMetrics, analytics: GrowthAnalytics | null): ArtistGrowthAnalytics | undefined {
+  return analytics?.artists[artist.username || artist.id];
+}
+
+// Replace trending scores with the ones measured from the scrape history, where there is one
+function withTrendingScores(artists: ArtistMetrics[], analytics: GrowthAnalytics | null): ArtistMetrics[] {
+  return artists.map(artist => {
+    const score = findArtistGrowth(artist, analytics)?.trendingScore;
+    return score === null || score === undefined ? artist : { ...artist, trendingScore: score };
+  });
+}
+
 // Generate mock hashtag data based on genres from custom artists
 function generateHashtagData(artists: ArtistMetrics[]): HashtagData[] {
   const genreCounts = new Map<string, number>();
@@ -30,6 +173,11 @@ function generateHashtagData(artists: ArtistMetrics[]): HashtagData[] {
     });
   });
   
+  return withCommonHashtags(genreCounts);
+}
+
+// Merge genre hashtag counts with common music hashtags
+function withCommonHashtags(genreCounts: Map<string, number>): HashtagData[] {
   // Add some common music hashtags with generated counts
   const commonHashtags = [
     '#music', '#trending', '#viral', '#newmusic', '#artist', 
@@ -47,27 +195,26 @@ function generateHashtagData(artists: ArtistMetrics[]): HashtagData[] {
     .slice(0, 30);
 }
 
-// Generate artist growth data from custom artists
-function generateArtistGrowthData(artists: ArtistMetrics[]): ArtistGrowthData[] {
+// Rank artists by measured view growth; artists without scrape history are left out
+function generateArtistGrowthData(artists: ArtistMetrics[], analytics: GrowthAnalytics | null): ArtistGrowthData[] {
   return artists
-    .map(artist => {
-      // Generate realistic growth percentages based on trending score
-      const baseGrowth = Math.random() * 15; // 0-15% base growth
-      const trendingBonus = (artist.trendingScore / 100) * 10; // Up to 10% bonus for high trending
-      const percentGrowth = Math.round((baseGrowth + trendingBonus) * 100) / 100;
-      
-      return {
+    .flatMap(artist => {
+      const growth = findArtistGrowth(artist, analytics);
+      if (!growth || growth.growthPct === null) {
+        return [];
+      }
+      return [{
         artistName: artist.name,
-        percentGrowth: percentGrowth,
-        totalPlays: artist.likes // Using likes as a proxy for plays
-      };
+        percentGrowth: growth.growthPct,
+        totalPlays: growth.views
+      }];
     })
     .sort((a, b) => b.percentGrowth - a.percentGrowth)
     .slice(0, 10);
 }
 
 // Generate genre trends based on custom artists
-function generateGenreTrendsFromData(artists: ArtistMetrics[]): GenreTrendData[] {
+function generateGenreTrendsFromData(artists: ArtistMetrics[], analytics: GrowthAnalytics | null): GenreTrendData[] {
   const genreCounts = new Map<string, { artists: number; likes: number; followers: number }>();
   
   artists.forEach(artist => {
@@ -83,20 +230,26 @@ function generateGenreTrendsFromData(artists: ArtistMetrics[]): GenreTrendData[]
   
   const totalArtists = artists.length;
   
-  return Array.from(genreCounts.entries())
+  return withGenreGrowth(Array.from(genreCounts.entries())
     .map(([genre, data]) => {
       const percentage = totalArtists > 0 ? (data.artists / totalArtists) * 100 : 0;
-      const growth = (Math.random() - 0.3) * 25; // Slightly positive bias
       
       return {
         genre,
         plays: data.likes, // Using likes as plays proxy
-        growth: Number(growth.toFixed(1)),
         percentage: Number(percentage.toFixed(1))
       };
     })
     .sort((a, b) => b.plays - a.plays)
-    .slice(0, 6);
+    .slice(0, 6), analytics);
+}
+
+// Attach measured view growth to genre trend rows (0 for genres without scrape history)
+function withGenreGrowth(trends: Omit<GenreTrendData, 'growth'>[], analytics: GrowthAnalytics | null): GenreTrendData[] {
+  return trends.map(trend => {
+    const growth = analytics?.genres[trend.genre.toLowerCase()]?.growthPct ?? 0;
+    return { ...trend, growth: Number(growth.toFixed(1)) };
+  });
 }
 
 // Calculate KPIs from custom artists
@@ -116,6 +269,16 @@ function calculateKPIsFromData(artists: ArtistMetrics[]): KPIMetrics {
   };
 }
 
+// Map genre filter values from the UI to stored genre names
+function resolveGenre(genre: string): string {
+  const genreMap: { [key: string]: string } = {
+    'hiphop': 'Hip-Hop',
+    'pop': 'Pop',
+    'rnb': 'R&B'
+  };
+  return genreMap[genre.toLowerCase()] || genre;
+}
+
 export async function GET(request: NextRequest) {
   try {
     const { searchParams } = new URL(request.url);
@@ -124,49 +287,66 @@ export async function GET(request: NextRequest) {
     const toDate = searchParams.get('to');
     const region = searchParams.get('region') || 'Global';
 
-    // Load custom artists from the managed file
-    let artists = loadCustomArtists();
+    // Serve precomputed rollups when they are current; date filters need the live path
+    const genreKey = genre === 'all' ? 'all' : resolveGenre(genre).toLowerCase();
+    const rollups = loadRollups();
+    const rollup = !fromDate && !toDate ? rollups?.filters[genreKey] : undefined;
     
-    // Apply genre filter
-    if (genre !== 'all') {
-      const genreMap: { [key: string]: string } = {
-        'hiphop': 'Hip-Hop',
-        'pop': 'Pop',
-        'rnb': 'R&B'
-      };
-      const targetGenre = genreMap[genre.toLowerCase()] || genre;
-      artists = artists.filter(artist => 
-        artist.genres.some(g => g.toLowerCase() === targetGenre.toLowerCase())
-      );
-    }
+    let kpis: KPIMetrics;
+    let genreTrends: GenreTrendData[];
+    let artistGrowth: ArtistGrowthData[];
+    let hashtagCooccurrence: HashtagData[];
+    let sortedArtists: ArtistMetrics[];
+    
+    if (rollup) {
+      // Rankings were computed when the rollups were rebuilt; only genre growth is looked up
+      kpis = rollup.kpis;
+      genreTrends = withGenreGrowth(rollup.genreTrends.slice(0, 6), loadAnalytics());
+      artistGrowth = rollup.artistGrowth;
+      hashtagCooccurrence = withCommonHashtags(new Map(rollup.hashtags.map((h): [string, number] => [h.text, h.value])));
+      sortedArtists = rollup.artists;
+    } else {
+      const analytics = withRollupGrowth(loadAnalytics(), rollups);
 
-    // Apply date filters if provided (filter by creation date)
-    if (fromDate) {
-      const fromTime = new Date(fromDate);
-      artists = artists.filter(artist => {
-        const createdAt = artist.createdAt ? new Date(artist.createdAt) : new Date();
-        return createdAt >= fromTime;
-      });
-    }
+      // Load custom artists from the managed file
+      let artists = withTrendingScores(loadCustomArtists(), analytics);
+      
+      // Apply genre filter
+      if (genre !== 'all') {
+        const targetGenre = resolveGenre(genre);
+        artists = artists.filter(artist => 
+          artist.genres.some(g => g.toLowerCase() === targetGenre.toLowerCase())
+        );
+      }
 
-    if (toDate) {
-      const toTime = new Date(toDate);
-      artists = artists.filter(artist => {
-        const createdAt = artist.createdAt ? new Date(artist.createdAt) : new Date();
-        return createdAt <= toTime;
-      });
-    }
+      // Apply date filters if provided (filter by creation date)
+      if (fromDate) {
+        const fromTime = new Date(fromDate);
+        artists = artists.filter(artist => {
+          const createdAt = artist.createdAt ? new Date(artist.createdAt) : new Date();
+          return createdAt >= fromTime;
+        });
+      }
 
-    // Generate dashboard data from custom artists
-    const kpis = calculateKPIsFromData(artists);
-    const genreTrends = generateGenreTrendsFromData(artists);
-    const artistGrowth = generateArtistGrowthData(artists);
-    const hashtagCooccurrence = generateHashtagData(artists);
+      if (toDate) {
+        const toTime = new Date(toDate);
+        artists = artists.filter(artist => {
+          const createdAt = artist.createdAt ? new Date(artist.createdAt) : new Date();
+          return createdAt <= toTime;
+        });
+      }
 
-    // Sort artists by trending score for display
-    const sortedArtists = [...artists]
-      .sort((a, b) => b.trendingScore - a.trendingScore)
-      .slice(0, 20);
+      // Generate dashboard data from custom artists
+      kpis = calculateKPIsFromData(artists);
+      genreTrends = generateGenreTrendsFromData(artists, analytics);
+      artistGrowth = generateArtistGrowthData(artists, analytics);
+      hashtagCooccurrence = generateHashtagData(artists);
+
+      // Sort artists by trending score for display
+      sortedArtists = [...artists]
+        .sort((a, b) => b.trendingScore - a.trendingScore)
+        .slice(0, 20);
+    }
 
     const dashboardData: DashboardData = {
       kpis,
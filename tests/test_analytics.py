@@ -0,0 +1,94 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('pyarrow')
+
+from tiktok_analytics import build_report, compute_growth, load_history, refresh_analytics
+from tiktok_db import MetricsDatabase
+from tiktok_store import SnapshotStore
+
+START = datetime(2024, 5, 1, 12, 0)
+WINDOWS = [1, 7]
+
+
+def snapshot(video_id, profile, when, views, likes):
+    return {'profile_name': profile, 'video_url': f"https://www.tiktok.com/@{profile}/video/{video_id}",
+            'scraped_at': when.isoformat(), 'views': views, 'likes': likes}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots'))
+    store.append([snapshot('11', 'alpha', START, 1000, 100), snapshot('12', 'alpha', START, 1000, 100),
+                  snapshot('21', 'beta', START, 400, 40)])
+    store.append([snapshot('11', 'alpha', START + timedelta(days=2), 1500, 130),
+                  snapshot('12', 'alpha', START + timedelta(days=2), 1000, 100),
+                  snapshot('21', 'beta', START + timedelta(days=2), 400, 40),
+                  snapshot('31', 'gamma', START + timedelta(days=2), 800, 80)])
+    return store
+
+
+@pytest.fixture
+def artists_path(tmp_path):
+    path = tmp_path / 'custom-artists.json'
+    path.write_text(json.dumps([{'id': 'a', 'username': 'alpha', 'genres': ['Pop']},
+                                {'id': 'b', 'username': 'beta', 'genres': ['Pop', 'Jazz']}]))
+    return str(path)
+
+
+@pytest.fixture
+def report(store, artists_path):
+    history = load_history(store)
+    assert len(history) == 7
+    return build_report(history, compute_growth(history, WINDOWS, jobs=2), WINDOWS, 7, artists_path)
+
+
+def test_artist_growth(report):
+    alpha = report['artists']['alpha']
+    assert (alpha['videos'], alpha['views'], alpha['likes']) == (2, 2500, 230)
+    assert alpha['growthPct'] == 25.0
+    window = alpha['windows']['7d']
+    assert (window['viewsDelta'], window['likesDelta']) == (500, 30)
+    assert window['viewVelocity'] == round(500 / 48, 2)
+    assert alpha['trendingScore'] > 0
+
+
+def test_flat_and_new_artists_score_zero(report):
+    assert report['artists']['beta']['growthPct'] == 0.0
+    assert report['artists']['beta']['trendingScore'] == 0.0
+    # A single snapshot measures no growth yet
+    assert report['artists']['gamma']['growthPct'] is None
+
+
+def test_genre_growth(report):
+    assert report['genres']['pop']['artists'] == 2
+    assert report['genres']['pop']['growthPct'] == round(100.0 * 500 / 2400, 2)
+    assert report['genres']['jazz']['growthPct'] == 0.0
+
+
+def test_top_videos_only_growing(report):
+    assert [video['videoId'] for video in report['topVideos']] == ['11']
+    assert report['topVideos'][0]['username'] == 'alpha'
+
+
+def test_refresh_analytics_writes_report(store, artists_path, tmp_path):
+    path = tmp_path / 'dashboard-analytics.json'
+    report = refresh_analytics(store, path=str(path), windows_days=[1], growth_window=7, jobs=1,
+                               artists_path=artists_path, db_path=str(tmp_path / 'metrics.db'))
+    assert json.loads(path.read_text()) == report
+    assert report['windowsDays'] == [1, 7]
+    assert report['growthWindow'] == '7d'
+    assert report['scoreWindow'] == '1d'
+
+
+def test_refresh_analytics_reranks_rollups(store, artists_path, tmp_path):
+    db_path, rollups_path = tmp_path / 'metrics.db', tmp_path / 'dashboard-rollups.json'
+    MetricsDatabase(str(db_path)).close()
+    refresh_analytics(store, path=str(tmp_path / 'dashboard-analytics.json'), windows_days=[1], growth_window=7,
+                      jobs=1, artists_path=artists_path, db_path=str(db_path), rollups_path=str(rollups_path))
+    ranked = json.loads(rollups_path.read_text())['filters']['pop']['artists']
+    assert [a['username'] for a in ranked] == ['alpha', 'beta']
+    assert ranked[0]['trendingScore'] > 0
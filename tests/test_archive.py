@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('webdriver_manager')
+pytest.importorskip('selectolax')
+
+import tiktok_archive as archive_module
+import tiktok_benchmark as benchmark
+from tiktok_archive import PageArchive, extract_profile_page, extract_video_page, reextract
+
+PROFILE = 'https://www.tiktok.com/@someone'
+
+
+def state_script(items):
+    state = {'__DEFAULT_SCOPE__': {'webapp.item-list': {'itemList': [
+        {'id': video_id, 'stats': {'playCount': views, 'diggCount': likes}} for video_id, views, likes in items
+    ]}}}
+    return f'<script id="__UNIVERSAL_DATA_FOR_REHYDRATION__" type="application/json">{json.dumps(state)}</script>'
+
+
+def profile_html(tiles, state=''):
+    links = ''.join(f'<div data-e2e="user-post-item"><a href="/@someone/video/{video_id}">'
+                    f'<strong data-e2e="video-views">{views}</strong></a></div>' for video_id, views in tiles)
+    return f"<html><head>{state}</head><body><div>{links}</div></body></html>"
+
+
+def test_extract_profile_page_reads_tiles_and_state():
+    html = profile_html([('1', '1.2K'), ('2', '15'), ('1', '1.2K')], state_script([('2', 16, 3), ('9', 1, 1)]))
+    videos = extract_profile_page(html, PROFILE)
+    assert list(videos) == ['1', '2']
+    assert videos['1'] == (f"{PROFILE}/video/1", {'views': '1.2K'})
+    # Exact counts from the state win; state for videos not in the grid is ignored
+    assert videos['2'][1] == {'views': '16', 'likes': '3'}
+
+
+def test_extract_profile_page_without_tiles():
+    assert extract_profile_page('<html><body>No videos</body></html>', PROFILE) == {}
+
+
+@pytest.mark.parametrize('with_state', [True, False])
+def test_extract_video_page_matches_fixture(with_state):
+    video_id = benchmark.synthetic_video_ids('someone-3', 3)[0]
+    video_url = f"{PROFILE}/video/{video_id}"
+    metrics = extract_video_page(benchmark.render_video_page('someone-3', video_id, with_state), video_url)
+    expected = benchmark.synthetic_stats(video_id)
+    parsed = {metric: archive_module.scraper.parse_count(text) for metric, text in metrics.items()}
+    if with_state:
+        assert parsed == expected
+    else:
+        assert parsed == {metric: expected[metric] for metric in ('likes', 'bookmarks', 'comments')}
+
+
+def test_reextract_merges_pages_run_by_run(tmp_path):
+    root = str(tmp_path / 'archive')
+    first = PageArchive(root, run_id='20240501_120000')
+    second = PageArchive(root, run_id='20240502_120000')
+    first.put(PROFILE, 'profile', profile_html([('1', '1K'), ('2', '2K')]), PROFILE)
+    # Runs interleave in the manifest when they overlap
+    second.put(PROFILE, 'profile', profile_html([('1', '3K')]), PROFILE)
+    first.put(f"{PROFILE}/video/1", 'video',
+              '<html><body><strong data-e2e="browse-like-count">12</strong></body></html>', PROFILE)
+    first.put('https://www.tiktok.com/api/post/item_list/?cursor=0', 'item_list',
+              json.dumps({'itemList': [{'id': '2', 'stats': {'commentCount': 4}}]}), PROFILE)
+
+    runs = []
+    for profile_url, record in reextract(PageArchive(root), jobs=1):
+        assert profile_url == PROFILE
+        runs.append((record['video_url'].rsplit('/', 1)[1], record['views'], record['likes'], record['comments']))
+    assert runs == [('1', 1000, 12, 0), ('2', 2000, 0, 4), ('1', 3000, 0, 0)]
+    assert PageArchive(root).stats()['runs'] == 2
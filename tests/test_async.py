@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('webdriver_manager')
+
+import tiktok_async
+import tiktok_scraper as scraper
+
+PROFILE = 'https://www.tiktok.com/@someone'
+
+
+def engine_with(monkeypatch, tiles, fetch):
+    engine = tiktok_async.AsyncScraper(2, scraper.ScrapeConfig(jitter=(0.0, 0.0)))
+
+    async def load_grid(url, index, archive=None):
+        return tiles, {}
+
+    monkeypatch.setattr(engine, '_load_profile_grid', load_grid)
+    monkeypatch.setattr(engine, 'fetch_video_metrics', fetch)
+    return engine
+
+
+def tile(n, views='1.2K'):
+    return {'href': f"{PROFILE}/video/{n}", 'views': views}
+
+
+def test_failed_video_does_not_lose_the_profile(monkeypatch):
+    async def fetch(video_url, archive=None, profile_url=None):
+        if video_url.endswith('/2'):
+            raise ConnectionError('connection closed')
+        return {'likes': '10', 'bookmarks': '1', 'comments': '2'}
+
+    engine = engine_with(monkeypatch, [tile(1), tile(2), tile(3)], fetch)
+    video_data = asyncio.run(engine.scrape_profile(PROFILE))
+    assert sorted(record['video_url'][-1] for record in video_data) == ['1', '3']
+    assert all(record['likes'] == 10 for record in video_data)
+
+
+def test_every_video_failing_is_a_profile_error(monkeypatch):
+    async def fetch(video_url, archive=None, profile_url=None):
+        raise tiktok_async.CdpError('tab crashed')
+
+    engine = engine_with(monkeypatch, [tile(1), tile(2)], fetch)
+    with pytest.raises(scraper.ProfileError, match='All 2 videos failed'):
+        asyncio.run(engine.scrape_profile(PROFILE))
@@ -0,0 +1,109 @@
+import json
+import os
+import re
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('webdriver_manager')
+
+import tiktok_benchmark as benchmark
+import tiktok_scraper as scraper
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             benchmark.BENCHMARK_DIR, 'baseline.json')
+
+
+@pytest.fixture(scope='module')
+def server():
+    with benchmark.FixtureServer(page_size=10, scroll_latency=0, page_latency=0) as fixture_server:
+        yield fixture_server
+
+
+def fetch(url):
+    with urlopen(url, timeout=10) as response:
+        return response.read().decode('utf-8')
+
+
+def test_format_count_parses_back_to_synthetic_stats():
+    for video_id in benchmark.synthetic_video_ids('counts', 50):
+        for metric, value in benchmark.synthetic_stats(video_id).items():
+            assert scraper.parse_count(benchmark.format_count(value)) == value, (video_id, metric)
+
+
+def test_profile_page_embeds_first_page_state(server):
+    html = fetch(server.profile_url('alpha', 25))
+    state = re.search(r'<script id="%s" type="application/json">(.*?)</script>'
+                      % scraper.PAGE_STATE_SCRIPT_IDS[0], html).group(1)
+    stats = scraper.parse_page_state_stats(state)
+    video_ids = benchmark.synthetic_video_ids('alpha-25', 25)
+    assert sorted(stats) == sorted(video_ids[:10])
+    for video_id, raw in stats.items():
+        expected = benchmark.synthetic_stats(video_id)
+        assert {metric: scraper.parse_count(text) for metric, text in raw.items()} == expected
+
+
+def test_item_list_pages_through_every_video(server):
+    seen = []
+    cursor = 0
+    while True:
+        payload = json.loads(fetch(f"{server.base_url}/api/post/item_list/?user=beta-25&cursor={cursor}&count=10"))
+        seen += [item['id'] for item in payload['itemList']]
+        if not payload['hasMore']:
+            break
+        cursor = int(payload['cursor'])
+    assert seen == benchmark.synthetic_video_ids('beta-25', 25)
+
+
+def test_video_page_counts_match_fixture(server):
+    video_id = benchmark.synthetic_video_ids('gamma-5', 5)[0]
+    expected = benchmark.synthetic_stats(video_id)
+    html = fetch(f"{server.profile_url('gamma', 5)}/video/{video_id}")
+    shown = dict(re.findall(r'data-e2e="(browse-like-count|browse-comment-count|undefined-count)">([^<]+)<', html))
+    assert scraper.parse_count(shown['browse-like-count']) == expected['likes']
+    assert scraper.parse_count(shown['browse-comment-count']) == expected['comments']
+    assert scraper.parse_count(shown['undefined-count']) == expected['bookmarks']
+
+
+def test_unknown_pages_are_404(server):
+    for path in ('/@nosize', '/elsewhere', '/api/post/item_list/?cursor=0'):
+        with pytest.raises(HTTPError) as error:
+            fetch(server.base_url + path)
+        assert error.value.code == 404
+
+
+def test_check_accuracy():
+    video_id = benchmark.synthetic_video_ids('delta', 2)[0]
+    stats = benchmark.synthetic_stats(video_id)
+    url = f"https://www.tiktok.com/@delta-2/video/{video_id}"
+    assert benchmark.check_accuracy([dict(stats, video_url=url)]) == 1.0
+    assert benchmark.check_accuracy([dict(stats, views=stats['views'] + 1, video_url=url)]) == 0.0
+    assert benchmark.check_accuracy([]) is None
+
+
+def test_compare_to_baseline():
+    baseline = {'results': [{'mode': 'bulk', 'size': 30, 'videos_per_second': 10.0, 'accuracy': 1.0}]}
+    assert benchmark.compare_to_baseline(
+        [{'mode': 'bulk', 'size': 30, 'videos_per_second': 9.0, 'accuracy': 1.0}], baseline, 0.2) == []
+    regressions = benchmark.compare_to_baseline(
+        [{'mode': 'bulk', 'size': 30, 'videos_per_second': 5.0, 'accuracy': 0.5}], baseline, 0.2)
+    assert len(regressions) == 2
+    assert benchmark.compare_to_baseline(
+        [{'mode': 'legacy', 'size': 30, 'videos_per_second': 1.0, 'accuracy': 1.0}], baseline, 0.2) == []
+
+
+def test_committed_baseline_is_a_report():
+    with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    assert baseline['results']
+    for result in baseline['results']:
+        assert result['videos_per_second'] > 0
+        assert result['accuracy'] == 1.0
+
+
+def test_reextract_benchmark_matches_fixture(server):
+    pytest.importorskip('selectolax')
+    results = benchmark.run_benchmark(server, [12], ['reextract'])
+    assert [(r['mode'], r['size'], r['videos'], r['accuracy']) for r in results] == [('reextract', 12, 12, 1.0)]
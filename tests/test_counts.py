@@ -0,0 +1,52 @@
+import pytest
+
+from tiktok_counts import parse_count_strict, parse_counts
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('0', 0),
+    ('842', 842),
+    ('1,234', 1234),
+    ('1.234.567', 1234567),
+    ('142.5K', 142500),
+    ('1.2M', 1200000),
+    ('3B', 3000000000),
+    ('1,2 M', 1200000),
+    ('12,5K', 12500),
+    ('1 234', 1234),
+    ('10.5万', 105000),
+    ('2,3 Mio.', 2300000),
+    ('1.5M views', 1500000),
+    ('12.3K likes', 12300),
+    ('842 views', 842),
+    ('1,2 M Aufrufe', 1200000),
+])
+def test_parse_count_strict(text, expected):
+    assert parse_count_strict(text) == expected
+
+
+@pytest.mark.parametrize('text', [None, '', 'N/A', 'Share', 'views', 'no views', '1.2.3K', '1.2.3K views', '12.5',
+                                  '1,23,4', '12 views 3'])
+def test_parse_count_strict_rejects_non_counts(text):
+    assert parse_count_strict(text) is None
+
+
+def test_parse_count_strict_locale():
+    assert parse_count_strict('1.234,5K', locale='eu') == 1234500
+    assert parse_count_strict('1,234.5K', locale='en') == 1234500
+    assert parse_count_strict('1.5', locale='eu') is None
+
+
+@pytest.mark.parametrize('text, expected', [('1.5M views', 1500000), ('12.3K likes', 12300), ('842 views', 842),
+                                            ('Share', 0), (None, 0)])
+def test_parse_count(text, expected):
+    pytest.importorskip('selenium')
+    pytest.importorskip('webdriver_manager')
+    import tiktok_scraper as scraper
+    assert scraper.parse_count(text) == expected
+
+
+def test_parse_counts_column():
+    counts, valid = parse_counts(['1.5M views', '0', None, 'Share', '1.5M views'])
+    assert list(counts) == [1500000, 0, 0, 0, 1500000]
+    assert list(valid) == [True, True, False, False, True]
@@ -0,0 +1,96 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from tiktok_db import GROWTH_WINDOW_DAYS, TOP_ARTISTS, MetricsDatabase
+
+ARTISTS = 25
+
+
+def artist(i):
+    return {
+        'id': f"artist-{i}",
+        'username': f"artist{i}",
+        'name': f"Artist {i}",
+        'likes': 10000 * (i + 1),
+        'followers': 100 * i,
+        'trendingScore': (i * 7) % ARTISTS,
+        'genres': ['Pop'] if i % 2 else ['Pop', 'R&B'],
+        'breakoutSong': {'plays': 500 * i},
+    }
+
+
+def snapshot(video_id, username, when, views):
+    return {'video_id': video_id, 'profile_name': username, 'scraped_at': when.isoformat(),
+            'video_url': f"https://www.tiktok.com/@{username}/video/{video_id}",
+            'views': views, 'likes': views // 10, 'bookmarks': 1, 'comments': 2}
+
+
+@pytest.fixture
+def rollups(tmp_path):
+    artists_path = tmp_path / 'custom-artists.json'
+    artists_path.write_text(json.dumps([artist(i) for i in range(ARTISTS)]))
+    rollups_path = tmp_path / 'dashboard-rollups.json'
+    # Measured by tiktok_analytics: artist0's stored score is the lowest
+    analytics_path = tmp_path / 'dashboard-analytics.json'
+    analytics_path.write_text(json.dumps({'artists': {
+        'artist0': {'videos': 1, 'views': 900, 'likes': 90, 'trendingScore': 99.0, 'growthPct': 10.0},
+        'artist5': {'videos': 1, 'views': 1234, 'likes': 10, 'trendingScore': None, 'growthPct': 80.0},
+    }}))
+
+    now = datetime.now()
+    old = now - timedelta(days=GROWTH_WINDOW_DAYS + 3)
+    recent = now - timedelta(hours=1)
+    db = MetricsDatabase(str(tmp_path / 'metrics.db'))
+    try:
+        db.insert_snapshots([snapshot('1', 'artist3', old, 1000), snapshot('2', 'artist3', old, 3000)])
+        db.insert_snapshots([snapshot('1', 'artist3', recent, 2000), snapshot('2', 'artist3', recent, 4000),
+                             snapshot('3', 'unmanaged', recent, 50)])
+        db.rebuild(str(artists_path), str(rollups_path), str(analytics_path))
+    finally:
+        db.close()
+    return json.loads(rollups_path.read_text())
+
+
+def test_artist_stats_use_latest_snapshots(rollups):
+    stats = rollups['artistStats']['artist3']
+    assert (stats['videos'], stats['views'], stats['likes'], stats['bookmarks'], stats['comments']) == \
+        (2, 6000, 600, 2, 4)
+    assert stats['growthPct'] == 50.0
+    assert rollups['growthWindow'] == f"{GROWTH_WINDOW_DAYS}d"
+
+
+def test_artist_without_window_snapshot_has_no_growth(rollups):
+    assert rollups['artistStats']['unmanaged']['growthPct'] is None
+
+
+def test_top_artists_use_measured_scores(rollups):
+    ranked = rollups['filters']['all']['artists']
+    assert len(ranked) == TOP_ARTISTS
+    assert (ranked[0]['username'], ranked[0]['trendingScore']) == ('artist0', 99.0)
+    scores = [a['trendingScore'] for a in ranked]
+    assert scores == sorted(scores, reverse=True)
+    # No measured score: the one from custom-artists.json stands
+    assert {'username': 'artist5', 'trendingScore': 10} in [
+        {'username': a['username'], 'trendingScore': a['trendingScore']} for a in ranked]
+    assert 'unmanaged' not in {a['username'] for a in ranked}
+
+
+def test_artist_growth_ranking(rollups):
+    # Measured growth first, then the database's own view growth for artists without analytics
+    assert rollups['filters']['all']['artistGrowth'] == [
+        {'artistName': 'Artist 5', 'percentGrowth': 80.0, 'totalPlays': 1234},
+        {'artistName': 'Artist 3', 'percentGrowth': 50.0, 'totalPlays': 6000},
+        {'artistName': 'Artist 0', 'percentGrowth': 10.0, 'totalPlays': 900},
+    ]
+    assert [g['artistName'] for g in rollups['filters']['r&b']['artistGrowth']] == ['Artist 0']
+
+
+def test_genre_filters(rollups):
+    assert set(rollups['filters']) == {'all', 'pop', 'r&b'}
+    assert len(rollups['filters']['r&b']['artists']) == (ARTISTS + 1) // 2
+    kpis = rollups['filters']['all']['kpis']
+    assert kpis['totalLikes'] == sum(artist(i)['likes'] for i in range(ARTISTS))
+    trends = {trend['genre']: trend for trend in rollups['filters']['all']['genreTrends']}
+    assert trends['Pop']['percentage'] == 100.0
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('webdriver_manager')
+
+import tiktok_scraper as scraper
+from tiktok_records import RecordBatch, UpToDate, VideoRecord
+
+PROFILE_URL = 'https://www.tiktok.com/@someone'
+
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(scraper, 'INDEX_DIR', str(tmp_path / 'index'))
+    return tmp_path / 'index'
+
+
+def record(video_id, hours_ago=0, views=100):
+    scraped_at = (datetime.now() - timedelta(hours=hours_ago)).isoformat()
+    return VideoRecord(f"{PROFILE_URL}/video/{video_id}", views=views, scraped_at=scraped_at)
+
+
+def test_index_round_trips(index_dir):
+    index = scraper.ProfileIndex.for_url(PROFILE_URL)
+    assert index.profile_name == 'someone'
+    assert len(index) == 0
+    index.update(record('1', views=42))
+    index.save()
+
+    loaded = scraper.ProfileIndex.for_url(PROFILE_URL)
+    assert loaded.is_known('1')
+    assert loaded.videos['1']['views'] == 42
+    assert (index_dir / 'someone.json').exists()
+
+
+def test_unreadable_index_starts_fresh(index_dir):
+    index_dir.mkdir()
+    (index_dir / 'someone.json').write_text('{not json')
+    assert len(scraper.ProfileIndex.for_url(PROFILE_URL)) == 0
+
+
+def test_needs_refresh_after_stale_hours():
+    index = scraper.ProfileIndex.for_url(PROFILE_URL, stale_hours=6)
+    index.update(record('1', hours_ago=1))
+    index.update(record('2', hours_ago=7))
+    index.videos['3'] = {'scraped_at': 'yesterday'}
+    assert not index.needs_refresh('1')
+    assert index.needs_refresh('2')
+    assert index.needs_refresh('3')
+    assert index.needs_refresh('4')
+
+
+def test_known_run_counts_trailing_known_videos():
+    index = scraper.ProfileIndex.for_url(PROFILE_URL)
+    for video_id in ('3', '4', '5'):
+        index.update(record(video_id))
+    assert index.known_run(['1', '2', '3', '4', '5']) == 3
+    assert index.known_run(['3', '4', '9']) == 0
+    assert index.known_run([]) == 0
+
+
+def test_profile_result():
+    batch = RecordBatch([record('1')])
+    assert scraper.profile_result(batch, failed=1) is batch
+    assert isinstance(scraper.profile_result(RecordBatch(), incremental=True), UpToDate)
+    plain = scraper.profile_result(RecordBatch())
+    assert len(plain) == 0 and not isinstance(plain, UpToDate)
+    with pytest.raises(scraper.ProfileError):
+        scraper.profile_result(RecordBatch(), failed=3, incremental=True)
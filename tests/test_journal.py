@@ -0,0 +1,89 @@
+import csv
+import glob
+import json
+import os
+
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('webdriver_manager')
+
+import tiktok_scraper as scraper
+from tiktok_records import VideoRecord
+
+URLS = ['https://www.tiktok.com/@first', 'https://www.tiktok.com/@second']
+
+
+def record(profile_url, video_id, views):
+    return VideoRecord(f"{profile_url}/video/{video_id}", views=views, views_raw=str(views),
+                       scraped_at='2024-05-01T12:00:00')
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'checkpoints' / 'journal.jsonl')
+
+
+def test_resume_restores_progress(path):
+    journal = scraper.RunJournal.start(path, URLS, separate_files=False)
+    journal.record_video(URLS[0], 1, record(URLS[0], '11', 100))
+    journal.record_video(URLS[0], 0, record(URLS[0], '10', 200))
+    journal.complete_profile(URLS[0], 2)
+    journal.record_video(URLS[1], 0, record(URLS[1], '20', 300))
+    journal.close()
+    # A crash mid-write leaves a partial last line
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "video", "profile_')
+
+    resumed = scraper.RunJournal.resume(path)
+    try:
+        assert resumed.urls == URLS
+        assert resumed.separate_files is False
+        assert resumed.is_profile_complete(URLS[0])
+        assert not resumed.is_profile_complete(URLS[1])
+        assert resumed.completed_positions(URLS[1]) == {0}
+        assert resumed.completed_video_ids(URLS[1]) == {'20'}
+        assert [r['video_url'] for r in resumed.records(URLS[0])] == [f"{URLS[0]}/video/10", f"{URLS[0]}/video/11"]
+        resumed.record_video(URLS[1], 1, record(URLS[1], '21', 400))
+    finally:
+        resumed.close()
+
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert json.loads(lines[-1])['record']['video_url'] == f"{URLS[1]}/video/21"
+
+
+def test_records_keep_the_latest_attempt_per_video(path):
+    journal = scraper.RunJournal.start(path, URLS, separate_files=True)
+    journal.record_video(URLS[0], 0, record(URLS[0], '10', 100))
+    # A new video pushed the grid down between attempts
+    journal.record_video(URLS[0], 1, record(URLS[0], '10', 150))
+    journal.close()
+    resumed = scraper.RunJournal.resume(path)
+    records = resumed.records(URLS[0])
+    resumed.close()
+    assert [r['views'] for r in records] == [150]
+
+
+def test_finished_or_missing_journal_is_not_resumed(path):
+    assert scraper.RunJournal.resume(path) is None
+    journal = scraper.RunJournal.start(path, URLS, separate_files=False)
+    journal.finish()
+    assert scraper.RunJournal.resume(path) is None
+
+
+def test_main_resume_writes_completed_profiles(path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    journal = scraper.RunJournal.start(path, URLS, separate_files=False)
+    for i, url in enumerate(URLS):
+        journal.record_video(url, 0, record(url, f"{i}0", 100 * (i + 1)))
+        journal.complete_profile(url, 1)
+    journal.close()
+
+    scraper.main(['--resume', '--checkpoint', path])
+
+    [output] = glob.glob(os.path.join('data', 'tiktok_scrape_combined_*.csv'))
+    with open(output, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert [(row['profile_name'], row['views']) for row in rows] == [('first', '100'), ('second', '200')]
+    assert scraper.RunJournal.resume(path) is None
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('webdriver_manager')
+
+import tiktok_scheduler as scheduler
+import tiktok_scraper as scraper
+from tiktok_records import VideoRecord
+
+URLS = [f"https://www.tiktok.com/@user{i}" for i in range(3)]
+
+
+class ListSink:
+    separate_files = False
+
+    def __init__(self):
+        self.rows = []
+
+    def write(self, profile_url, record):
+        self.rows.append((profile_url, record['video_url']))
+
+
+class FakePool:
+    def __init__(self, size):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def acquire(self):
+        return object()
+
+    def release(self, driver):
+        pass
+
+    def recycle(self, driver):
+        pass
+
+
+@pytest.fixture
+def fake_browsers(monkeypatch):
+    # The first profile's videos are held back until the others are done
+    first_may_finish = threading.Event()
+    done = []
+
+    def discover(url, driver, index=None, skip_ids=None, archive=None, on_videos=None, large=False):
+        return [(n, str(n), f"{url}/video/{n}", '1') for n in range(2)]
+
+    def scrape_video_page(driver, waiter, video_url, view_count=None, archive=None, profile_url=None):
+        if profile_url == URLS[0]:
+            first_may_finish.wait(5)
+        else:
+            done.append(video_url)
+            if len(done) == 4:
+                first_may_finish.set()
+        return VideoRecord(video_url, views=1)
+
+    class Waiter:
+        def __init__(self, driver):
+            pass
+
+        def pause(self, name):
+            return 0.0
+
+    monkeypatch.setattr(scraper, 'BrowserPool', FakePool)
+    monkeypatch.setattr(scraper, 'AdaptiveWaiter', Waiter)
+    monkeypatch.setattr(scraper, 'discover_profile_videos', discover)
+    monkeypatch.setattr(scraper, 'scrape_video_page', scrape_video_page)
+
+
+def test_pipeline_writes_combined_output_in_queue_order(fake_browsers):
+    sink = ListSink()
+    results = list(scraper.scrape_profiles_pipeline(URLS, workers=3, detail_workers=3, sink=sink))
+    assert results[-1][1] == URLS[0]
+    assert all(error is None for _, _, _, error in results)
+    assert [url for url, _ in sink.rows] == [URLS[0]] * 2 + [URLS[1]] * 2 + [URLS[2]] * 2
+
+
+def test_pipeline_rejects_bulk_and_network(capsys):
+    for option in ('--bulk', '--network'):
+        with pytest.raises(SystemExit) as error:
+            scraper.main(['--engine', 'pipeline', option, '--url', URLS[0], '--output', 'combined'])
+        assert error.value.code == 2
+    assert '--engine pipeline' in capsys.readouterr().out
+
+
+def test_pipeline_job_rejects_bulk(tmp_path):
+    path = tmp_path / 'job.json'
+    path.write_text('{"detail_workers": 2, "bulk": true, "profiles": ["%s"]}' % URLS[0])
+    with pytest.raises(ValueError, match='detail_workers'):
+        scheduler.load_job(str(path))
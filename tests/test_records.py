@@ -0,0 +1,66 @@
+import pytest
+
+from tiktok_records import METRIC_NAMES, RECORD_FIELDS, RecordBatch, UpToDate, VideoRecord
+
+URL = 'https://www.tiktok.com/@someone/video/1'
+
+
+def test_video_record_reads_like_a_dict():
+    record = VideoRecord(URL, views=10, likes='3', views_raw='10', scraped_at='2024-05-01T12:00:00')
+    assert record['views'] == 10
+    assert record['likes'] == 3
+    assert record.get('bookmarks') == 0
+    assert record.get('profile_name') is None
+    assert 'profile_name' not in record
+    assert list(record) == list(RECORD_FIELDS)
+    assert len(record) == len(RECORD_FIELDS)
+    with pytest.raises(KeyError):
+        record['nope']
+
+
+def test_video_record_profile_fields():
+    record = VideoRecord.from_dict({'video_url': URL, 'views': 5, 'extra': 'ignored'})
+    tagged = record.with_profile('someone', 'https://www.tiktok.com/@someone')
+    assert 'profile_name' not in record
+    assert tagged['profile_name'] == 'someone'
+    assert dict(tagged)['profile_url'] == 'https://www.tiktok.com/@someone'
+    assert len(tagged) == len(RECORD_FIELDS) + 2
+    assert VideoRecord.from_dict(dict(tagged)) == tagged
+
+
+def test_record_batch_round_trips_records():
+    records = [VideoRecord(f"{URL}{i}", views=i, likes=2 * i, comments_raw=str(i)) for i in range(3)]
+    batch = RecordBatch(records)
+    batch.append({'video_url': 'plain', 'views': '7', 'profile_name': 'other'})
+    assert len(batch) == 4
+    assert list(batch)[:3] == records
+    assert batch[-1]['profile_name'] == 'other'
+    assert batch[-1]['views'] == 7
+    assert batch.column('views').tolist() == [0, 1, 2, 7]
+    assert batch.column('comments_raw') == ['0', '1', '2', None]
+    assert batch.column('profile_name') == [None, None, None, 'other']
+    with pytest.raises(KeyError):
+        batch.column('nope')
+
+
+def test_record_batch_rows_and_totals():
+    batch = RecordBatch()
+    batch.append(VideoRecord(URL, views=10, likes=1), 'alpha', 'https://www.tiktok.com/@alpha')
+    batch.append(VideoRecord(URL, views=20, bookmarks=2), 'beta', 'https://www.tiktok.com/@beta')
+    batch.append(VideoRecord(URL, views=30, comments=3), 'alpha', 'https://www.tiktok.com/@alpha')
+    batch.append(VideoRecord(URL, views=40))
+    assert len(batch.profiles) == 2
+    assert list(batch.rows(['profile_name', 'views'])) == [('alpha', 10), ('beta', 20), ('alpha', 30), (None, 40)]
+    assert batch.to_dicts(['views'])[1] == {'views': 20}
+    assert batch.totals() == {'videos': 4, 'views': 100, 'likes': 1, 'bookmarks': 2, 'comments': 3}
+    by_profile = batch.totals_by_profile()
+    assert by_profile['alpha'] == {'videos': 2, 'views': 40, 'likes': 1, 'bookmarks': 0, 'comments': 3}
+    assert by_profile['unknown']['views'] == 40
+    assert set(by_profile['beta']) == {'videos', *METRIC_NAMES}
+
+
+def test_up_to_date_is_an_empty_batch():
+    up_to_date = UpToDate()
+    assert isinstance(up_to_date, RecordBatch)
+    assert len(up_to_date) == 0
+    assert not up_to_date
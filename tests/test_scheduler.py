@@ -0,0 +1,73 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('webdriver_manager')
+
+import tiktok_scheduler as scheduler
+from tiktok_records import VideoRecord
+
+PROFILE = 'https://www.tiktok.com/@someone'
+
+
+def write_job(tmp_path, job, name='job.json'):
+    path = tmp_path / name
+    path.write_text(json.dumps(job) if name.endswith('.json') else job)
+    return str(path)
+
+
+def test_load_job_fills_defaults(tmp_path):
+    job = scheduler.load_job(write_job(tmp_path, {
+        'format': 'ndjson',
+        'refresh_hours': 3,
+        'profiles': [PROFILE, {'url': 'https://www.tiktok.com/@other', 'priority': 1, 'refresh_hours': 1}],
+    }))
+    assert job['format'] == ['ndjson']
+    assert job['workers'] == scheduler.JOB_DEFAULTS['workers']
+    assert job['profiles'] == [
+        {'url': PROFILE, 'priority': scheduler.DEFAULT_PRIORITY, 'refresh_hours': 3.0},
+        {'url': 'https://www.tiktok.com/@other', 'priority': 1, 'refresh_hours': 1.0},
+    ]
+
+
+@pytest.mark.parametrize('job, message', [
+    ([PROFILE], 'must be a mapping'),
+    ({'profiles': [PROFILE], 'wrokers': 2}, 'unknown job option(s): wrokers'),
+    ({'profiles': [PROFILE], 'format': ['csv', 'xlsx']}, 'unknown format(s): xlsx'),
+    ({'profiles': ['https://example.com/@someone']}, 'not a TikTok profile URL'),
+    ({'profiles': [{'priority': 1}]}, 'not a TikTok profile URL'),
+    ({'workers': 2}, 'no profiles listed'),
+])
+def test_load_job_rejects_malformed_jobs(tmp_path, job, message):
+    with pytest.raises(ValueError) as error:
+        scheduler.load_job(write_job(tmp_path, job))
+    assert message in str(error.value)
+
+
+def test_load_yaml_job(tmp_path):
+    pytest.importorskip('yaml')
+    job = scheduler.load_job(write_job(tmp_path, f"bulk: true\nprofiles:\n  - {PROFILE}\n", name='job.yaml'))
+    assert job['bulk'] is True
+    assert [p['url'] for p in job['profiles']] == [PROFILE]
+
+
+def test_refresh_interval_follows_growth():
+    job = dict(scheduler.JOB_DEFAULTS)
+    profile = {'url': PROFILE, 'priority': 5, 'refresh_hours': 6.0}
+    assert scheduler.refresh_interval(profile, None, job) == 6.0
+    assert scheduler.refresh_interval(profile, job['trending_rate'] * 2, job) == 3.0
+    assert scheduler.refresh_interval(profile, 10.0, job) == job['min_refresh_hours']
+    assert scheduler.refresh_interval(profile, 0.0, job) == job['max_refresh_hours']
+
+
+def test_record_run_measures_view_growth(tmp_path):
+    state = scheduler.ScheduleState(str(tmp_path / 'state.json'))
+    start = datetime(2024, 5, 1, 12, 0)
+    assert state.record_run(PROFILE, [VideoRecord(f"{PROFILE}/video/1", views=1000)], start) is None
+    rate = state.record_run(PROFILE, [VideoRecord(f"{PROFILE}/video/1", views=1100),
+                                      VideoRecord(f"{PROFILE}/video/2", views=50)], start + timedelta(hours=10))
+    assert rate == pytest.approx(0.01)
+    # An up-to-date crawl keeps the previous rate
+    assert state.record_run(PROFILE, [], start + timedelta(hours=11)) == rate
@@ -0,0 +1,134 @@
+import csv
+import json
+import os
+
+import pytest
+
+pytest.importorskip('selenium')
+pytest.importorskip('webdriver_manager')
+
+import tiktok_scraper as scraper
+from tiktok_records import VideoRecord
+
+URLS = [f"https://www.tiktok.com/@user{i}" for i in range(3)]
+
+
+class ListSink:
+    separate_files = False
+
+    def __init__(self):
+        self.rows = []
+        self.closed = False
+
+    def write(self, profile_url, record):
+        self.rows.append((profile_url, record['video_url']))
+
+    def end_profile(self, profile_url):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def record(profile_url, n, **metrics):
+    return VideoRecord(f"{profile_url}/video/{n}", **metrics)
+
+
+def test_queue_order_sink_writes_head_profile_straight_through():
+    sink = ListSink()
+    ordered = scraper.QueueOrderSink(sink, URLS)
+    ordered.write(URLS[0], record(URLS[0], 1))
+    assert sink.rows == [(URLS[0], f"{URLS[0]}/video/1")]
+
+
+def test_queue_order_sink_holds_profiles_that_finish_early():
+    sink = ListSink()
+    ordered = scraper.QueueOrderSink(sink, URLS)
+    ordered.write(URLS[2], record(URLS[2], 1))
+    ordered.finish(2)
+    ordered.write(URLS[1], record(URLS[1], 1))
+    ordered.finish(1)
+    assert sink.rows == []
+
+    ordered.write(URLS[0], record(URLS[0], 1))
+    ordered.write(URLS[0], record(URLS[0], 2))
+    ordered.finish(0)
+    assert [url for url, _ in sink.rows] == [URLS[0], URLS[0], URLS[1], URLS[2]]
+    assert ordered.held == {}
+
+
+def test_queue_order_sink_releases_held_records_on_close():
+    sink = ListSink()
+    ordered = scraper.QueueOrderSink(sink, URLS)
+    ordered.write(URLS[2], record(URLS[2], 1))
+    ordered.write(URLS[1], record(URLS[1], 1))
+    ordered.close()
+    assert [url for url, _ in sink.rows] == [URLS[1], URLS[2]]
+    assert sink.closed
+
+
+def test_csv_sink_combined_file(tmp_path):
+    sink = scraper.CsvSink(batch_size=2, output_dir=str(tmp_path))
+    sink.announce = False
+    sink.write(URLS[0], record(URLS[0], 1, views=10, likes=1))
+    sink.write(URLS[1], record(URLS[1], 2, views=20, likes=2))
+    sink.write(URLS[0], record(URLS[0], 3, views=30, likes=3))
+    [name] = os.listdir(tmp_path)
+    # Two rows are flushed once the batch fills; the third waits for close()
+    with open(tmp_path / name, newline='', encoding='utf-8') as f:
+        assert len(list(csv.reader(f))) == 3
+    sink.close()
+
+    with open(tmp_path / name, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        assert reader.fieldnames == scraper.COMBINED_CSV_FIELDNAMES
+        rows = list(reader)
+    assert [(row['profile_name'], row['views']) for row in rows] == [('user0', '10'), ('user1', '20'), ('user0', '30')]
+    assert sink.totals() == {'videos': 3, 'views': 60, 'likes': 6, 'bookmarks': 0, 'comments': 0}
+
+
+def test_csv_sink_separate_files_close_on_end_profile(tmp_path):
+    sink = scraper.CsvSink(separate_files=True, output_dir=str(tmp_path))
+    sink.announce = False
+    sink.write(URLS[0], record(URLS[0], 1, views=10))
+    sink.write(URLS[1], record(URLS[1], 2, views=20))
+    sink.end_profile(URLS[0])
+    assert list(sink._outputs) == ['user1']
+    sink.close()
+
+    files = sorted(os.listdir(tmp_path))
+    assert [name.split('_')[0] for name in files] == ['user0', 'user1']
+    with open(tmp_path / files[0], newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        assert reader.fieldnames == scraper.CSV_FIELDNAMES
+        assert [row['views'] for row in reader] == ['10']
+
+
+def test_ndjson_sink(tmp_path):
+    sink = scraper.NdjsonSink(output_dir=str(tmp_path))
+    sink.announce = False
+    sink.write(URLS[0], record(URLS[0], 1, views=10, comments=4))
+    sink.close()
+    sink.close()
+
+    [name] = os.listdir(tmp_path)
+    assert name.endswith('.ndjson')
+    with open(tmp_path / name, encoding='utf-8') as f:
+        [row] = [json.loads(line) for line in f]
+    assert row['profile_name'] == 'user0'
+    assert row['profile_url'] == URLS[0]
+    assert (row['views'], row['comments']) == (10, 4)
+
+
+def test_create_sink_fans_out(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sink = scraper.create_sink(['csv', 'ndjson', 'csv'])
+    assert isinstance(sink, scraper.MultiSink)
+    assert [type(s) for s in sink.sinks] == [scraper.CsvSink, scraper.NdjsonSink]
+    sink.write(URLS[0], record(URLS[0], 1, views=5))
+    sink.close()
+    assert sink.totals()['views'] == 5
+    assert sorted(name.rsplit('.', 1)[1] for name in os.listdir(tmp_path / 'data')) == ['csv', 'ndjson']
@@ -0,0 +1,97 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from tiktok_store import SnapshotStore, delta_schema, main
+
+DAY1 = datetime(2024, 5, 1, 12, 0)
+DAY2 = datetime(2024, 5, 3, 12, 0)
+
+
+def snapshot(video_id, profile, when, views, likes=0, bookmarks=0, comments=0):
+    return {
+        'profile_name': profile,
+        'video_url': f"https://www.tiktok.com/@{profile}/video/{video_id}",
+        'scraped_at': when.isoformat(),
+        'views': views, 'likes': likes, 'bookmarks': bookmarks, 'comments': comments,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots'))
+    store.append([
+        snapshot('101', 'alpha', DAY1, 1000, 100, 10, 1),
+        snapshot('102', 'alpha', DAY1, 500, 50, 5, 2),
+        snapshot('201', 'beta', DAY1, 70),
+    ], label='alpha')
+    store.append([
+        snapshot('101', 'alpha', DAY2, 1500, 130, 12, 4),
+        snapshot('102', 'alpha', DAY2, 500, 49, 5, 2),
+        snapshot('301', 'gamma', DAY2, 9000),
+    ], label='alpha')
+    return store
+
+
+def test_append_partitions_by_scrape_date(store):
+    partitions = sorted(os.listdir(store.root))
+    assert partitions == ['scrape_date=2024-05-01', 'scrape_date=2024-05-03']
+
+
+def test_latest_per_video(store):
+    latest = store.latest_per_video(as_of=DAY2).to_pylist()
+    assert {row['video_id']: row['views'] for row in latest} == {'101': 1500, '102': 500, '201': 70, '301': 9000}
+    latest = store.latest_per_video(as_of=DAY1).to_pylist()
+    assert {row['video_id']: row['views'] for row in latest} == {'101': 1000, '102': 500, '201': 70}
+
+
+def test_delta_between_schema(store):
+    delta = store.delta_between(DAY1, DAY2)
+    assert delta.schema.equals(delta_schema())
+
+
+def test_delta_between_values(store):
+    rows = {row['video_id']: row for row in store.delta_between(DAY1, DAY2).to_pylist()}
+    # 301 has no snapshot as of DAY1; 201 is unchanged
+    assert sorted(rows) == ['101', '102', '201']
+    row = rows['101']
+    assert row['profile_name'] == 'alpha'
+    assert row['scraped_at_before'] == DAY1
+    assert row['scraped_at_after'] == DAY2
+    assert (row['views_before'], row['views_after'], row['views_delta']) == (1000, 1500, 500)
+    assert (row['likes_before'], row['likes_after'], row['likes_delta']) == (100, 130, 30)
+    assert (row['bookmarks_before'], row['bookmarks_after'], row['bookmarks_delta']) == (10, 12, 2)
+    assert (row['comments_before'], row['comments_after'], row['comments_delta']) == (1, 4, 3)
+    assert rows['102']['likes_delta'] == -1
+    assert rows['201']['views_delta'] == 0
+
+
+def test_delta_between_empty_range(store):
+    delta = store.delta_between(datetime(2024, 1, 1), DAY2)
+    assert delta.num_rows == 0
+    assert delta.schema.equals(delta_schema())
+
+
+def test_read_rejects_malformed_bounds(store):
+    with pytest.raises(ValueError):
+        store.read(until='2024-13-45')
+    with pytest.raises(ValueError):
+        store.latest_per_video(as_of='yesterday')
+    with pytest.raises(ValueError):
+        SnapshotStore(store.root + '-missing').read(since='soon')
+
+
+def test_read_accepts_aware_bounds(store):
+    as_of = DAY1.astimezone(timezone.utc)
+    latest = store.latest_per_video(as_of=as_of).to_pylist()
+    assert {row['video_id'] for row in latest} == {'101', '102', '201'}
+
+
+def test_cli_reports_malformed_bounds(store, capsys):
+    with pytest.raises(SystemExit) as error:
+        main(['--root', store.root, 'latest', '--as-of', '2024-05-0x'])
+    assert error.value.code == 2
+    assert 'Not an ISO timestamp' in capsys.readouterr().err
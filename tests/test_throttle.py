@@ -0,0 +1,87 @@
+import pytest
+
+import tiktok_throttle as throttle
+from tiktok_throttle import CircuitBreaker, RateLimiter, TokenBucket
+
+URL = 'https://www.tiktok.com/@someone'
+
+
+class Session:
+    pass
+
+
+def test_token_bucket_allows_a_burst_then_spaces_loads():
+    bucket = TokenBucket(rate=2.0, burst=3)
+    now = bucket.updated
+    assert [bucket.reserve(now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve(now) == pytest.approx(0.5)
+    assert bucket.reserve(now) == pytest.approx(1.0)
+    # Tokens refill at the rate, capped at the burst
+    assert bucket.reserve(now + 10) == 0.0
+    assert bucket.tokens == pytest.approx(2.0)
+
+
+def test_token_bucket_without_rate_never_waits():
+    bucket = TokenBucket(rate=0, burst=1)
+    assert [bucket.reserve(bucket.updated) for _ in range(5)] == [0.0] * 5
+
+
+def test_circuit_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker(failures=2, cooldown=10.0)
+    assert breaker.record(False, 0.0) == 0.0
+    assert breaker.record(False, 1.0) == 10.0
+    assert breaker.state == 'open'
+    assert breaker.wait(5.0) == pytest.approx(6.0)
+    assert breaker.wait(11.0) == 0.0
+    assert breaker.state == 'half_open'
+    # A failed trial load reopens it with a doubled cooldown
+    assert breaker.record(False, 11.0) == 20.0
+    assert breaker.wait(31.0) == 0.0
+    assert breaker.record(True, 31.0) == 0.0
+    assert (breaker.state, breaker.trips, breaker.failures) == ('closed', 0, 0)
+
+
+def test_block_page_pauses_host_and_halves_rate(monkeypatch):
+    monkeypatch.setattr(throttle.random, 'uniform', lambda low, high: 1.0)
+    limiter = RateLimiter(rate=2.0, burst=10)
+    assert limiter.reserve(URL) == 0.0
+    limiter.report(URL, 'blocked', reason='captcha')
+    _, host = limiter._host(URL)
+    assert host.bucket.rate == 1.0
+    assert limiter.reserve(URL) == pytest.approx(throttle.BACKOFF_BASE, abs=0.5)
+    # Other hosts are not affected
+    assert limiter.reserve('https://m.tiktok.com/@someone') == 0.0
+
+    limiter.report(URL, 'ok')
+    assert host.bucket.rate == pytest.approx(1.2)
+    assert host.strikes == 0
+
+
+def test_empty_pages_count_as_a_block(monkeypatch):
+    monkeypatch.setattr(throttle.random, 'uniform', lambda low, high: 1.0)
+    limiter = RateLimiter(rate=0)
+    for _ in range(throttle.EMPTY_PAGES_AS_BLOCK - 1):
+        limiter.report(URL, 'empty')
+    assert limiter.reserve(URL) == 0.0
+    limiter.report(URL, 'empty')
+    assert limiter.reserve(URL) > 0
+
+
+def test_session_circuit(monkeypatch):
+    limiter = RateLimiter(rate=0)
+    session, other = Session(), Session()
+    for _ in range(throttle.CIRCUIT_FAILURES):
+        limiter.report(URL, 'error', session)
+    assert limiter.is_open(session)
+    assert not limiter.is_open(other)
+    assert limiter.reserve(URL, session) == pytest.approx(throttle.CIRCUIT_COOLDOWN, abs=0.5)
+    assert limiter.reserve(URL, other) == 0.0
+
+
+def test_configure_only_resets_on_change():
+    limiter = RateLimiter(rate=1.0, burst=1)
+    limiter.reserve(URL)
+    limiter.configure(rate=1.0, burst=1)
+    assert limiter.reserve(URL) > 0
+    limiter.configure(rate=0)
+    assert limiter.reserve(URL) == 0.0
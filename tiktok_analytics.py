@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+TikTok Growth Analytics
+View and like velocity, growth over several windows and a trending score,
+per video, per artist and per genre, computed from the scrape history.
+
+Every scrape leaves one snapshot per video, so the history already holds
+how fast each video is growing. The snapshots are loaded from the Parquet
+snapshot store (or from scrape CSVs) into NumPy arrays and processed in
+video shards on every core: each shard is sorted by (video, time) once, and
+the snapshot at the start of every window is found with one searchsorted
+call per window. The results go to data/dashboard-analytics.json, which
+src/app/api/dashboard/route.ts serves as genre growth; when the metrics
+database exists its rollups are rebuilt with the measured trending scores
+and artist growth:
+
+    python3 tiktok_analytics.py                              # from data/snapshots
+    python3 tiktok_analytics.py --csv data/*.csv --windows 1 7 30
+
+Requires numpy and pyarrow (pip install numpy pyarrow).
+"""
+
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from tiktok_db import ANALYTICS_PATH, CUSTOM_ARTISTS_PATH, DB_PATH, GROWTH_WINDOW_DAYS, ROLLUPS_PATH, MetricsDatabase
+from tiktok_store import SNAPSHOT_DIR, SnapshotStore, profile_from_csv_name
+
+WINDOWS_DAYS = [1, 7, 30]  # Growth windows computed by default
+TRENDING_RATE = 0.01  # Hourly growth that scores 50 (the same 1%/h tiktok_scheduler treats as trending)
+LIKE_WEIGHT = 0.3  # Share of the trending score driven by like growth rather than view growth
+TOP_VIDEOS = 50  # Highest-scoring videos kept in the output
+
+def _require_numpy():
+    """
+    Import numpy, with an install hint if it is missing.
+
+    Returns:
+        module: The numpy module
+    """
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Growth analytics need numpy: pip install numpy") from e
+    return numpy
+
+def _require_pyarrow():
+    """
+    Import the pyarrow modules used to load the history.
+
+    Returns:
+        module: The pyarrow module
+    """
+    try:
+        import pyarrow
+        import pyarrow.csv
+        import pyarrow.compute
+    except ImportError as e:
+        raise ImportError("Growth analytics need pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+class History:
+    """
+    Scrape history as flat NumPy arrays, one entry per snapshot.
+
+    Videos and profiles are integer codes into ``video_ids`` and
+    ``profiles``; ``ts`` holds the scrape time in epoch seconds.
+    """
+
+    def __init__(self, video, profile, ts, views, likes, video_ids, profiles):
+        self.video = video
+        self.profile = profile
+        self.ts = ts
+        self.views = views
+        self.likes = likes
+        self.video_ids = video_ids
+        self.profiles = profiles
+
+    def __len__(self):
+        return len(self.ts)
+
+def _timestamp(value):
+    pa = _require_pyarrow()
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    return pa.scalar(value, pa.timestamp('us'))
+
+def _read_csv(path, since=None, until=None):
+    pa = _require_pyarrow()
+    pc = pa.compute
+    options = pa.csv.ConvertOptions(
+        include_columns=['profile_name', 'video_url', 'scraped_at', 'views', 'likes'],
+        include_missing_columns=True,
+        column_types={'profile_name': pa.string(), 'video_url': pa.string(), 'scraped_at': pa.timestamp('us'),
+                      'views': pa.int64(), 'likes': pa.int64()},
+    )
+    table = pa.csv.read_csv(path, convert_options=options)
+    profile = table['profile_name']
+    default_profile = profile_from_csv_name(path)
+    if default_profile is not None:
+        profile = pc.fill_null(profile, default_profile)
+    video_id = pc.struct_field(pc.extract_regex(table['video_url'], r'/video/(?P<video_id>\d+)'), [0])
+    table = pa.table({'profile_name': profile, 'video_id': video_id, 'scraped_at': table['scraped_at'],
+                      'views': table['views'], 'likes': table['likes']})
+    if since is not None:
+        table = table.filter(pc.greater_equal(table['scraped_at'], _timestamp(since)))
+    if until is not None:
+        table = table.filter(pc.less_equal(table['scraped_at'], _timestamp(until)))
+    return table
+
+def load_history(store=None, csv_paths=None, since=None, until=None):
+    """
+    Load the snapshots of the scrape history.
+
+    Video IDs and profile names are dictionary-encoded by pyarrow (hashing,
+    not sorting), and only the columns the analytics need are read.
+
+    Args:
+        store (SnapshotStore): Snapshot store to read, used when no CSVs are given
+        csv_paths (list): Scrape CSV files to read instead of the store
+        since (datetime|str): Only snapshots scraped at or after this time
+        until (datetime|str): Only snapshots scraped at or before this time
+
+    Returns:
+        History: The snapshots, in no particular order
+    """
+    np = _require_numpy()
+    pa = _require_pyarrow()
+    pc = pa.compute
+    columns = ['profile_name', 'video_id', 'scraped_at', 'views', 'likes']
+
+    if csv_paths:
+        tables = [_read_csv(path, since, until) for path in csv_paths]
+    else:
+        store = store or SnapshotStore()
+        tables = [store.read(columns=columns, since=since, until=until)]
+    tables = [table.select(columns).cast(pa.schema([
+        ('profile_name', pa.string()), ('video_id', pa.string()), ('scraped_at', pa.timestamp('us')),
+        ('views', pa.int64()), ('likes', pa.int64())])) for table in tables]
+    table = pa.concat_tables(tables)
+    table = table.filter(pc.and_(pc.is_valid(table['video_id']), pc.is_valid(table['scraped_at'])))
+
+    video = pc.dictionary_encode(table['video_id'].combine_chunks())
+    profile = pc.dictionary_encode(pc.fill_null(table['profile_name'], '').combine_chunks())
+    ts = pc.divide(table['scraped_at'].combine_chunks().cast(pa.int64()), 1_000_000)
+    return History(
+        video=video.indices.to_numpy(zero_copy_only=False).astype(np.int64),
+        profile=profile.indices.to_numpy(zero_copy_only=False).astype(np.int64),
+        ts=ts.to_numpy(zero_copy_only=False),
+        views=pc.fill_null(table['views'], 0).combine_chunks().to_numpy(zero_copy_only=False),
+        likes=pc.fill_null(table['likes'], 0).combine_chunks().to_numpy(zero_copy_only=False),
+        video_ids=video.dictionary.to_numpy(zero_copy_only=False),
+        profiles=profile.dictionary.to_numpy(zero_copy_only=False),
+    )
+
+def _locate_shard(history, rows, lo, hi, t0, span, windows, last, bases):
+    # Rows of videos lo..hi-1 (grouped by video), sorted by one int64 key: video-major, then time
+    np = _require_numpy()
+    if len(rows) == 0:
+        return
+    local = history.video[rows] - lo
+    key = local * span + (history.ts[rows] - t0)
+    order = np.argsort(key)
+    rows, key = rows[order], key[order]
+
+    counts = np.bincount(local, minlength=hi - lo)
+    ends = np.cumsum(counts)
+    firsts = ends - counts
+    last_rows = rows[ends - 1]
+    last[lo:hi] = last_rows
+
+    # The newest snapshot at or before each window's start; an offset of -1
+    # lands on the previous video's keys, so videos younger than the window
+    # fall back to their first snapshot
+    video_keys = np.arange(hi - lo, dtype=np.int64) * span
+    offsets = history.ts[last_rows] - t0
+    for i, seconds in enumerate(windows):
+        targets = video_keys + np.maximum(offsets - seconds, -1)
+        found = np.searchsorted(key, targets, side='right') - 1
+        bases[i][lo:hi] = rows[np.maximum(found, firsts)]
+
+def locate_snapshots(history, windows_days=WINDOWS_DAYS, jobs=None):
+    """
+    Find each video's latest snapshot and its snapshot at the start of every window.
+
+    Windows end at the video's own latest snapshot. Rows are grouped by
+    video code once, and videos are split into contiguous code ranges
+    handled by a thread each, so every thread gets a contiguous slice of
+    the grouped rows. NumPy releases the GIL in the sorts and searches, so
+    the shards run on separate cores.
+
+    Args:
+        history (History): Loaded snapshots
+        windows_days (list): Window lengths in days
+        jobs (int): Worker threads, defaults to the number of cores
+
+    Returns:
+        tuple: (last, bases) row indices into the history: one per video,
+            and one such array per window
+    """
+    np = _require_numpy()
+    videos = len(history.video_ids)
+    last = np.zeros(videos, dtype=np.int64)
+    bases = [np.zeros(videos, dtype=np.int64) for _ in windows_days]
+    if videos == 0:
+        return last, bases
+
+    t0 = int(history.ts.min())
+    span = int(history.ts.max()) - t0 + 2
+    windows = [int(days * 86400) for days in windows_days]
+    jobs = max(1, min(jobs or os.cpu_count() or 1, videos))
+    bounds = np.linspace(0, videos, jobs + 1).astype(np.int64)
+    by_video = np.argsort(history.video, kind='stable')
+    row_bounds = np.searchsorted(history.video[by_video], bounds)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_locate_shard, history, by_video[start:end], int(lo), int(hi), t0, span,
+                                   windows, last, bases)
+                   for lo, hi, start, end in zip(bounds[:-1], bounds[1:], row_bounds[:-1], row_bounds[1:])
+                   if hi > lo]
+        for future in futures:
+            future.result()
+    return last, bases
+
+def _growth(delta, base, hours):
+    # Per-hour velocity, percent growth and fractional growth per hour; NaN where undefined
+    np = _require_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        velocity = np.where(hours > 0, delta / hours, 0.0)
+        pct = np.where(base > 0, 100.0 * delta / base, np.nan)
+        rate = np.where(base > 0, velocity / base, np.nan)
+    return velocity, pct, rate
+
+def trending_score(view_rate, like_rate):
+    """
+    Score hourly growth rates from 0 to 100.
+
+    The score is 50 at TRENDING_RATE and approaches 100 as growth speeds up;
+    flat or shrinking counts score 0.
+
+    Args:
+        view_rate (numpy.ndarray): Fractional view growth per hour
+        like_rate (numpy.ndarray): Fractional like growth per hour
+
+    Returns:
+        numpy.ndarray: Scores, rounded to one decimal
+    """
+    np = _require_numpy()
+    momentum = (1 - LIKE_WEIGHT) * np.nan_to_num(view_rate) + LIKE_WEIGHT * np.nan_to_num(like_rate)
+    momentum = np.maximum(momentum, 0.0)
+    return np.round(100.0 * momentum / (momentum + TRENDING_RATE), 1)
+
+def compute_growth(history, windows_days=WINDOWS_DAYS, jobs=None):
+    """
+    Compute per-video and per-artist growth.
+
+    For every window, each video's change in views and likes runs from its
+    snapshot at the start of the window (or its first snapshot, if it is
+    younger) to its latest one. Videos with a single snapshot have no
+    growth yet and are left out of the sums. Artist figures add up their
+    videos: velocities are summed, growth is the summed change over the
+    summed starting counts. The trending score uses the shortest window.
+
+    Args:
+        history (History): Loaded snapshots
+        windows_days (list): Window lengths in days
+        jobs (int): Worker threads for locate_snapshots()
+
+    Returns:
+        dict: 'videos' and 'artists', each a dict of NumPy arrays (views,
+            likes, trending_score and per-window columns suffixed with the
+            window length, e.g. view_growth_pct_7d), plus 'video_profile'
+    """
+    np = _require_numpy()
+    last, bases = locate_snapshots(history, windows_days, jobs)
+    video_profile = history.profile[last]
+    artists_count = len(history.profiles)
+
+    def per_artist(values):
+        return np.bincount(video_profile, weights=values, minlength=artists_count)
+
+    videos = {'views': history.views[last], 'likes': history.likes[last], 'scraped_at': history.ts[last]}
+    artists = {'videos': np.bincount(video_profile, minlength=artists_count),
+               'views': per_artist(videos['views']), 'likes': per_artist(videos['likes'])}
+
+    for days, base in zip(windows_days, bases):
+        suffix = f"_{days:g}d"
+        measured = base != last
+        hours = np.where(measured, (history.ts[last] - history.ts[base]) / 3600.0, 0.0)
+        for metric, values in (('view', history.views), ('like', history.likes)):
+            delta = np.where(measured, values[last] - values[base], 0).astype(np.float64)
+            start = np.where(measured, values[base], 0).astype(np.float64)
+            velocity, pct, rate = _growth(delta, start, hours)
+            videos[f"{metric}s_delta{suffix}"] = delta
+            videos[f"{metric}_velocity{suffix}"] = velocity
+            videos[f"{metric}_growth_pct{suffix}"] = pct
+            videos[f"{metric}_rate{suffix}"] = rate
+
+            # Velocities add up across videos; growth is relative to the summed starting counts
+            delta, start, velocity = per_artist(delta), per_artist(start), per_artist(velocity)
+            _, pct, _ = _growth(delta, start, np.zeros(artists_count))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rate = np.where(start > 0, velocity / start, np.nan)
+            artists[f"{metric}s_delta{suffix}"] = delta
+            artists[f"{metric}s_start{suffix}"] = start
+            artists[f"{metric}_velocity{suffix}"] = velocity
+            artists[f"{metric}_growth_pct{suffix}"] = pct
+            artists[f"{metric}_rate{suffix}"] = rate
+
+    suffix = f"_{min(windows_days):g}d"
+    for table in (videos, artists):
+        table['trending_score'] = trending_score(table[f"view_rate{suffix}"], table[f"like_rate{suffix}"])
+    return {'videos': videos, 'artists': artists, 'video_profile': video_profile}
+
+def _number(value, digits=2):
+    # JSON-safe rounded float; NaN (no growth measured) becomes null
+    value = float(value)
+    return None if value != value else round(value, digits)
+
+def _window_figures(table, i, suffix):
+    return {
+        'viewsDelta': int(table[f"views_delta{suffix}"][i]),
+        'likesDelta': int(table[f"likes_delta{suffix}"][i]),
+        'viewVelocity': _number(table[f"view_velocity{suffix}"][i]),
+        'likeVelocity': _number(table[f"like_velocity{suffix}"][i]),
+        'viewGrowthPct': _number(table[f"view_growth_pct{suffix}"][i]),
+        'likeGrowthPct': _number(table[f"like_growth_pct{suffix}"][i]),
+    }
+
+def _load_genres(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        artists = json.load(f)
+    # Keyed like the artists table in tiktok_db: username, else id
+    return {artist.get('username') or artist.get('id'): artist.get('genres') or [] for artist in artists}
+
+def build_report(history, growth, windows_days, growth_window=GROWTH_WINDOW_DAYS, artists_path=CUSTOM_ARTISTS_PATH):
+    """
+    Shape the computed growth into the dashboard's analytics JSON.
+
+    Genres come from the managed artists file; a genre's growth is the
+    summed change of its artists over their summed starting counts.
+
+    Args:
+        history (History): Loaded snapshots
+        growth (dict): Result of compute_growth()
+        windows_days (list): Window lengths the growth was computed for
+        growth_window (float): Window reported as each artist's and genre's growthPct
+        artists_path (str): custom-artists.json with each artist's genres
+
+    Returns:
+        dict: JSON-serialisable report
+    """
+    np = _require_numpy()
+    videos, artists = growth['videos'], growth['artists']
+    suffixes = {f"{days:g}d": f"_{days:g}d" for days in windows_days}
+    growth_key = f"_{growth_window:g}d"
+
+    artist_report = {}
+    for i, username in enumerate(history.profiles):
+        if not username or not artists['videos'][i]:
+            continue
+        artist_report[str(username)] = {
+            'videos': int(artists['videos'][i]),
+            'views': int(artists['views'][i]),
+            'likes': int(artists['likes'][i]),
+            'trendingScore': _number(artists['trending_score'][i], 1),
+            'growthPct': _number(artists[f"view_growth_pct{growth_key}"][i]),
+            'windows': {name: _window_figures(artists, i, suffix) for name, suffix in suffixes.items()},
+        }
+
+    genre_sums = {}
+    index = {str(username): i for i, username in enumerate(history.profiles)}
+    for username, genres in _load_genres(artists_path).items():
+        i = index.get(username)
+        if i is None:
+            continue
+        for genre in genres:
+            sums = genre_sums.setdefault(genre.lower(), {'artists': 0})
+            sums['artists'] += 1
+            for name, suffix in suffixes.items():
+                delta, start = sums.get(name, (0.0, 0.0))
+                sums[name] = (delta + artists[f"views_delta{suffix}"][i], start + artists[f"views_start{suffix}"][i])
+    genre_report = {}
+    for genre, sums in genre_sums.items():
+        windows = {}
+        for name in suffixes:
+            delta, start = sums[name]
+            windows[name] = {'viewsDelta': int(delta), 'viewGrowthPct': _number(100.0 * delta / start) if start else None}
+        genre_report[genre] = {'artists': sums['artists'], 'growthPct': windows[f"{growth_window:g}d"]['viewGrowthPct'],
+                               'windows': windows}
+
+    top = np.argsort(-videos['trending_score'], kind='stable')[:TOP_VIDEOS]
+    top_videos = [{
+        'videoId': str(history.video_ids[i]),
+        'username': str(history.profiles[growth['video_profile'][i]]),
+        'views': int(videos['views'][i]),
+        'likes': int(videos['likes'][i]),
+        'trendingScore': _number(videos['trending_score'][i], 1),
+        'windows': {name: _window_figures(videos, i, suffix) for name, suffix in suffixes.items()},
+    } for i in top if videos['trending_score'][i] > 0]
+
+    as_of = datetime.fromtimestamp(int(history.ts.max())).isoformat() if len(history) else None
+    return {
+        'generatedAt': datetime.now().isoformat(),
+        'asOf': as_of,
+        'snapshots': len(history),
+        'windowsDays': list(windows_days),
+        'growthWindow': f"{growth_window:g}d",
+        'scoreWindow': f"{min(windows_days):g}d",
+        'artists': artist_report,
+        'genres': genre_report,
+        'topVideos': top_videos,
+    }
+
+def write_report(report, path=ANALYTICS_PATH):
+    """Write the report to the JSON file served by the dashboard API, atomically."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f)
+    os.replace(tmp_path, path)
+
+def refresh_analytics(store=None, csv_paths=None, path=ANALYTICS_PATH, windows_days=WINDOWS_DAYS,
+                      growth_window=GROWTH_WINDOW_DAYS, jobs=None, since=None, artists_path=CUSTOM_ARTISTS_PATH,
+                      db_path=DB_PATH, rollups_path=ROLLUPS_PATH):
+    """
+    Load the history, compute growth and write the dashboard's analytics file.
+
+    If the metrics database exists, its dashboard rollups are rebuilt so the
+    artist rankings use the new trending scores.
+
+    Args:
+        store (SnapshotStore): Snapshot store, defaults to data/snapshots
+        csv_paths (list): Scrape CSVs to read instead of the store
+        path (str): Output JSON path
+        windows_days (list): Window lengths in days
+        growth_window (float): Window reported as growthPct; added to the windows if missing
+        jobs (int): Worker threads, defaults to the number of cores
+        since (datetime|str): Ignore snapshots scraped before this time
+        artists_path (str): custom-artists.json with each artist's genres
+        db_path (str): Metrics database whose rollups are rebuilt
+        rollups_path (str): Rollup JSON exported from the database
+
+    Returns:
+        dict: The report that was written
+    """
+    windows_days = sorted(set(windows_days) | {growth_window})
+    history = load_history(store, csv_paths, since=since)
+    growth = compute_growth(history, windows_days, jobs)
+    report = build_report(history, growth, windows_days, growth_window, artists_path)
+    write_report(report, path)
+    if os.path.exists(db_path):
+        db = MetricsDatabase(db_path)
+        try:
+            db.rebuild(artists_path, rollups_path, path)
+        finally:
+            db.close()
+    return report
+
+def main(argv=None):
+    """
+    Compute growth analytics from the command line.
+
+    Args:
+        argv (list): Optional argument list, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(description="Compute view and like growth and trending scores from the "
+                                                 "scrape history for the dashboard.")
+    parser.add_argument("--root", default=SNAPSHOT_DIR, help=f"Snapshot store directory (default: {SNAPSHOT_DIR})")
+    parser.add_argument("--csv", nargs="+", metavar="PATH", help="Read these scrape CSVs instead of the store")
+    parser.add_argument("--windows", type=float, nargs="+", default=WINDOWS_DAYS, metavar="DAYS",
+                        help=f"Growth windows in days (default: {' '.join(map(str, WINDOWS_DAYS))}); "
+                             "the shortest one drives the trending score")
+    parser.add_argument("--growth-window", type=float, default=GROWTH_WINDOW_DAYS, metavar="DAYS",
+                        help=f"Window shown as artist and genre growth on the dashboard (default: {GROWTH_WINDOW_DAYS})")
+    parser.add_argument("--since", help="Ignore snapshots scraped before this ISO timestamp")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker threads (default: number of cores)")
+    parser.add_argument("--artists", default=CUSTOM_ARTISTS_PATH,
+                        help=f"Managed artists JSON with genres (default: {CUSTOM_ARTISTS_PATH})")
+    parser.add_argument("--out", default=ANALYTICS_PATH, help=f"Analytics JSON output (default: {ANALYTICS_PATH})")
+    args = parser.parse_args(argv)
+
+    source = f"{len(args.csv)} CSV file(s)" if args.csv else args.root
+    print(f"📈 Computing growth analytics from {source} on {args.jobs or os.cpu_count()} thread(s)...")
+    started = time.monotonic()
+    report = refresh_analytics(SnapshotStore(args.root), args.csv, args.out, args.windows, args.growth_window,
+                               args.jobs, args.since, args.artists)
+    print(f"✅ {report['snapshots']:,} snapshots, {len(report['artists'])} artists, "
+          f"{len(report['genres'])} genres in {time.monotonic() - started:.1f}s - written to {args.out}")
+
+if __name__ == "__main__":
+    main()
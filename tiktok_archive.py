@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+TikTok Page Archive
+Compressed, content-addressed archive of the raw pages behind every scrape,
+with an offline re-extractor.
+
+With --archive the scraper stores each profile page, video page and captured
+item-list response it reads. Pages are gzip-compressed under the SHA-256 of
+their content, so an unchanged page is stored once. A JSON lines manifest
+records when each URL was captured and which object holds it:
+
+    data/archive/manifest.jsonl
+    data/archive/objects/3f/a9c2....gz
+
+The re-extractor runs the scraper's selector logic (METRIC_SELECTORS,
+CONTAINER_SELECTORS and the embedded page state) over the archive with
+selectolax, on every core and without a browser. A fixed extraction bug can
+then be replayed over months of history:
+
+    python3 tiktok_archive.py reextract --format parquet
+    python3 tiktok_archive.py stats
+
+Re-extraction needs selectolax (pip install selectolax).
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from itertools import groupby
+from urllib.parse import urljoin
+from concurrent.futures import ProcessPoolExecutor
+
+import tiktok_scraper as scraper
+from tiktok_records import VideoRecord, METRIC_NAMES
+
+ARCHIVE_DIR = scraper.ARCHIVE_DIR
+MANIFEST_NAME = 'manifest.jsonl'
+COMPRESS_LEVEL = 6  # gzip level: most of level 9's ratio at a fraction of its CPU
+EXTRACT_CHUNK_SIZE = 32  # Archived pages handed to a worker process at a time
+
+def _require_selectolax():
+    """
+    Import selectolax's lexbor HTML parser, with an install hint if it is missing.
+
+    Returns:
+        class: selectolax.lexbor.LexborHTMLParser
+    """
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError as e:
+        raise ImportError("Offline re-extraction needs selectolax: pip install selectolax") from e
+    return LexborHTMLParser
+
+class PageArchive:
+    """
+    Content-addressed store of raw pages plus a manifest of captures.
+
+    Thread-safe, so one archive can be shared by every scraping worker.
+    Each PageArchive instance tags its captures with a run ID, which the
+    re-extractor uses to merge the pages of one scrape into records.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR, run_id=None):
+        self.root = root
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.pages = 0
+        self.new_objects = 0
+        self._lock = threading.Lock()
+
+    def object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], digest[2:] + '.gz')
+
+    def put(self, url, kind, content, profile_url=None):
+        """
+        Archive one page.
+
+        Args:
+            url (str): URL the content was read from
+            kind (str): 'profile', 'video' or 'item_list'
+            content (str): Page HTML or response body
+            profile_url (str): Profile the page belongs to
+
+        Returns:
+            str: SHA-256 of the content
+        """
+        data = (content or '').encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        stored = False
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(data, COMPRESS_LEVEL))
+            os.replace(tmp_path, path)
+            stored = True
+
+        entry = {
+            'captured_at': datetime.now().isoformat(),
+            'run_id': self.run_id,
+            'kind': kind,
+            'url': url,
+            'profile_url': profile_url or url,
+            'sha256': digest,
+            'bytes': len(data),
+        }
+        with self._lock:
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+            self.pages += 1
+            self.new_objects += stored
+        return digest
+
+    def read(self, digest):
+        """Return the archived content with this SHA-256."""
+        with open(self.object_path(digest), 'rb') as f:
+            return gzip.decompress(f.read()).decode('utf-8')
+
+    def entries(self, since=None, until=None):
+        """
+        Iterate over the manifest in capture order.
+
+        Args:
+            since (str): Optional ISO timestamp lower bound
+            until (str): Optional ISO timestamp upper bound
+
+        Yields:
+            dict: Manifest entries
+        """
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A run that crashed mid-write can leave a partial last line
+                    continue
+                if since and entry['captured_at'] < since:
+                    continue
+                if until and entry['captured_at'] > until:
+                    continue
+                yield entry
+
+    def stats(self):
+        """
+        Summarise the archive.
+
+        Returns:
+            dict: Captures per kind, runs, raw bytes captured and bytes on disk
+        """
+        kinds = {}
+        runs = set()
+        raw_bytes = 0
+        for entry in self.entries():
+            kinds[entry['kind']] = kinds.get(entry['kind'], 0) + 1
+            runs.add(entry['run_id'])
+            raw_bytes += entry['bytes']
+        stored_bytes = objects = 0
+        for directory, _, files in os.walk(os.path.join(self.root, 'objects')):
+            for name in files:
+                if name.endswith('.gz'):
+                    objects += 1
+                    stored_bytes += os.path.getsize(os.path.join(directory, name))
+        return {'captures': kinds, 'runs': len(runs), 'objects': objects,
+                'raw_bytes': raw_bytes, 'stored_bytes': stored_bytes}
+
+def _first_text(node, selectors):
+    for selector in selectors:
+        match = node.css_first(selector)
+        if match is not None:
+            text = match.text(strip=True)
+            if text:
+                return text
+    return None
+
+def _page_state(tree):
+    for script_id in scraper.PAGE_STATE_SCRIPT_IDS:
+        node = tree.css_first(f'script#{script_id}')
+        if node is not None and node.text():
+            return node.text()
+    return None
+
+def extract_video_page(html, video_url):
+    """
+    Offline counterpart of read_video_page_metrics().
+
+    Returns:
+        dict: Raw metric strings found on the page
+    """
+    tree = _require_selectolax()(html)
+    metrics = {}
+    for metric, selectors in scraper.METRIC_SELECTORS.items():
+        value = _first_text(tree, selectors)
+        if value:
+            metrics[metric] = value
+    # Exact numbers from the embedded state win, as in the live scraper
+    video_id = scraper.extract_video_id(video_url)
+    metrics.update(scraper.parse_page_state_stats(_page_state(tree)).get(video_id, {}))
+    return metrics
+
+def extract_profile_page(html, profile_url):
+    """
+    Offline counterpart of index_profile_videos() plus the bulk harvest.
+
+    Returns:
+        dict: Mapping of video ID to (video URL, raw metric strings)
+    """
+    tree = _require_selectolax()(html)
+    videos = {}
+    for selector in scraper.CONTAINER_SELECTORS:
+        containers = tree.css(selector)
+        if not containers:
+            continue
+        for container in containers:
+            link = container if container.tag == 'a' else container.css_first('a[href*="/video/"]')
+            href = link.attributes.get('href') if link is not None else None
+            video_id = scraper.extract_video_id(href or '')
+            if not video_id or video_id in videos:
+                continue
+            views = _first_text(container, scraper.METRIC_SELECTORS['views'])
+            videos[video_id] = (urljoin(profile_url, href), {'views': views} if views else {})
+        break
+
+    for video_id, metrics in scraper.parse_page_state_stats(_page_state(tree)).items():
+        if video_id in videos:
+            videos[video_id][1].update(metrics)
+    return videos
+
+def extract_entry(job):
+    """
+    Re-extract one archived page. Runs in a worker process.
+
+    Args:
+        job (tuple): (archive root, manifest entry)
+
+    Returns:
+        list: (video ID, video URL or None, raw metrics) per video on the page
+    """
+    root, entry = job
+    content = PageArchive(root, entry['run_id']).read(entry['sha256'])
+    if entry['kind'] == 'video':
+        video_id = scraper.extract_video_id(entry['url'])
+        return [(video_id, entry['url'], extract_video_page(content, entry['url']))] if video_id else []
+    if entry['kind'] == 'profile':
+        return [(video_id, video_url, metrics)
+                for video_id, (video_url, metrics) in extract_profile_page(content, entry['url']).items()]
+    if entry['kind'] == 'item_list':
+        return [(video_id, None, metrics) for video_id, metrics in scraper.parse_page_state_stats(content).items()]
+    return []
+
+def reextract(archive, jobs=None, since=None, until=None):
+    """
+    Rebuild video records from archived pages on every core.
+
+    Pages of the same run are merged per video in capture order, as the
+    scrape did: grid view counts first, then whatever the video pages and
+    item-list responses added. Manifest entries are ordered by run ID and
+    replayed one run at a time, so only the run being merged is held in
+    memory and its records can be written before the next run starts.
+
+    Args:
+        archive (PageArchive): Archive to replay
+        jobs (int): Worker processes, defaults to the number of cores
+        since (str): Optional ISO timestamp lower bound
+        until (str): Optional ISO timestamp upper bound
+
+    Yields:
+        tuple: (profile URL, VideoRecord), one per video per run, run by run
+    """
+    _require_selectolax()
+    # Concurrent runs interleave in the manifest; a stable sort keeps capture order within each run
+    entries = sorted(archive.entries(since, until), key=lambda entry: entry['run_id'])
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        for _, run_entries in groupby(entries, key=lambda entry: entry['run_id']):
+            run_entries = list(run_entries)
+            merged = {}
+            results = executor.map(extract_entry, [(archive.root, entry) for entry in run_entries],
+                                   chunksize=EXTRACT_CHUNK_SIZE)
+            for entry, videos in zip(run_entries, results):
+                for video_id, video_url, metrics in videos:
+                    video = merged.get(video_id)
+                    if video is None:
+                        video = merged[video_id] = {'profile_url': entry['profile_url'], 'video_url': video_url,
+                                                    'captured_at': entry['captured_at'], 'metrics': {}}
+                    video['video_url'] = video['video_url'] or video_url
+                    video['metrics'].update(metrics)
+
+            for video_id, video in merged.items():
+                # Item-list responses carry no URL; rebuild it from the profile
+                video_url = video['video_url'] or f"{video['profile_url'].rstrip('/')}/video/{video_id}"
+                raw = {metric: video['metrics'].get(metric) or "0" for metric in METRIC_NAMES}
+                yield video['profile_url'], VideoRecord(
+                    video_url,
+                    scraped_at=video['captured_at'],
+                    **{metric: scraper.parse_count(raw[metric]) for metric in METRIC_NAMES},
+                    **{f'{metric}_raw': raw[metric] for metric in METRIC_NAMES},
+                )
+
+def main(argv=None):
+    """
+    Command line interface for inspecting and re-extracting the archive.
+
+    Args:
+        argv (list): Optional argument list, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(description="Inspect and re-extract the TikTok page archive.")
+    parser.add_argument("--root", default=ARCHIVE_DIR, help=f"Archive directory (default: {ARCHIVE_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="Captures, runs and compression of the archive")
+
+    reextract_parser = subparsers.add_parser("reextract", help="Rebuild records from archived pages")
+    reextract_parser.add_argument("--format", nargs="+", choices=sorted(scraper.SINKS), default=['csv'],
+                                  help="One or more outputs to write (default: csv)")
+    reextract_parser.add_argument("--separate-files", action="store_true", help="One file per profile")
+    reextract_parser.add_argument("--jobs", type=int, default=None,
+                                  help="Worker processes (default: one per core)")
+    reextract_parser.add_argument("--since", help="ISO timestamp lower bound")
+    reextract_parser.add_argument("--until", help="ISO timestamp upper bound")
+
+    args = parser.parse_args(argv)
+    archive = PageArchive(args.root)
+
+    if args.command == "stats":
+        stats = archive.stats()
+        print(f"🗄️  {args.root}: {sum(stats['captures'].values()):,} captures from {stats['runs']} run(s)")
+        for kind, count in sorted(stats['captures'].items()):
+            print(f"   {kind}: {count:,}")
+        ratio = stats['raw_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0.0
+        print(f"   {stats['objects']:,} objects, {stats['raw_bytes'] / 1e6:.1f} MB captured, "
+              f"{stats['stored_bytes'] / 1e6:.1f} MB on disk ({ratio:.1f}x)")
+    elif args.command == "reextract":
+        started = datetime.now()
+        print(f"🔁 Re-extracting {args.root} on {args.jobs or os.cpu_count()} worker(s)...")
+        sink = scraper.create_sink(args.format, args.separate_files)
+        records = 0
+        profiles = {}
+        try:
+            # Records are written as each run is merged; a profile's file stays open across runs
+            for profile_url, record in reextract(archive, args.jobs, args.since, args.until):
+                profiles[profile_url] = None
+                sink.write(profile_url, record)
+                records += 1
+            for profile_url in profiles:
+                sink.end_profile(profile_url)
+        finally:
+            sink.close()
+        elapsed = (datetime.now() - started).total_seconds()
+        print(f"✅ Rebuilt {records:,} records for {len(profiles)} profile(s) in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
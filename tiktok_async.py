@@ -0,0 +1,658 @@
+"""
+TikTok Async Scraping Engine
+Drives many Chrome tabs from one asyncio event loop over the Chrome DevTools
+Protocol, instead of one blocking Selenium session per profile.
+
+Profile pages and video pages load in parallel tabs, so while one page waits
+on the network the others keep working. Records have the same schema as
+scrape_tiktok_profile() and go through the same journal, index and sink
+hooks, so the engine is a drop-in for the Selenium runners:
+
+    python3 tiktok_scraper.py --engine async --tabs 16
+
+Profiles are always extracted in bulk (see scrape_profile_bulk): the grid is
+harvested in one script call and only videos with missing metrics get a
+page visit, each in its own tab.
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import shutil
+import asyncio
+import tempfile
+import threading
+import subprocess
+
+import tiktok_scraper as scraper
+from tiktok_records import RecordBatch
+from tiktok_metrics import METRICS
+
+ASYNC_MAX_TABS = 8  # Tabs kept in flight at once across all profiles
+CHROME_START_TIMEOUT = 30  # Seconds to wait for Chrome's DevTools endpoint
+CDP_COMMAND_TIMEOUT = 30  # Seconds to wait for the reply to one DevTools command
+
+# Executable names and install locations searched for Chrome (CHROME_BINARY overrides)
+CHROME_EXECUTABLES = ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome']
+CHROME_PATHS = [
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+]
+
+# Serialises the open document for the page archive (Selenium's page_source)
+PAGE_HTML_SCRIPT = "return document.documentElement.outerHTML;"
+
+# Hides navigator.webdriver in every document, as create_driver() does
+HIDE_WEBDRIVER_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+def _require_websockets():
+    """
+    Import websockets, with an install hint if it is missing.
+
+    Returns:
+        module: The websockets module
+    """
+    try:
+        import websockets
+    except ImportError as e:
+        raise ImportError("The async engine needs websockets: pip install websockets") from e
+    return websockets
+
+def find_chrome_binary():
+    """
+    Locate the Chrome executable.
+
+    Returns:
+        str: Path to Chrome
+
+    Raises:
+        FileNotFoundError: If Chrome could not be found
+    """
+    if os.environ.get('CHROME_BINARY'):
+        return os.environ['CHROME_BINARY']
+    for name in CHROME_EXECUTABLES:
+        path = shutil.which(name)
+        if path:
+            return path
+    for path in CHROME_PATHS:
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError("Google Chrome not found - install it or set CHROME_BINARY")
+
+class CdpError(Exception):
+    """A DevTools command failed or a page script threw."""
+
+class CdpBrowser:
+    """
+    A Chrome process and one DevTools websocket shared by all of its tabs.
+
+    Tabs are attached as flattened sessions, so every command and response
+    travels over the single browser connection, tagged with its session ID.
+    """
+
+    def __init__(self, lean=None):
+        self.lean = scraper.LEAN_BROWSER if lean is None else lean
+        self.process = None
+        self.user_data_dir = None
+        self.ws = None
+        self._next_id = 0
+        self._pending = {}
+        self._reader = None
+
+    async def launch(self):
+        """Start Chrome with remote debugging and connect to it."""
+        websockets = _require_websockets()
+        self.user_data_dir = tempfile.mkdtemp(prefix='tiktok-cdp-')
+        args = [
+            find_chrome_binary(),
+            "--remote-debugging-port=0",
+            f"--user-data-dir={self.user_data_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--no-sandbox",
+            "--disable-dev-shm-usage",
+            "--disable-blink-features=AutomationControlled",
+            f"--user-agent={scraper.USER_AGENT}",
+        ]
+        # Dozens of tabs in a visible window help nobody, so the engine is always headless
+        args += scraper.LEAN_CHROME_ARGS if self.lean else ["--headless=new"]
+        args.append("about:blank")
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        # Chrome writes the port it picked and the browser endpoint path to DevToolsActivePort
+        port_file = os.path.join(self.user_data_dir, 'DevToolsActivePort')
+        deadline = time.monotonic() + CHROME_START_TIMEOUT
+        while True:
+            if self.process.poll() is not None:
+                raise CdpError(f"Chrome exited during startup (code {self.process.returncode})")
+            if os.path.exists(port_file):
+                with open(port_file, 'r', encoding='utf-8') as f:
+                    lines = f.read().split()
+                if len(lines) >= 2:
+                    break
+            if time.monotonic() > deadline:
+                raise CdpError("Timed out waiting for Chrome's DevTools endpoint")
+            await asyncio.sleep(0.1)
+
+        self.ws = await websockets.connect(f"ws://127.0.0.1:{lines[0]}{lines[1]}", max_size=None)
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self):
+        try:
+            async for raw in self.ws:
+                message = json.loads(raw)
+                future = self._pending.pop(message.get('id'), None)
+                if future is not None and not future.done():
+                    if 'error' in message:
+                        future.set_exception(CdpError(message['error'].get('message', 'CDP error')))
+                    else:
+                        future.set_result(message.get('result', {}))
+                # Events are not needed: page readiness is polled like AdaptiveWaiter does
+        except Exception as e:
+            error = e
+        else:
+            error = CdpError("DevTools connection closed")
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    async def send(self, method, params=None, session_id=None):
+        """
+        Send a DevTools command and wait for its result.
+
+        Args:
+            method (str): CDP method, e.g. "Page.navigate"
+            params (dict): Command parameters
+            session_id (str): Tab session the command is for, None for the browser
+
+        Returns:
+            dict: The command's result
+
+        Raises:
+            CdpError: The command failed or got no reply within CDP_COMMAND_TIMEOUT
+        """
+        self._next_id += 1
+        command_id = self._next_id
+        message = {'id': command_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = future
+        try:
+            await self.ws.send(json.dumps(message))
+            return await asyncio.wait_for(future, CDP_COMMAND_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise CdpError(f"{method} got no reply within {CDP_COMMAND_TIMEOUT}s") from None
+        finally:
+            self._pending.pop(command_id, None)
+
+    async def new_tab(self):
+        """
+        Open a blank tab.
+
+        Returns:
+            CdpTab: The attached tab
+        """
+        target = await self.send('Target.createTarget', {'url': 'about:blank'})
+        attached = await self.send('Target.attachToTarget', {'targetId': target['targetId'], 'flatten': True})
+        tab = CdpTab(self, target['targetId'], attached['sessionId'])
+        await tab.send('Page.enable')
+        await tab.send('Page.addScriptToEvaluateOnNewDocument', {'source': HIDE_WEBDRIVER_SCRIPT})
+        if self.lean:
+            # Block heavy resources at the network layer so they are never downloaded
+            await tab.send('Network.enable')
+            await tab.send('Network.setBlockedURLs', {'urls': scraper.LEAN_BLOCKED_URLS})
+        return tab
+
+    async def close(self):
+        """Close the connection, stop Chrome and remove its profile directory."""
+        if self.ws is not None:
+            try:
+                await asyncio.wait_for(self.send('Browser.close'), timeout=5)
+            except Exception:
+                pass
+            await self.ws.close()
+            self.ws = None
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+            self.user_data_dir = None
+
+class CdpTab:
+    """One browser tab driven over a flattened DevTools session."""
+
+    def __init__(self, browser, target_id, session_id):
+        self.browser = browser
+        self.target_id = target_id
+        self.session_id = session_id
+        self.url = None
+
+    async def send(self, method, params=None):
+        return await self.browser.send(method, params, self.session_id)
+
+    async def navigate(self, url):
+        self.url = url
+        await self.send('Page.navigate', {'url': url})
+
+    async def execute_script(self, script, *args):
+        """
+        Run a script written for Selenium's execute_script in this tab.
+
+        The script body is wrapped in a function so ``arguments`` and
+        ``return`` behave as they do under Selenium.
+
+        Args:
+            script (str): Function body
+            *args: JSON-serialisable arguments
+
+        Returns:
+            The script's return value
+        """
+        expression = f"(function() {{\n{script}\n}}).apply(null, {json.dumps(list(args))})"
+        result = await self.send('Runtime.evaluate', {
+            'expression': expression,
+            'returnByValue': True,
+            'awaitPromise': True,
+        })
+        if 'exceptionDetails' in result:
+            raise CdpError(result['exceptionDetails'].get('text', 'Script error'))
+        return result.get('result', {}).get('value')
+
+    async def close(self):
+        try:
+            await self.browser.send('Target.closeTarget', {'targetId': self.target_id})
+        except CdpError:
+            pass
+
+class AsyncWaiter(scraper.AdaptiveWaiter):
+    """
+    AdaptiveWaiter for CDP tabs: wait_until() polls an async condition and
+    keeps the politeness jitter as a floor, recording timings per label.
+    """
+
+    def __init__(self, jitter=None, timeout=None, poll_interval=None):
+        super().__init__(None, jitter, timeout, poll_interval)
+
+    async def wait_until(self, label, condition, timeout=None):
+        """
+        Wait until ``await condition(tab)`` returns a truthy value.
+
+        Args:
+            label (str): Name the timing is recorded under
+            condition (callable): Async callable, awaited with no arguments
+            timeout (float): Optional override of the default timeout
+
+        Returns:
+            The condition's truthy result, or False if it timed out
+        """
+        start = time.monotonic()
+        floor = random.uniform(*self.jitter)
+        deadline = start + (timeout or self.timeout)
+
+        while True:
+            try:
+                result = await condition()
+            except CdpError:
+                # The page is mid-navigation and has no execution context yet
+                result = False
+            if result:
+                break
+            if time.monotonic() >= deadline:
+                result = False
+                self.timeouts[label] += 1
+                METRICS.inc('wait_timeouts_total', label=label)
+                break
+            await asyncio.sleep(self.poll_interval)
+
+        remaining = floor - (time.monotonic() - start)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+        elapsed = time.monotonic() - start
+        self.timings[label].append(elapsed)
+        METRICS.observe('wait_seconds', elapsed, label=label)
+        return result
+
+async def get_page_size(tab):
+    """Async get_page_size(): page height and loaded tile count."""
+    height, count = await tab.execute_script(scraper.PAGE_SIZE_SCRIPT)
+    return height, count
+
+async def video_metrics_present(tab, registry):
+    """Async video_metrics_present(): a video page has rendered its like or comment count."""
+    return await tab.execute_script(
+        "return !!document.querySelector(arguments[0]);",
+        ', '.join(registry.ordered('video', 'likes')[:1] + registry.ordered('video', 'comments')[:1]),
+    )
+
+class AsyncScraper:
+    """
+    Scrapes profiles over CDP with at most ``max_tabs`` tabs open at once.
+
+    Use as an async context manager; scrape_profile() may be awaited for
+    many profiles concurrently. Browser, jitter, rate-limit and staleness
+    options come from ``config`` (a scraper.ScrapeConfig).
+    """
+
+    def __init__(self, max_tabs=ASYNC_MAX_TABS, config=None):
+        self.max_tabs = max(1, max_tabs)
+        self.config = config or scraper.ScrapeConfig()
+        self.browser = CdpBrowser(self.config.lean)
+        self.waiter = AsyncWaiter(self.config.jitter)
+        # One browser is one session: its tabs share what the registry learns
+        self.selectors = scraper.SelectorRegistry()
+        self._slots = None
+
+    async def __aenter__(self):
+        self._slots = asyncio.Semaphore(self.max_tabs)
+        await self.browser.launch()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.waiter.print_summary()
+        await self.browser.close()
+
+    async def _open_tab(self):
+        await self._slots.acquire()
+        try:
+            return await self.browser.new_tab()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _close_tab(self, tab):
+        try:
+            await tab.close()
+        finally:
+            self._slots.release()
+
+    async def _throttle(self, url):
+        """Wait until the shared rate limiter allows loading ``url`` in this browser."""
+        wait = self.config.rate_limiter.reserve(url, self)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _report_page_load(self, tab, url, has_content):
+        """Async report_page_load(): tell the rate limiter how a page load turned out."""
+        reason = None
+        if has_content:
+            outcome = 'ok'
+        else:
+            reason = await tab.execute_script(scraper.BLOCK_PAGE_SCRIPT, scraper.BLOCK_PAGE_PHRASES)
+            outcome = 'blocked' if reason else 'empty'
+        self.config.rate_limiter.report(url, outcome, self, reason=reason)
+        return outcome
+
+    async def _archive_page(self, tab, archive, url, kind, profile_url=None):
+        """Store the tab's current HTML in the page archive, off the event loop."""
+        html = await tab.execute_script(PAGE_HTML_SCRIPT)
+        await asyncio.to_thread(archive.put, url, kind, html, profile_url)
+
+    async def _load_profile_grid(self, url, index, archive=None):
+        """
+        Open a profile, scroll until every tile is loaded and harvest the grid.
+
+        Returns:
+            tuple: (tiles, state_stats) as returned by harvest_profile_tiles()
+        """
+        waiter = self.waiter
+        # Take a tab slot before a rate-limit token, so tokens are not spent while queued for a tab
+        tab = await self._open_tab()
+        try:
+            await self._throttle(url)
+            try:
+                await tab.navigate(url)
+                loaded = await waiter.wait_until('profile_load', lambda: self._tiles_present(tab))
+            except Exception:
+                self.config.rate_limiter.report(url, 'error', self)
+                raise
+            if await self._report_page_load(tab, url, loaded) == 'blocked':
+                print(f"   🚧 {url}: profile page is blocked - skipping")
+                return [], {}
+
+            last_height, _ = await get_page_size(tab)
+            scroll_attempts = 0
+            no_change_count = 0
+            max_no_change = 5
+
+            while no_change_count < max_no_change and scroll_attempts < 100:
+                scroll_attempts += 1
+                current_height, current_videos = await get_page_size(tab)
+                await tab.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+
+                async def grew():
+                    height, count = await get_page_size(tab)
+                    return height != current_height or count > current_videos
+                await waiter.wait_until('scroll', grew, timeout=scraper.SCROLL_WAIT_TIMEOUT)
+
+                new_height, new_video_count = await get_page_size(tab)
+                if new_height == last_height:
+                    no_change_count += 1
+                    METRICS.inc('scrolls_total', outcome='unchanged')
+                else:
+                    no_change_count = 0
+                    last_height = new_height
+                    METRICS.inc('scrolls_total', outcome='grew')
+                    if new_video_count > current_videos:
+                        METRICS.inc('tiles_loaded_total', new_video_count - current_videos)
+
+                if index is not None and len(index):
+                    hrefs = await tab.execute_script(scraper.TILE_HREFS_SCRIPT) or []
+                    video_ids = [video_id for video_id in map(scraper.extract_video_id, hrefs) if video_id]
+                    if index.known_run(video_ids) >= scraper.INCREMENTAL_KNOWN_RUN:
+                        break
+
+                if no_change_count == 0:
+                    await tab.execute_script("window.scrollBy(0, -500); window.scrollTo(0, document.body.scrollHeight);")
+
+            print(f"   📜 {url}: {new_video_count} videos loaded after {scroll_attempts} scrolls")
+            result = await tab.execute_script(scraper.HARVEST_TILES_SCRIPT, self.selectors.ordered('tile', 'views'),
+                                              scraper.PAGE_STATE_SCRIPT_IDS) or {}
+            tiles = result.get('tiles') or []
+            self.selectors.record_tiles(tiles)
+            if archive is not None:
+                await self._archive_page(tab, archive, url, 'profile')
+            return tiles, scraper.parse_page_state_stats(result.get('state'))
+        finally:
+            await self._close_tab(tab)
+
+    async def _tiles_present(self, tab):
+        return (await get_page_size(tab))[1] > 0
+
+    async def fetch_video_metrics(self, video_url, archive=None, profile_url=None):
+        """
+        Read all metrics from a video page in its own tab.
+
+        Args:
+            video_url (str): Video URL
+            archive (PageArchive): Optional archive the page is stored in
+            profile_url (str): Profile the archived page belongs to
+
+        Returns:
+            dict: Raw metric strings keyed by metric name (missing metrics are None)
+        """
+        tab = await self._open_tab()
+        try:
+            await self._throttle(video_url)
+            start = time.monotonic()
+            try:
+                await tab.navigate(video_url)
+                await self.waiter.wait_until('video_load', lambda: video_metrics_present(tab, self.selectors))
+            except Exception:
+                self.config.rate_limiter.report(video_url, 'error', self)
+                raise
+            METRICS.observe('video_navigation_seconds', time.monotonic() - start, mode='tab')
+            result = await tab.execute_script(scraper.VIDEO_METRICS_SCRIPT, self.selectors.ordered_map('video'),
+                                              scraper.PAGE_STATE_SCRIPT_IDS) or {}
+            await self._report_page_load(tab, video_url, any((result.get('matched') or {}).values())
+                                         or bool(result.get('state')))
+            if archive is not None:
+                await self._archive_page(tab, archive, video_url, 'video', profile_url)
+        finally:
+            await self._close_tab(tab)
+
+        metrics = {metric: result.get(metric) for metric in scraper.METRIC_SELECTORS}
+        self.selectors.record_results('video', result.get('matched'))
+        # Prefer exact numbers from the embedded state when the page has them
+        video_id = scraper.extract_video_id(video_url)
+        metrics.update(scraper.parse_page_state_stats(result.get('state')).get(video_id, {}))
+        return metrics
+
+    async def scrape_profile(self, url, incremental=False, journal=None, sink=None, archive=None, **_):
+        """
+        Scrape one profile; the async counterpart of scrape_tiktok_profile().
+
+        Args:
+            url (str): TikTok profile URL
+            incremental (bool): Stop scrolling at already-indexed videos and
+                only scrape new or stale ones
+            journal (RunJournal): Optional checkpoint journal
+            sink (RecordSink): Optional output sink records are streamed into
+            archive (PageArchive): Optional archive for the raw pages
+            **_: Selenium-only options (bulk, network) are accepted and ignored
+
+        Returns:
+            RecordBatch: Scraped video records, or UpToDate when
+                incremental mode found nothing to refresh
+
+        Raises:
+            ProfileError: The profile page was blocked, no tiles loaded or
+                every video failed
+        """
+        print(f"\n🚀 [async] Starting {url}")
+        video_data = RecordBatch()
+        index = scraper.ProfileIndex.for_url(url, self.config.stale_hours) if incremental else None
+        done_positions = set()
+
+        if journal is not None:
+            done_positions = journal.completed_positions(url)
+            for record in journal.records(url):
+                video_data.append(record)
+                if sink is not None:
+                    sink.write(url, record)
+
+        def emit(position, record):
+            video_data.append(record)
+            METRICS.inc('videos_scraped_total', mode='async')
+            if sink is not None:
+                sink.write(url, record)
+            if index is not None:
+                index.update(record)
+            if journal is not None:
+                journal.record_video(url, position, record)
+
+        try:
+            tiles, state_stats = await self._load_profile_grid(url, index, archive)
+            if not tiles:
+                raise scraper.ProfileError("No videos loaded on this profile")
+
+            positioned = list(enumerate(tiles))
+            if scraper.MAX_VIDEOS_TO_SCRAPE is not None:
+                positioned = positioned[:scraper.MAX_VIDEOS_TO_SCRAPE]
+            positioned = [(position, tile) for position, tile in positioned if position not in done_positions]
+            if index is not None:
+                positioned = [(position, tile) for position, tile in positioned
+                              if index.needs_refresh(scraper.extract_video_id(tile['href']))]
+
+            failed = 0
+
+            async def complete(position, video_url, metrics):
+                nonlocal failed
+                if any(m not in metrics for m in scraper.METRIC_SELECTORS):
+                    try:
+                        fetched = await self.fetch_video_metrics(video_url, archive, url)
+                    except Exception as e:
+                        # A failed video must not abort gather() and lose the rest of the profile
+                        failed += 1
+                        METRICS.inc('errors_total', stage='video_fetch')
+                        print(f"❌ Error fetching {video_url}: {e}")
+                        return
+                    for metric, value in fetched.items():
+                        if value and metric not in metrics:
+                            metrics[metric] = value
+                emit(position, scraper.build_video_record(
+                    video_url,
+                    metrics.get('views') or "0",
+                    metrics.get('likes') or "0",
+                    metrics.get('bookmarks') or "0",
+                    metrics.get('comments') or "0",
+                ))
+
+            jobs = []
+            for position, tile in positioned:
+                metrics = dict(state_stats.get(scraper.extract_video_id(tile['href']), {}))
+                if tile.get('views') and 'views' not in metrics:
+                    metrics['views'] = tile['views']
+                jobs.append(complete(position, tile['href'], metrics))
+            await asyncio.gather(*jobs)
+
+            print(f"✅ [async] {url}: {len(video_data)} videos" + (f", {failed} failed" if failed else ""))
+            return scraper.profile_result(video_data, failed, incremental)
+        finally:
+            if index is not None:
+                index.save()
+
+def scrape_profiles_async(urls, tabs=ASYNC_MAX_TABS, config=None, **scrape_options):
+    """
+    Scrape profiles concurrently with the async engine.
+
+    The event loop runs in a background thread, so this is a plain generator
+    with the same contract as scrape_profiles_parallel().
+
+    Args:
+        urls (list): TikTok profile URLs
+        tabs (int): Tabs kept in flight at once across all profiles
+        config (ScrapeConfig): Run options (browser, jitter, rate limiter,
+            staleness); defaults to the scraper module's current settings
+        **scrape_options: Keyword options passed to AsyncScraper.scrape_profile()
+
+    Yields:
+        tuple: (index, url, video_data, error) as each profile finishes, where
+            index is the 1-based queue position and error is None on success
+    """
+    results = queue.Queue()
+    finished = object()
+
+    async def crawl(reported):
+        async with AsyncScraper(tabs, config) as engine:
+            async def run(i, url):
+                try:
+                    video_data = await engine.scrape_profile(url, **scrape_options)
+                    results.put((i, url, video_data, None))
+                except Exception as e:
+                    results.put((i, url, [], e))
+                reported.add(i)
+            await asyncio.gather(*(run(i, url) for i, url in enumerate(urls, 1)))
+
+    def run_loop():
+        reported = set()
+        try:
+            asyncio.run(crawl(reported))
+        except Exception as e:
+            # Chrome failed to start or the connection dropped: fail what is left
+            for i, url in enumerate(urls, 1):
+                if i not in reported:
+                    results.put((i, url, [], e))
+        finally:
+            results.put(finished)
+
+    thread = threading.Thread(target=run_loop, name='tiktok-async', daemon=True)
+    thread.start()
+    while True:
+        item = results.get()
+        if item is finished:
+            break
+        yield item
+    thread.join()
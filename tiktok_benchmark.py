@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+TikTok Scraper Benchmark
+Offline replay harness and throughput benchmark for scrape_tiktok_profile().
+
+A local fixture server stands in for tiktok.com. It serves synthetic profile
+pages with infinite scroll, paged through an item-list JSON API, and video
+pages that use the same data-e2e selectors and embedded state blobs as the
+real site. It can also serve
+recorded pages captured with --record. The benchmark scrapes the fixtures
+end to end at several profile sizes, times each phase (load, scroll,
+discovery, extraction) and checks the extracted counts against the
+fixture's. Results are saved as JSON and can be compared to a baseline, so
+throughput regressions fail CI without any network access.
+
+Usage:
+    python3 tiktok_benchmark.py --sizes 30 120 480 --modes legacy bulk network
+    python3 tiktok_benchmark.py --baseline data/benchmarks/baseline.json --max-regression 0.2
+    python3 tiktok_benchmark.py --modes reextract --baseline data/benchmarks/baseline.json   # no browser
+    python3 tiktok_benchmark.py --serve --port 8765
+    python3 tiktok_benchmark.py --record https://www.tiktok.com/@username --record-videos 5
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from html import escape
+from urllib.parse import urlparse, parse_qs, urlencode
+from urllib.request import urlopen
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import tiktok_scraper as scraper
+from tiktok_metrics import METRICS
+
+BENCHMARK_DIR = os.path.join('data', 'benchmarks')
+FIXTURE_DIR = os.path.join('data', 'fixtures')
+DEFAULT_SIZES = [30, 120]
+BROWSER_MODES = ['legacy', 'bulk', 'network']
+DEFAULT_PAGE_SIZE = 30  # Tiles rendered per infinite-scroll page, as on tiktok.com
+DEFAULT_SCROLL_LATENCY = 0.15  # Seconds before the next page of tiles appears
+DEFAULT_PAGE_LATENCY = 0.05  # Seconds the server waits before answering a page request
+
+_PROFILE_RE = re.compile(r'^/@(?P<user>[\w.-]+)/?$')
+_VIDEO_RE = re.compile(r'^/@(?P<user>[\w.-]+)/video/(?P<video_id>\d+)/?$')
+_ITEM_LIST_PATH = '/api/post/item_list/'
+
+def format_count(n):
+    """Abbreviate a count the way TikTok displays it ("12.3K", "1.5M")."""
+    if n >= 1000000:
+        return f"{n / 1000000:g}M"
+    if n >= 1000:
+        return f"{n / 1000:g}K"
+    return str(n)
+
+def _round_for_display(n):
+    # Keep counts representable exactly by their abbreviation
+    if n >= 1000000:
+        return n - n % 100000
+    if n >= 1000:
+        return n - n % 100
+    return n
+
+def synthetic_video_ids(user, size):
+    """Video IDs of a synthetic profile, newest first."""
+    base = 7300000000000000000 + (sum(map(ord, user)) % 1000) * 1000000
+    return [str(base + size - i) for i in range(size)]
+
+def synthetic_stats(video_id):
+    """
+    Deterministic metrics of a synthetic video.
+
+    Returns:
+        dict: views, likes, bookmarks and comments as integers
+    """
+    rng = random.Random(int(video_id))
+    views = _round_for_display(rng.randint(200, 5000000))
+    likes = _round_for_display(rng.randint(0, views // 5))
+    return {
+        'views': views,
+        'likes': likes,
+        'bookmarks': _round_for_display(rng.randint(0, likes // 4 + 1)),
+        'comments': _round_for_display(rng.randint(0, likes // 10 + 1)),
+    }
+
+def _state_item(video_id, stats):
+    return {'id': video_id, 'stats': {scraper.STATE_STAT_KEYS[m]: stats[m] for m in scraper.STATE_STAT_KEYS}}
+
+def _state_script(items):
+    state = {'__DEFAULT_SCOPE__': {'webapp.item-list': {'itemList': [
+        _state_item(video_id, stats) for video_id, stats in items
+    ]}}}
+    return (f'<script id="{scraper.PAGE_STATE_SCRIPT_IDS[0]}" type="application/json">'
+            f'{json.dumps(state)}</script>')
+
+def render_profile_page(user, size, page_size, scroll_latency, with_state):
+    """
+    Render a synthetic profile page.
+
+    The first ``page_size`` tiles are in the HTML; scrolling near the bottom
+    fetches the next page from the item-list API (see item_list_payload)
+    and appends it after ``scroll_latency`` seconds. The number of
+    loaded tiles survives back navigation (sessionStorage), as TikTok keeps
+    the grid when returning from a video.
+    """
+    video_ids = synthetic_video_ids(user, size)
+    tiles = [{'href': f"/@{user}/video/{video_id}", 'views': format_count(synthetic_stats(video_id)['views'])}
+             for video_id in video_ids]
+    first_page = [(video_id, synthetic_stats(video_id)) for video_id in video_ids[:page_size]]
+    state = _state_script(first_page) if with_state else ''
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>@{escape(user)} | TikTok</title>
+<style>
+body {{ margin: 0; font-family: sans-serif; }}
+#grid {{ display: grid; grid-template-columns: repeat(3, 200px); gap: 8px; }}
+.tile {{ display: block; height: 280px; background: #222; color: #fff; position: relative; }}
+.tile strong {{ position: absolute; bottom: 6px; left: 6px; }}
+</style>
+{state}
+</head><body>
+<h1 data-e2e="user-title">{escape(user)}</h1>
+<div id="grid" data-e2e="user-post-item-list"></div>
+<script>
+const TILES = {json.dumps(tiles)};
+const USER = {json.dumps(user)};
+const PAGE_SIZE = {page_size};
+const LATENCY_MS = {int(scroll_latency * 1000)};
+const KEY = 'loaded:' + location.pathname;
+const grid = document.getElementById('grid');
+let loaded = 0;
+let loading = false;
+function render(count) {{
+    const end = Math.min(count, TILES.length);
+    for (; loaded < end; loaded++) {{
+        const item = document.createElement('div');
+        item.setAttribute('data-e2e', 'user-post-item');
+        const link = document.createElement('a');
+        link.className = 'tile';
+        link.href = TILES[loaded].href;
+        const views = document.createElement('strong');
+        views.setAttribute('data-e2e', 'video-views');
+        views.className = 'video-count';
+        views.textContent = TILES[loaded].views;
+        link.appendChild(views);
+        item.appendChild(link);
+        grid.appendChild(item);
+    }}
+    sessionStorage.setItem(KEY, String(loaded));
+}}
+render(Math.max(PAGE_SIZE, parseInt(sessionStorage.getItem(KEY) || '0', 10)));
+window.addEventListener('scroll', () => {{
+    if (loading || loaded >= TILES.length) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 400) return;
+    loading = true;
+    setTimeout(() => {{
+        fetch('{_ITEM_LIST_PATH}?user=' + encodeURIComponent(USER) + '&cursor=' + loaded + '&count=' + PAGE_SIZE)
+            .then(response => response.json())
+            .then(data => render(loaded + data.itemList.length))
+            .finally(() => {{ loading = false; }});
+    }}, LATENCY_MS);
+}});
+</script>
+</body></html>"""
+
+def item_list_payload(user, cursor, count):
+    """
+    One page of a synthetic profile's item-list API, shaped like TikTok's.
+
+    Args:
+        user (str): Profile path name, e.g. "bench-120"
+        cursor (int): Index of the first item
+        count (int): Items per page
+
+    Returns:
+        dict: itemList with per-item stats, cursor and hasMore, or None for
+            an unknown profile
+    """
+    name, _, size = user.rpartition('-')
+    if not name or not size.isdigit():
+        return None
+    video_ids = synthetic_video_ids(user, int(size))
+    page = video_ids[cursor:cursor + count]
+    return {
+        'itemList': [_state_item(video_id, synthetic_stats(video_id)) for video_id in page],
+        'cursor': str(cursor + len(page)),
+        'hasMore': cursor + len(page) < len(video_ids),
+    }
+
+def render_video_page(user, video_id, with_state):
+    """Render a synthetic video page with TikTok's metric selectors."""
+    stats = synthetic_stats(video_id)
+    state = _state_script([(video_id, stats)]) if with_state else ''
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Video {video_id} | TikTok</title>{state}</head><body>
+<div data-e2e="browse-video">
+  <video muted></video>
+  <a href="/@{escape(user)}">@{escape(user)}</a>
+  <button><strong data-e2e="browse-like-count">{format_count(stats['likes'])}</strong></button>
+  <button><strong data-e2e="browse-comment-count">{format_count(stats['comments'])}</strong></button>
+  <button><strong data-e2e="undefined-count">{format_count(stats['bookmarks'])}</strong></button>
+</div>
+</body></html>"""
+
+class FixtureServer:
+    """
+    Local HTTP server standing in for tiktok.com.
+
+    Synthetic profiles are addressed as /@<name>-<size>, e.g. /@bench-120 for
+    a profile with 120 videos. When ``fixture_dir`` is given, recorded pages
+    in it (@user.html, @user/video/<id>.html) are served first, with links to
+    tiktok.com rewritten to this server.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, page_size=DEFAULT_PAGE_SIZE, scroll_latency=DEFAULT_SCROLL_LATENCY,
+                 page_latency=DEFAULT_PAGE_LATENCY, with_state=True, fixture_dir=None):
+        self.page_size = page_size
+        self.scroll_latency = scroll_latency
+        self.page_latency = page_latency
+        self.with_state = with_state
+        self.fixture_dir = fixture_dir
+        self.requests = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def profile_url(self, name, size=None):
+        """URL of a synthetic profile (or of a recorded one when size is None)."""
+        return f"{self.base_url}/@{name}-{size}" if size is not None else f"{self.base_url}/@{name}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                if server.page_latency:
+                    time.sleep(server.page_latency)
+                parsed = urlparse(self.path)
+                content_type = 'text/html; charset=utf-8'
+                if parsed.path == _ITEM_LIST_PATH:
+                    body = server.render_api(parse_qs(parsed.query))
+                    content_type = 'application/json'
+                else:
+                    body = server.render(parsed.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _recorded(self, path):
+        if not self.fixture_dir:
+            return None
+        root = os.path.abspath(self.fixture_dir)
+        file_path = os.path.abspath(os.path.join(root, path.strip('/') + '.html'))
+        if not file_path.startswith(root + os.sep) or not os.path.isfile(file_path):
+            return None
+        with open(file_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        return re.sub(r'https?://(?:www\.)?tiktok\.com', self.base_url, html)
+
+    def render(self, path):
+        """Return the HTML for a request path, or None for 404."""
+        recorded = self._recorded(path)
+        if recorded is not None:
+            return recorded
+
+        match = _VIDEO_RE.match(path)
+        if match:
+            return render_video_page(match.group('user'), match.group('video_id'), self.with_state)
+        match = _PROFILE_RE.match(path)
+        if match:
+            name, _, size = match.group('user').rpartition('-')
+            if name and size.isdigit():
+                return render_profile_page(match.group('user'), int(size), self.page_size,
+                                           self.scroll_latency, self.with_state)
+        return None
+
+    def render_api(self, query):
+        """Return the JSON for an item-list API request, or None for 404."""
+        try:
+            user = query['user'][0]
+            cursor = int(query.get('cursor', ['0'])[0])
+            count = int(query.get('count', [str(self.page_size)])[0])
+        except (KeyError, ValueError):
+            return None
+        payload = item_list_payload(user, cursor, count)
+        return json.dumps(payload) if payload is not None else None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+def check_accuracy(video_data):
+    """
+    Compare scraped records with the synthetic fixture's counts.
+
+    Returns:
+        float: Share of videos whose four metrics all match, or None if no
+            record came from a synthetic profile
+    """
+    checked = matched = 0
+    for record in video_data:
+        video_id = scraper.extract_video_id(record['video_url'])
+        if not video_id:
+            continue
+        expected = synthetic_stats(video_id)
+        checked += 1
+        matched += all(record[metric] == expected[metric] for metric in expected)
+    return matched / checked if checked else None
+
+def archive_fixture_profile(server, url, archive):
+    """
+    Capture a synthetic profile into a page archive, as an --archive run would.
+
+    The profile page, every item-list page and every video page are fetched
+    from the fixture server and archived, without a browser.
+
+    Args:
+        server (FixtureServer): Running fixture server
+        url (str): Synthetic profile URL
+        archive (PageArchive): Archive to write to
+
+    Returns:
+        int: Pages archived
+    """
+    def fetch(page_url):
+        with urlopen(page_url, timeout=30) as response:
+            return response.read().decode('utf-8')
+
+    user = urlparse(url).path.strip('/').lstrip('@')
+    archive.put(url, 'profile', fetch(url), url)
+    video_ids = []
+    cursor = 0
+    while True:
+        query = urlencode({'user': user, 'cursor': cursor, 'count': server.page_size})
+        api_url = f"{server.base_url}{_ITEM_LIST_PATH}?{query}"
+        body = fetch(api_url)
+        archive.put(api_url, 'item_list', body, url)
+        payload = json.loads(body)
+        video_ids += [item['id'] for item in payload['itemList']]
+        if not payload['hasMore']:
+            break
+        cursor = int(payload['cursor'])
+    for video_id in video_ids:
+        video_url = f"{url}/video/{video_id}"
+        archive.put(video_url, 'video', fetch(video_url), url)
+    return archive.pages
+
+def benchmark_reextract(server, url):
+    """
+    Time the offline re-extractor over one archived synthetic profile.
+
+    Only the re-extraction is timed; fetching and archiving the pages is
+    not, so the fixture server's latency does not count.
+
+    Returns:
+        tuple: (video records, {'extraction': seconds})
+    """
+    import tiktok_archive
+
+    with tempfile.TemporaryDirectory() as root:
+        archive = tiktok_archive.PageArchive(root)
+        archive_fixture_profile(server, url, archive)
+        start = time.monotonic()
+        video_data = [record for _, record in tiktok_archive.reextract(archive)]
+        return video_data, {'extraction': time.monotonic() - start}
+
+def run_benchmark(server, sizes, modes, repeat=1, driver=None):
+    """
+    Scrape synthetic profiles of each size in each mode and time the phases.
+
+    Args:
+        server (FixtureServer): Running fixture server
+        sizes (list): Profile sizes (videos per profile)
+        modes (list): 'legacy' (open every video page), 'bulk',
+            'network' (metrics from the captured item-list responses) and/or
+            'reextract' (offline re-extraction of the archived pages, no
+            browser needed)
+        repeat (int): Runs per size and mode; the fastest is reported
+        driver: Optional WebDriver session to reuse
+
+    Returns:
+        list: One result dict per mode and size
+    """
+    owns_driver = driver is None and any(mode in BROWSER_MODES for mode in modes)
+    if owns_driver:
+        driver = scraper.create_driver(lean=True, network='network' in modes)
+    results = []
+    try:
+        for mode in modes:
+            for size in sizes:
+                best = None
+                for run in range(repeat):
+                    # A fresh profile name per run keeps sessionStorage from carrying over
+                    url = server.profile_url(f"bench{run}{mode}", size)
+                    phases = {}
+                    METRICS.reset()
+                    if mode == 'reextract':
+                        video_data, phases = benchmark_reextract(server, url)
+                        total = sum(phases.values())
+                    else:
+                        start = time.monotonic()
+                        video_data = scraper.scrape_tiktok_profile(url, driver=driver, bulk=(mode == 'bulk'),
+                                                                   network=(mode == 'network'), phases=phases)
+                        total = time.monotonic() - start
+                    result = {
+                        'mode': mode,
+                        'size': size,
+                        'videos': len(video_data),
+                        'total_seconds': round(total, 3),
+                        'videos_per_second': round(len(video_data) / total, 3) if total else 0.0,
+                        'phases': {name: round(seconds, 3) for name, seconds in phases.items()},
+                        'accuracy': check_accuracy(video_data),
+                        'selector_misses': sum(series['value'] for series in METRICS.snapshot()
+                                               if series['name'] == 'selector_lookups_total'
+                                               and series['labels']['result'] == 'miss'),
+                    }
+                    if best is None or result['total_seconds'] < best['total_seconds']:
+                        best = result
+                results.append(best)
+    finally:
+        if owns_driver:
+            driver.quit()
+    return results
+
+def compare_to_baseline(results, baseline, max_regression):
+    """
+    Find results whose throughput dropped against a baseline run.
+
+    Args:
+        results (list): Results from run_benchmark()
+        baseline (dict): A previously saved benchmark report
+        max_regression (float): Allowed relative drop, e.g. 0.2 for 20%
+
+    Returns:
+        list: Human-readable descriptions of each regression
+    """
+    previous = {(r['mode'], r['size']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result['mode'], result['size']))
+        if not before or not before['videos_per_second']:
+            continue
+        change = result['videos_per_second'] / before['videos_per_second'] - 1
+        if change < -max_regression:
+            regressions.append(f"{result['mode']} @ {result['size']} videos: "
+                               f"{before['videos_per_second']:.2f} → {result['videos_per_second']:.2f} videos/s "
+                               f"({change * 100:+.0f}%)")
+        if (before.get('accuracy') or 0) > (result.get('accuracy') or 0):
+            regressions.append(f"{result['mode']} @ {result['size']} videos: accuracy "
+                               f"{before['accuracy']:.0%} → {(result.get('accuracy') or 0):.0%}")
+    return regressions
+
+def print_results(results):
+    print("\n📊 Benchmark results:")
+    for result in results:
+        phases = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in result['phases'].items())
+        accuracy = f"{result['accuracy']:.0%}" if result['accuracy'] is not None else "n/a"
+        print(f"   {result['mode']:>6} @ {result['size']:>4} videos: {result['total_seconds']:.2f}s "
+              f"({result['videos_per_second']:.2f} videos/s), accuracy {accuracy}, "
+              f"selector misses {result.get('selector_misses', 0)}")
+        print(f"          {phases}")
+
+def record_fixtures(url, out_dir=FIXTURE_DIR, videos=5):
+    """
+    Save a live profile page and some of its video pages as fixtures.
+
+    Args:
+        url (str): TikTok profile URL
+        out_dir (str): Fixture directory
+        videos (int): Number of video pages to save
+    """
+    user = scraper.get_profile_name(url, 0)
+    driver = scraper.create_driver()
+    try:
+        waiter = scraper.AdaptiveWaiter(driver)
+        driver.get(url)
+        waiter.until('profile_load', scraper.tiles_present)
+        os.makedirs(os.path.join(out_dir, f"@{user}", 'video'), exist_ok=True)
+        with open(os.path.join(out_dir, f"@{user}.html"), 'w', encoding='utf-8') as f:
+            f.write(driver.page_source)
+        print(f"✅ Saved profile page @{user}")
+
+        hrefs = (driver.execute_script(scraper.TILE_HREFS_SCRIPT) or [])[:videos]
+        for href in hrefs:
+            video_id = scraper.extract_video_id(href)
+            driver.get(href)
+            waiter.until('video_load', scraper.video_metrics_present)
+            with open(os.path.join(out_dir, f"@{user}", 'video', f"{video_id}.html"), 'w', encoding='utf-8') as f:
+                f.write(driver.page_source)
+            print(f"✅ Saved video page {video_id}")
+    finally:
+        driver.quit()
+
+def main(argv=None):
+    """
+    Command line interface for the fixture server and benchmark.
+
+    Args:
+        argv (list): Optional argument list, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the TikTok scraper against local fixtures.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help=f"Profile sizes to benchmark (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--modes", nargs="+", choices=BROWSER_MODES + ["reextract"], default=["legacy", "bulk"],
+                        help="Scrape modes to benchmark (default: legacy bulk)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per size and mode, fastest kept (default: 1)")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f"Tiles per infinite-scroll page (default: {DEFAULT_PAGE_SIZE})")
+    parser.add_argument("--scroll-latency", type=float, default=DEFAULT_SCROLL_LATENCY,
+                        help=f"Seconds before the next page of tiles appears (default: {DEFAULT_SCROLL_LATENCY})")
+    parser.add_argument("--page-latency", type=float, default=DEFAULT_PAGE_LATENCY,
+                        help=f"Server response delay in seconds (default: {DEFAULT_PAGE_LATENCY})")
+    parser.add_argument("--no-state", action="store_true",
+                        help="Leave the embedded state JSON out of the pages, forcing DOM extraction")
+    parser.add_argument("--fixtures", default=None, help=f"Directory of recorded pages to serve (e.g. {FIXTURE_DIR})")
+    parser.add_argument("--output", default=None, help=f"Report path (default: {BENCHMARK_DIR}/bench_<timestamp>.json)")
+    parser.add_argument("--baseline", default=None, help="Earlier report to compare throughput against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed throughput drop against the baseline (default: 0.2)")
+    parser.add_argument("--serve", action="store_true", help="Only run the fixture server until interrupted")
+    parser.add_argument("--port", type=int, default=0, help="Fixture server port (default: any free port)")
+    parser.add_argument("--record", metavar="URL", help="Save a live profile and its video pages as fixtures")
+    parser.add_argument("--record-videos", type=int, default=5, help="Video pages to save with --record (default: 5)")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record_fixtures(args.record, args.fixtures or FIXTURE_DIR, args.record_videos)
+        return
+
+    server = FixtureServer(port=args.port, page_size=args.page_size, scroll_latency=args.scroll_latency,
+                           page_latency=args.page_latency, with_state=not args.no_state, fixture_dir=args.fixtures)
+
+    if args.serve:
+        with server:
+            print(f"🧪 Fixture server on {server.base_url}")
+            print(f"   Synthetic profile: {server.profile_url('bench', 120)}")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                print("\n👋 Fixture server stopped")
+        return
+
+    # Politeness delays and rate limits only slow down an offline benchmark
+    scraper.POLITENESS_JITTER = (0.0, 0.0)
+    scraper.RATE_LIMITER.configure(rate=0)
+
+    with server:
+        print(f"🧪 Fixture server on {server.base_url}")
+        results = run_benchmark(server, args.sizes, args.modes, max(1, args.repeat))
+
+    print_results(results)
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'config': {
+            'sizes': args.sizes,
+            'modes': args.modes,
+            'page_size': args.page_size,
+            'scroll_latency': args.scroll_latency,
+            'page_latency': args.page_latency,
+            'state': not args.no_state,
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(BENCHMARK_DIR, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Report saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_to_baseline(results, json.load(f), args.max_regression)
+        if regressions:
+            print("❌ Regressions against the baseline:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print("✅ No regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
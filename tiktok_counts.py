@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+TikTok Count Normalizer
+Parses the abbreviated counts TikTok shows ("142.5K", "1,2 M", "10.5万")
+into integers, one value at a time or a whole column at once.
+
+Unlike the old parse_count(), nothing is silently turned into 0. Every parse
+says whether the text was a count, so historical *_raw columns can be
+re-normalized and the values that did not parse can be counted and
+inspected.
+
+Usage:
+    python3 tiktok_counts.py data/old_scrape.csv                # writes old_scrape.normalized.csv
+    python3 tiktok_counts.py data/*.csv --in-place --locale eu
+"""
+
+import os
+import re
+import csv
+import argparse
+
+METRICS = ['views', 'likes', 'bookmarks', 'comments']
+LOCALES = ['auto', 'en', 'eu']
+
+# Multipliers for count suffixes, matched case-insensitively (a trailing "." is ignored)
+SUFFIX_MULTIPLIERS = {
+    '': 1,
+    'k': 10 ** 3, 'm': 10 ** 6, 'b': 10 ** 9,
+    # European abbreviations
+    'tsd': 10 ** 3, 'mil': 10 ** 3, 'tys': 10 ** 3, 'mio': 10 ** 6, 'mln': 10 ** 6,
+    'mrd': 10 ** 9, 'md': 10 ** 9, 'mld': 10 ** 9,
+    # Chinese, Japanese and Korean units
+    '千': 10 ** 3, '万': 10 ** 4, '萬': 10 ** 4, '亿': 10 ** 8, '億': 10 ** 8,
+    '천': 10 ** 3, '만': 10 ** 4, '억': 10 ** 8,
+}
+
+# Digits with separators, then an optional alphabetic suffix
+_COUNT_RE = re.compile(r"^(?P<number>\d[\d.,]*)(?P<suffix>[^\W\d_]*)\.?$")
+# Characters used as thousands separators that carry no other meaning
+_GROUPING_RE = re.compile(r"[\s'\u2019]")
+_GROUPS_RE = re.compile(r"^\d{1,3}(?:[.,]\d{3})+$")
+
+def _split_number(number, suffix, locale):
+    """
+    Split a number into integer and fraction digits according to the locale.
+
+    Returns:
+        tuple: (integer_digits, fraction_digits), or None if malformed
+    """
+    has_dot = '.' in number
+    has_comma = ',' in number
+
+    if locale == 'en':
+        decimal, thousands = '.', ','
+    elif locale == 'eu':
+        decimal, thousands = ',', '.'
+    elif has_dot and has_comma:
+        # "1,234.5" or "1.234,5": whichever comes last is the decimal separator
+        decimal = '.' if number.rfind('.') > number.rfind(',') else ','
+        thousands = ',' if decimal == '.' else '.'
+    elif has_dot or has_comma:
+        separator = '.' if has_dot else ','
+        parts = number.split(separator)
+        # Several separators, or one followed by a 3-digit group on a plain
+        # count ("1,234"), group thousands; otherwise it is a decimal point
+        if len(parts) > 2 or (not suffix and len(parts[1]) == 3):
+            decimal, thousands = ('.' if separator == ',' else ','), separator
+        else:
+            decimal, thousands = separator, ('.' if separator == ',' else ',')
+    else:
+        return number, ''
+
+    integer, _, fraction = number.partition(decimal)
+    if decimal in fraction or thousands in fraction:
+        return None
+    if thousands in integer:
+        if not _GROUPS_RE.match(integer):
+            return None
+        integer = integer.replace(thousands, '')
+    if not integer or (decimal in number and not fraction):
+        return None
+    return integer, fraction
+
+def _strip_unit_words(text):
+    # "1.5M views", "842 likes": drop trailing words that are not count suffixes
+    words = text.split()
+    while len(words) > 1:
+        word = words[-1].rstrip('.').lower()
+        if not word.isalpha() or word in SUFFIX_MULTIPLIERS:
+            break
+        words.pop()
+    return ' '.join(words)
+
+def parse_count_strict(text, locale='auto'):
+    """
+    Parse one TikTok count string.
+
+    Args:
+        text (str): Raw count text such as "142.5K", "1,2K", "1.234.567" or
+            "10.5万"; a trailing unit word ("1.5M views") is ignored
+        locale (str): 'auto' to infer the decimal separator, 'en' for
+            "1,234.5" or 'eu' for "1.234,5"
+
+    Returns:
+        int: The count, or None if the text is not a valid count
+    """
+    if text is None:
+        return None
+    text = _GROUPING_RE.sub('', _strip_unit_words(str(text)))
+    match = _COUNT_RE.match(text)
+    if not match:
+        return None
+
+    suffix = match.group('suffix').lower()
+    multiplier = SUFFIX_MULTIPLIERS.get(suffix)
+    if multiplier is None:
+        return None
+    parts = _split_number(match.group('number'), suffix, locale)
+    if parts is None:
+        return None
+
+    integer, fraction = parts
+    if fraction and multiplier == 1 and fraction.strip('0'):
+        # A plain count cannot be fractional
+        return None
+    value = int(integer) * multiplier
+    if fraction:
+        value += round(int(fraction) * multiplier / 10 ** len(fraction))
+    return value
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def parse_counts(values, locale='auto'):
+    """
+    Parse a column of count strings.
+
+    Raw columns repeat the same few strings ("0", "1.2K", ...) many times, so
+    only the distinct values are parsed. With NumPy they are found with
+    np.unique and the results scattered back in one vectorized step;
+    without it a dictionary does the same job.
+
+    Args:
+        values (iterable): Raw count strings (None for missing values)
+        locale (str): See parse_count_strict()
+
+    Returns:
+        tuple: (counts, valid). With NumPy these are an int64 array and a
+            bool array, otherwise lists. Invalid entries have a count of 0
+            and valid False.
+    """
+    np = _numpy()
+    if np is None:
+        parsed = {}
+        counts, valid = [], []
+        for value in values:
+            if value not in parsed:
+                parsed[value] = parse_count_strict(value, locale)
+            count = parsed[value]
+            counts.append(count or 0)
+            valid.append(count is not None)
+        return counts, valid
+
+    if not (isinstance(values, np.ndarray) and values.dtype.kind == 'U'):
+        values = np.array(['' if value is None else str(value) for value in values], dtype=str)
+    if values.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+
+    unique, inverse = np.unique(values, return_inverse=True)
+    parsed = [parse_count_strict(value, locale) for value in unique.tolist()]
+    unique_valid = np.array([count is not None for count in parsed], dtype=bool)
+    unique_counts = np.array([count or 0 for count in parsed], dtype=np.int64)
+    inverse = inverse.reshape(-1)
+    return unique_counts[inverse], unique_valid[inverse]
+
+def renormalize_rows(rows, locale='auto'):
+    """
+    Re-parse the metric columns of scraped rows from their *_raw columns.
+
+    Rows whose raw text does not parse keep their existing metric value.
+
+    Args:
+        rows (list): Row dictionaries with <metric>_raw columns, updated in place
+        locale (str): See parse_count_strict()
+
+    Returns:
+        dict: Per metric, the number of rows whose raw text was not a valid count
+    """
+    invalid = {}
+    for metric in METRICS:
+        raw_key = f'{metric}_raw'
+        if not rows or raw_key not in rows[0]:
+            continue
+        counts, valid = parse_counts([row.get(raw_key) for row in rows], locale)
+        invalid[metric] = 0
+        for row, count, ok in zip(rows, counts, valid):
+            if ok:
+                row[metric] = int(count)
+            else:
+                invalid[metric] += 1
+    return invalid
+
+def renormalize_csv(path, out_path, locale='auto'):
+    """
+    Rewrite a scrape CSV with metrics re-parsed from its *_raw columns.
+
+    Args:
+        path (str): Source CSV
+        out_path (str): Destination CSV (may be the source path)
+        locale (str): See parse_count_strict()
+
+    Returns:
+        tuple: (row_count, invalid) where invalid is as for renormalize_rows()
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames or []
+        rows = list(reader)
+
+    invalid = renormalize_rows(rows, locale)
+
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, out_path)
+    return len(rows), invalid
+
+def main(argv=None):
+    """
+    Command line interface for re-normalizing old scrape CSVs.
+
+    Args:
+        argv (list): Optional argument list, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(description="Re-parse TikTok metric columns from their *_raw text.")
+    parser.add_argument("paths", nargs="+", help="Scrape CSV files")
+    parser.add_argument("--locale", choices=LOCALES, default='auto',
+                        help="Decimal separator convention of the raw text (default: auto)")
+    parser.add_argument("--in-place", action="store_true",
+                        help="Overwrite the files instead of writing <name>.normalized.csv")
+    args = parser.parse_args(argv)
+
+    for path in args.paths:
+        out_path = path if args.in_place else os.path.splitext(path)[0] + '.normalized.csv'
+        rows, invalid = renormalize_csv(path, out_path, args.locale)
+        bad = ', '.join(f"{metric} {count}" for metric, count in invalid.items() if count)
+        print(f"✅ {path} → {out_path}: {rows:,} rows" + (f" (unparsed: {bad})" if bad else ""))
+
+if __name__ == "__main__":
+    main()
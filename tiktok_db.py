@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+TikTok Metrics Database
+SQLite store of artists, videos and metric snapshots with pre-aggregated
+rollups for the dashboard API.
+
+The scraper writes snapshots here (--format sqlite). After each run the
+rollup tables are rebuilt and exported to data/dashboard-rollups.json, which
+src/app/api/dashboard/route.ts serves without recomputing anything per
+request. Trending scores and growth measured by tiktok_analytics are folded
+into the artist rankings at rebuild time.
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join('data', 'metrics.db')
+CUSTOM_ARTISTS_PATH = os.path.join('data', 'custom-artists.json')
+ROLLUPS_PATH = os.path.join('data', 'dashboard-rollups.json')
+ANALYTICS_PATH = os.path.join('data', 'dashboard-analytics.json')
+GROWTH_WINDOW_DAYS = 7  # Window used for the view growth stored in artist_rollup
+TOP_ARTISTS = 20  # Artists per filter kept in top_artist_rollup (matches the dashboard table)
+TOP_GROWTH = 10  # Artists per filter kept in growth_rollup (matches the dashboard growth chart)
+TOP_HASHTAGS = 30  # Hashtags per filter kept in hashtag_rollup
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artists (
+    username TEXT PRIMARY KEY,
+    artist_id TEXT,
+    name TEXT NOT NULL,
+    likes INTEGER NOT NULL DEFAULT 0,
+    followers INTEGER NOT NULL DEFAULT 0,
+    trending_score REAL NOT NULL DEFAULT 0,
+    breakout_plays INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    profile_json TEXT
+);
+
+CREATE TABLE IF NOT EXISTS artist_genres (
+    genre TEXT NOT NULL,
+    username TEXT NOT NULL REFERENCES artists(username) ON DELETE CASCADE,
+    PRIMARY KEY (genre, username)
+);
+CREATE INDEX IF NOT EXISTS idx_artist_genres_username ON artist_genres(username);
+
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    video_url TEXT,
+    first_seen_at TEXT NOT NULL,
+    last_scraped_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_videos_username ON videos(username);
+
+CREATE TABLE IF NOT EXISTS metric_snapshots (
+    video_id TEXT NOT NULL,
+    scraped_at TEXT NOT NULL,
+    views INTEGER NOT NULL DEFAULT 0,
+    likes INTEGER NOT NULL DEFAULT 0,
+    bookmarks INTEGER NOT NULL DEFAULT 0,
+    comments INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (video_id, scraped_at)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_snapshots_scraped_at ON metric_snapshots(scraped_at);
+
+CREATE TABLE IF NOT EXISTS artist_rollup (
+    username TEXT PRIMARY KEY,
+    videos INTEGER NOT NULL,
+    views INTEGER NOT NULL,
+    likes INTEGER NOT NULL,
+    bookmarks INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    views_window_start INTEGER,
+    view_growth_pct REAL,
+    last_scraped_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS kpi_rollup (
+    filter_genre TEXT PRIMARY KEY,
+    total_plays INTEGER NOT NULL,
+    total_likes INTEGER NOT NULL,
+    total_shares INTEGER NOT NULL,
+    save_to_play_ratio REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS genre_trend_rollup (
+    filter_genre TEXT NOT NULL,
+    genre TEXT NOT NULL,
+    artists INTEGER NOT NULL,
+    plays INTEGER NOT NULL,
+    followers INTEGER NOT NULL,
+    percentage REAL NOT NULL,
+    PRIMARY KEY (filter_genre, genre)
+);
+
+CREATE TABLE IF NOT EXISTS hashtag_rollup (
+    filter_genre TEXT NOT NULL,
+    hashtag TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (filter_genre, hashtag)
+);
+
+CREATE TABLE IF NOT EXISTS top_artist_rollup (
+    filter_genre TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    trending_score REAL NOT NULL,
+    PRIMARY KEY (filter_genre, rank)
+);
+
+CREATE TABLE IF NOT EXISTS growth_rollup (
+    filter_genre TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    growth_pct REAL NOT NULL,
+    views INTEGER NOT NULL,
+    PRIMARY KEY (filter_genre, rank)
+);
+"""
+
+class MetricsDatabase:
+    """
+    SQLite database of scraped metrics.
+
+    Snapshots are inserted in batches inside one transaction per batch. The
+    connection may be shared between threads as long as callers serialise
+    access (the scraper's sinks hold a lock around every call).
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the connection."""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def sync_artists(self, path=CUSTOM_ARTISTS_PATH):
+        """
+        Load the dashboard's managed artists into the artists tables.
+
+        Artists are keyed by TikTok username (the profile name used by the
+        scraper); entries without a username are keyed by their id.
+
+        Args:
+            path (str): Path of custom-artists.json
+
+        Returns:
+            int: Number of artists synced
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'r', encoding='utf-8') as f:
+            artists = json.load(f)
+
+        with self.conn:
+            # Artists no longer in the file stay in the table (their videos do too) but drop out of the rollups
+            self.conn.execute("UPDATE artists SET profile_json = NULL")
+            self.conn.execute("DELETE FROM artist_genres")
+            for artist in artists:
+                username = artist.get('username') or artist.get('id')
+                self.conn.execute(
+                    """
+                    INSERT INTO artists (username, artist_id, name, likes, followers, trending_score,
+                                         breakout_plays, created_at, profile_json)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(username) DO UPDATE SET
+                        artist_id = excluded.artist_id, name = excluded.name, likes = excluded.likes,
+                        followers = excluded.followers, trending_score = excluded.trending_score,
+                        breakout_plays = excluded.breakout_plays, created_at = excluded.created_at,
+                        profile_json = excluded.profile_json
+                    """,
+                    (username, artist.get('id'), artist.get('name') or username, artist.get('likes') or 0,
+                     artist.get('followers') or 0, artist.get('trendingScore') or 0,
+                     (artist.get('breakoutSong') or {}).get('plays') or 0, artist.get('createdAt'),
+                     json.dumps(artist)),
+                )
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO artist_genres (genre, username) VALUES (?, ?)",
+                    [(genre, username) for genre in artist.get('genres') or []],
+                )
+        return len(artists)
+
+    def ensure_artist(self, username):
+        """Create a placeholder artist row for a scraped profile that isn't managed yet."""
+        self.conn.execute("INSERT OR IGNORE INTO artists (username, name) VALUES (?, ?)", (username, username))
+
+    def insert_snapshots(self, rows):
+        """
+        Insert a batch of scraped video records in one transaction.
+
+        Args:
+            rows (list): Video data dictionaries with profile_name and video_id
+        """
+        with self.conn:
+            for username in {row['profile_name'] for row in rows}:
+                self.ensure_artist(username)
+            self.conn.executemany(
+                """
+                INSERT INTO videos (video_id, username, video_url, first_seen_at, last_scraped_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET
+                    last_scraped_at = MAX(last_scraped_at, excluded.last_scraped_at)
+                """,
+                [(row['video_id'], row['profile_name'], row.get('video_url'), row['scraped_at'], row['scraped_at'])
+                 for row in rows],
+            )
+            self.conn.executemany(
+                """
+                INSERT OR REPLACE INTO metric_snapshots (video_id, scraped_at, views, likes, bookmarks, comments)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [(row['video_id'], row['scraped_at'], row.get('views', 0), row.get('likes', 0),
+                  row.get('bookmarks', 0), row.get('comments', 0)) for row in rows],
+            )
+
+    def refresh_rollups(self, now=None, analytics=None):
+        """
+        Rebuild every rollup table from the base tables.
+
+        Artists measured by tiktok_analytics are ranked by their measured
+        trending score and growth; the others keep the trending score from
+        custom-artists.json and the view growth of artist_rollup.
+
+        Args:
+            now (datetime): Reference time for the growth window, defaults to now
+            analytics (dict): Per-artist figures of dashboard-analytics.json, keyed by username
+        """
+        now = now or datetime.now()
+        analytics = analytics or {}
+        window_start = (now - timedelta(days=GROWTH_WINDOW_DAYS)).isoformat()
+
+        with self.conn:
+            self.conn.execute("DELETE FROM artist_rollup")
+            self.conn.execute(
+                """
+                INSERT INTO artist_rollup (username, videos, views, likes, bookmarks, comments,
+                                           views_window_start, view_growth_pct, last_scraped_at)
+                SELECT username, videos, views, likes, bookmarks, comments, views_window_start,
+                       CASE WHEN views_window_start > 0
+                            THEN 100.0 * (views - views_window_start) / views_window_start END,
+                       last_scraped_at
+                FROM (
+                    SELECT v.username,
+                           COUNT(*) AS videos,
+                           SUM(s.views) AS views,
+                           SUM(s.likes) AS likes,
+                           SUM(s.bookmarks) AS bookmarks,
+                           SUM(s.comments) AS comments,
+                           SUM((SELECT p.views FROM metric_snapshots p
+                                WHERE p.video_id = v.video_id AND p.scraped_at <= ?
+                                ORDER BY p.scraped_at DESC LIMIT 1)) AS views_window_start,
+                           MAX(v.last_scraped_at) AS last_scraped_at
+                    FROM videos v
+                    JOIN metric_snapshots s ON s.video_id = v.video_id AND s.scraped_at = v.last_scraped_at
+                    GROUP BY v.username
+                )
+                """,
+                (window_start,),
+            )
+
+            growth = {
+                username: {'growthPct': growth_pct, 'views': views}
+                for username, views, growth_pct in self.conn.execute(
+                    "SELECT username, views, view_growth_pct FROM artist_rollup")
+            }
+            artists = self._load_artists()
+            for artist in artists:
+                measured = analytics.get(artist['username'])
+                if measured is None:
+                    measured = growth.get(artist['username'], {})
+                elif measured.get('trendingScore') is not None:
+                    artist['trending_score'] = measured['trendingScore']
+                artist['growth_pct'] = measured.get('growthPct')
+                artist['views'] = measured.get('views') or 0
+
+            filters = {'all': artists}
+            for artist in artists:
+                for genre in artist['genres']:
+                    filters.setdefault(genre.lower(), []).append(artist)
+
+            for table in ('kpi_rollup', 'genre_trend_rollup', 'hashtag_rollup', 'top_artist_rollup', 'growth_rollup'):
+                self.conn.execute(f"DELETE FROM {table}")
+
+            for filter_genre, members in filters.items():
+                self._write_filter_rollups(filter_genre, members)
+
+    def _load_artists(self):
+        rows = self.conn.execute(
+            "SELECT username, likes, followers, trending_score, breakout_plays FROM artists "
+            "WHERE profile_json IS NOT NULL"
+        ).fetchall()
+        genres = {}
+        for genre, username in self.conn.execute("SELECT genre, username FROM artist_genres"):
+            genres.setdefault(username, []).append(genre)
+        return [
+            {'username': username, 'likes': likes, 'followers': followers, 'trending_score': trending_score,
+             'breakout_plays': breakout_plays, 'genres': genres.get(username, [])}
+            for username, likes, followers, trending_score, breakout_plays in rows
+        ]
+
+    def _write_filter_rollups(self, filter_genre, artists):
+        # Same formulas as calculateKPIsFromData / generateGenreTrendsFromData /
+        # generateHashtagData in the dashboard route, precomputed per genre filter
+        total_likes = sum(a['likes'] for a in artists)
+        total_songs = sum(a['breakout_plays'] for a in artists)
+        ratio = min(0.15, total_songs / total_likes) if total_likes > 0 else 0.08
+        self.conn.execute(
+            "INSERT INTO kpi_rollup VALUES (?, ?, ?, ?, ?)",
+            (filter_genre, total_likes, total_likes, int(total_likes * 0.12), round(ratio, 3)),
+        )
+
+        genre_stats = {}
+        hashtags = {}
+        for artist in artists:
+            for genre in artist['genres']:
+                stats = genre_stats.setdefault(genre, [0, 0, 0])
+                stats[0] += 1
+                stats[1] += artist['likes']
+                stats[2] += artist['followers']
+                hashtag = f"#{genre.lower()}"
+                hashtags[hashtag] = hashtags.get(hashtag, 0) + artist['likes'] // 10000
+        self.conn.executemany(
+            "INSERT INTO genre_trend_rollup VALUES (?, ?, ?, ?, ?, ?)",
+            [(filter_genre, genre, count, likes, followers, round(100.0 * count / len(artists), 1) if artists else 0.0)
+             for genre, (count, likes, followers) in genre_stats.items()],
+        )
+        top_hashtags = sorted(hashtags.items(), key=lambda item: item[1], reverse=True)[:TOP_HASHTAGS]
+        self.conn.executemany(
+            "INSERT INTO hashtag_rollup VALUES (?, ?, ?)",
+            [(filter_genre, hashtag, value) for hashtag, value in top_hashtags],
+        )
+
+        top = sorted(artists, key=lambda a: a['trending_score'], reverse=True)[:TOP_ARTISTS]
+        self.conn.executemany(
+            "INSERT INTO top_artist_rollup VALUES (?, ?, ?, ?)",
+            [(filter_genre, rank, artist['username'], artist['trending_score']) for rank, artist in enumerate(top, 1)],
+        )
+
+        # Same ranking as generateArtistGrowthData: artists without measured growth are left out
+        growing = sorted((a for a in artists if a['growth_pct'] is not None),
+                         key=lambda a: a['growth_pct'], reverse=True)[:TOP_GROWTH]
+        self.conn.executemany(
+            "INSERT INTO growth_rollup VALUES (?, ?, ?, ?, ?)",
+            [(filter_genre, rank, artist['username'], artist['growth_pct'], artist['views'])
+             for rank, artist in enumerate(growing, 1)],
+        )
+
+    def export_rollups(self, path=ROLLUPS_PATH, source_path=CUSTOM_ARTISTS_PATH, analytics_path=ANALYTICS_PATH):
+        """
+        Write the rollup tables to the JSON file served by the dashboard API.
+
+        The file records the modification times of custom-artists.json and
+        dashboard-analytics.json it was built from, so the dashboard can tell
+        when it is out of date. The per-artist totals and view growth of
+        artist_rollup are exported as artistStats, keyed by username.
+
+        Args:
+            path (str): Output JSON path
+            source_path (str): custom-artists.json the artist data came from
+            analytics_path (str): dashboard-analytics.json the measured scores came from
+        """
+        filters = {}
+        for filter_genre, plays, likes, shares, ratio in self.conn.execute("SELECT * FROM kpi_rollup"):
+            filters[filter_genre] = {
+                'kpis': {'totalPlays': plays, 'totalLikes': likes, 'totalShares': shares, 'saveToPlayRatio': ratio},
+                'genreTrends': [],
+                'hashtags': [],
+                'artists': [],
+                'artistGrowth': [],
+            }
+
+        for filter_genre, genre, _, plays, _, percentage in self.conn.execute(
+                "SELECT * FROM genre_trend_rollup ORDER BY filter_genre, plays DESC"):
+            filters[filter_genre]['genreTrends'].append({'genre': genre, 'plays': plays, 'percentage': percentage})
+
+        for filter_genre, hashtag, value in self.conn.execute(
+                "SELECT * FROM hashtag_rollup ORDER BY filter_genre, value DESC"):
+            filters[filter_genre]['hashtags'].append({'text': hashtag, 'value': value})
+
+        for filter_genre, trending_score, profile_json in self.conn.execute(
+                """
+                SELECT t.filter_genre, t.trending_score, a.profile_json FROM top_artist_rollup t
+                JOIN artists a ON a.username = t.username
+                ORDER BY t.filter_genre, t.rank
+                """):
+            if profile_json:
+                filters[filter_genre]['artists'].append({**json.loads(profile_json), 'trendingScore': trending_score})
+
+        for filter_genre, name, growth_pct, views in self.conn.execute(
+                """
+                SELECT g.filter_genre, a.name, g.growth_pct, g.views FROM growth_rollup g
+                JOIN artists a ON a.username = g.username
+                ORDER BY g.filter_genre, g.rank
+                """):
+            filters[filter_genre]['artistGrowth'].append(
+                {'artistName': name, 'percentGrowth': round(growth_pct, 2), 'totalPlays': views})
+
+        artist_stats = {}
+        for username, videos, views, likes, bookmarks, comments, _, growth_pct, last_scraped_at in self.conn.execute(
+                "SELECT * FROM artist_rollup"):
+            artist_stats[username] = {
+                'videos': videos, 'views': views, 'likes': likes, 'bookmarks': bookmarks, 'comments': comments,
+                'growthPct': None if growth_pct is None else round(growth_pct, 2),
+                'lastScrapedAt': last_scraped_at,
+            }
+
+        source_mtime = os.path.getmtime(source_path) * 1000 if os.path.exists(source_path) else None
+        analytics_mtime = os.path.getmtime(analytics_path) * 1000 if os.path.exists(analytics_path) else None
+        payload = {
+            'generatedAt': datetime.now().isoformat(),
+            'sourceMtimeMs': source_mtime,
+            'analyticsMtimeMs': analytics_mtime,
+            'growthWindow': f"{GROWTH_WINDOW_DAYS}d",
+            'artistStats': artist_stats,
+            'filters': filters,
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    def rebuild(self, artists_path=CUSTOM_ARTISTS_PATH, rollups_path=ROLLUPS_PATH, analytics_path=ANALYTICS_PATH):
+        """
+        Sync artists, rebuild the rollups and export them for the dashboard.
+
+        Args:
+            artists_path (str): custom-artists.json path
+            rollups_path (str): Output JSON path
+            analytics_path (str): dashboard-analytics.json with the measured trending scores, if computed
+        """
+        self.sync_artists(artists_path)
+        self.refresh_rollups(analytics=load_analytics_artists(analytics_path))
+        self.export_rollups(rollups_path, artists_path, analytics_path)
+
+def load_analytics_artists(path=ANALYTICS_PATH):
+    """
+    Read the per-artist figures of the growth analytics file.
+
+    Args:
+        path (str): dashboard-analytics.json written by tiktok_analytics
+
+    Returns:
+        dict: Figures keyed by username, empty if the analytics have not been computed
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('artists') or {}
+
+def main(argv=None):
+    """
+    Rebuild the dashboard rollups from the command line.
+
+    Args:
+        argv (list): Optional argument list, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(description="Rebuild the metrics database rollups for the dashboard.")
+    parser.add_argument("--db", default=DB_PATH, help=f"SQLite database path (default: {DB_PATH})")
+    parser.add_argument("--artists", default=CUSTOM_ARTISTS_PATH,
+                        help=f"Managed artists JSON (default: {CUSTOM_ARTISTS_PATH})")
+    parser.add_argument("--analytics", default=ANALYTICS_PATH,
+                        help=f"Growth analytics JSON with measured trending scores (default: {ANALYTICS_PATH})")
+    parser.add_argument("--out", default=ROLLUPS_PATH, help=f"Rollup JSON output (default: {ROLLUPS_PATH})")
+    args = parser.parse_args(argv)
+
+    db = MetricsDatabase(args.db)
+    try:
+        print(f"🗄️  Rebuilding rollups in {args.db}...")
+        db.rebuild(args.artists, args.out, args.analytics)
+        print(f"✅ Dashboard rollups written to {args.out}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
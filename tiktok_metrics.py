@@ -0,0 +1,204 @@
+"""
+TikTok Scraper Metrics
+Structured counters and timings for scrape runs, exported as JSON lines or
+a Prometheus text file.
+
+The scraper records into the process-wide METRICS registry: waits, phases,
+scroll progress, video navigation, container and metric selector hits and
+misses, errors and output writes. main() and the scheduler export it after
+every profile:
+
+    python3 tiktok_scraper.py --metrics-jsonl data/metrics/run.jsonl --metrics-prom data/metrics/scraper.prom
+
+The .prom file is rewritten atomically, so it can be picked up by the
+node_exporter textfile collector; the JSON lines file gets one line per
+series and export, ready for any log pipeline.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+PREFIX = 'tiktok_scraper_'
+
+# Help text per metric, also the list of metrics the scraper records
+HELP = {
+    'wait_seconds': 'Time spent in adaptive waits, by wait label',
+    'wait_timeouts_total': 'Adaptive waits that hit their timeout, by wait label',
+    'phase_seconds': 'Time spent per scrape phase',
+    'scrolls_total': 'Profile page scrolls, by outcome (grew, unchanged or memory_stop)',
+    'tiles_loaded_total': 'Video tiles loaded by scrolling',
+    'selector_lookups_total': 'Selector lookups, by page type, metric, selector and result (hit or miss)',
+    'selector_promotions_total': 'Fallback selectors moved to the front after repeated hits',
+    'video_navigation_seconds': 'Time to open a video page and render its metrics',
+    'videos_scraped_total': 'Video records produced, by mode',
+    'errors_total': 'Errors, by stage',
+    'retries_total': 'Recovery attempts, by stage',
+    'sink_write_seconds': 'Time spent writing a batch to an output, by format',
+    'sink_rows_total': 'Rows written to outputs, by format',
+    'profiles_total': 'Profiles processed, by result',
+    'item_list_responses_total': 'Item-list API responses decoded by network capture',
+    'page_loads_total': 'Page loads reported to the rate limiter, by outcome (ok, empty, blocked or error)',
+    'rate_limit_wait_seconds': 'Time page loads waited for the rate limiter',
+    'backoffs_total': 'Host backoffs after block pages or runs of empty pages, by host',
+    'circuit_trips_total': 'Session circuit breakers opened after repeated failures',
+    'memory_pressure_total': 'Browser sessions found over the memory limit by the watchdog',
+}
+
+class Metrics:
+    """
+    Thread-safe registry of labelled counters and timing summaries.
+
+    Counters only go up. Timings keep count, sum, min and max per label set,
+    which is enough for rates and averages without storing every sample.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timings = {}
+        self.started_at = datetime.now().isoformat()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """
+        Increase a counter.
+
+        Args:
+            name (str): Metric name (see HELP)
+            value (float): Amount to add
+            **labels: Label values
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """
+        Record one timing.
+
+        Args:
+            name (str): Metric name (see HELP)
+            seconds (float): Duration
+            **labels: Label values
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            stats = self._timings.get(key)
+            if stats is None:
+                self._timings[key] = [1, seconds, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = min(stats[2], seconds)
+                stats[3] = max(stats[3], seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the body of a with block as one observation."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start, **labels)
+
+    def snapshot(self):
+        """
+        Return every series.
+
+        Returns:
+            list: Dicts with name, type ('counter' or 'timing'), labels and
+                either value or count/sum/min/max
+        """
+        with self._lock:
+            series = [{'name': name, 'type': 'counter', 'labels': dict(labels), 'value': value}
+                      for (name, labels), value in self._counters.items()]
+            series += [{'name': name, 'type': 'timing', 'labels': dict(labels),
+                        'count': stats[0], 'sum': stats[1], 'min': stats[2], 'max': stats[3]}
+                       for (name, labels), stats in self._timings.items()]
+        return sorted(series, key=lambda s: (s['name'], sorted(s['labels'].items())))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+        self.started_at = datetime.now().isoformat()
+
+    def write_jsonl(self, path, **context):
+        """
+        Append the current value of every series to a JSON lines file.
+
+        Args:
+            path (str): Output file
+            **context: Extra fields added to every line (e.g. profile)
+        """
+        exported_at = datetime.now().isoformat()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for series in self.snapshot():
+                f.write(json.dumps(dict(series, exported_at=exported_at, run_started_at=self.started_at,
+                                        **context)) + '\n')
+
+    def write_prometheus(self, path):
+        """
+        Write every series in the Prometheus text exposition format.
+
+        Timings become summaries (_count and _sum) plus a _max gauge. The
+        file is replaced atomically.
+
+        Args:
+            path (str): Output file, conventionally *.prom
+        """
+        by_name = {}
+        for series in self.snapshot():
+            by_name.setdefault(series['name'], []).append(series)
+
+        lines = []
+        for name, series_list in by_name.items():
+            metric = PREFIX + name
+            help_text = HELP.get(name, name)
+            if series_list[0]['type'] == 'counter':
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                for series in series_list:
+                    lines.append(f"{metric}{_labels(series['labels'])} {series['value']}")
+            else:
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} summary")
+                for series in series_list:
+                    labels = _labels(series['labels'])
+                    lines.append(f"{metric}_count{labels} {series['count']}")
+                    lines.append(f"{metric}_sum{labels} {series['sum']:.6f}")
+                lines.append(f"# HELP {metric}_max Longest single observation of {metric}")
+                lines.append(f"# TYPE {metric}_max gauge")
+                for series in series_list:
+                    lines.append(f"{metric}_max{_labels(series['labels'])} {series['max']:.6f}")
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+
+    def export(self, jsonl_path=None, prometheus_path=None, **context):
+        """Write whichever exports are configured."""
+        if jsonl_path:
+            self.write_jsonl(jsonl_path, **context)
+        if prometheus_path:
+            self.write_prometheus(prometheus_path)
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())) + '}'
+
+METRICS = Metrics()
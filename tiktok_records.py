@@ -0,0 +1,251 @@
+"""
+TikTok Video Records
+Compact containers for scraped video metrics.
+
+VideoRecord is a slotted record that reads like the dict the scraper used to
+build (record['views'], record.get('video_url'), dict(record)), so code that
+consumed those dicts keeps working. RecordBatch stores many records
+column-wise: counts in fixed-width int64 arrays, with raw count strings and
+profile names interned. Holding the videos of hundreds of profiles then costs
+a few bytes per metric instead of a dict per row.
+"""
+
+import sys
+from array import array
+from collections.abc import Mapping
+
+METRIC_NAMES = ('views', 'likes', 'bookmarks', 'comments')
+RAW_FIELDS = tuple(f'{metric}_raw' for metric in METRIC_NAMES)
+RECORD_FIELDS = ('video_url',) + METRIC_NAMES + RAW_FIELDS + ('scraped_at',)
+PROFILE_FIELDS = ('profile_name', 'profile_url')
+_FIELDS = frozenset(RECORD_FIELDS + PROFILE_FIELDS)
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+class VideoRecord(Mapping):
+    """
+    One scraped video.
+
+    Raw count strings repeat endlessly ("0", "1.2K"), so they are interned.
+    The profile fields are only present once set (see with_profile()), just
+    as the old per-profile dicts had no profile columns.
+    """
+
+    __slots__ = RECORD_FIELDS + PROFILE_FIELDS
+
+    def __init__(self, video_url, views=0, likes=0, bookmarks=0, comments=0,
+                 views_raw=None, likes_raw=None, bookmarks_raw=None, comments_raw=None,
+                 scraped_at=None, profile_name=None, profile_url=None):
+        self.video_url = video_url
+        self.views = int(views or 0)
+        self.likes = int(likes or 0)
+        self.bookmarks = int(bookmarks or 0)
+        self.comments = int(comments or 0)
+        self.views_raw = _intern(views_raw)
+        self.likes_raw = _intern(likes_raw)
+        self.bookmarks_raw = _intern(bookmarks_raw)
+        self.comments_raw = _intern(comments_raw)
+        self.scraped_at = scraped_at
+        self.profile_name = _intern(profile_name)
+        self.profile_url = _intern(profile_url)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a video data dictionary (unknown keys are ignored)."""
+        return cls(**{key: value for key, value in data.items() if key in _FIELDS})
+
+    def with_profile(self, profile_name, profile_url):
+        """Return a copy of the record tagged with its profile."""
+        record = VideoRecord.from_dict(self)
+        record.profile_name = _intern(profile_name)
+        record.profile_url = _intern(profile_url)
+        return record
+
+    def to_dict(self):
+        return dict(self)
+
+    def __getitem__(self, key):
+        if key in _FIELDS:
+            value = getattr(self, key)
+            if value is not None or key not in PROFILE_FIELDS:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from RECORD_FIELDS
+        for key in PROFILE_FIELDS:
+            if getattr(self, key) is not None:
+                yield key
+
+    def __len__(self):
+        return len(RECORD_FIELDS) + sum(getattr(self, key) is not None for key in PROFILE_FIELDS)
+
+    def __repr__(self):
+        return f"VideoRecord({self.to_dict()!r})"
+
+class RecordBatch:
+    """
+    Column-wise storage for many video records.
+
+    Counts live in ``array('q')`` columns and every row refers to its profile
+    by index into a shared table of interned (name, url) pairs. Iterating or
+    indexing yields VideoRecord objects, so a batch can stand in for a list
+    of records.
+    """
+
+    __slots__ = ('video_urls', 'scraped_at', 'counts', 'raw', 'profile_ids', 'profiles', '_profile_index')
+
+    def __init__(self, records=()):
+        self.video_urls = []
+        self.scraped_at = []
+        self.counts = {metric: array('q') for metric in METRIC_NAMES}
+        self.raw = {field: [] for field in RAW_FIELDS}
+        self.profile_ids = array('i')
+        self.profiles = []
+        self._profile_index = {}
+        self.extend(records)
+
+    def _profile_id(self, profile_name, profile_url):
+        if profile_name is None and profile_url is None:
+            return -1
+        key = (profile_name, profile_url)
+        profile_id = self._profile_index.get(key)
+        if profile_id is None:
+            profile_id = self._profile_index[key] = len(self.profiles)
+            self.profiles.append((_intern(profile_name), _intern(profile_url)))
+        return profile_id
+
+    def append(self, record, profile_name=None, profile_url=None):
+        """
+        Add a record.
+
+        Args:
+            record (Mapping): VideoRecord or video data dictionary
+            profile_name (str): Profile to file it under, defaults to the record's own
+            profile_url (str): Profile URL, defaults to the record's own
+        """
+        if profile_name is None:
+            profile_name = record.get('profile_name')
+        if profile_url is None:
+            profile_url = record.get('profile_url')
+        self.video_urls.append(record.get('video_url'))
+        for metric in METRIC_NAMES:
+            self.counts[metric].append(int(record.get(metric) or 0))
+        for field in RAW_FIELDS:
+            self.raw[field].append(_intern(record.get(field)))
+        self.scraped_at.append(record.get('scraped_at'))
+        self.profile_ids.append(self._profile_id(profile_name, profile_url))
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self.video_urls)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        profile_id = self.profile_ids[i]
+        profile_name, profile_url = self.profiles[profile_id] if profile_id >= 0 else (None, None)
+        return VideoRecord(
+            self.video_urls[i],
+            *(self.counts[metric][i] for metric in METRIC_NAMES),
+            *(self.raw[field][i] for field in RAW_FIELDS),
+            scraped_at=self.scraped_at[i],
+            profile_name=profile_name,
+            profile_url=profile_url,
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def column(self, name):
+        """
+        Return one column.
+
+        Args:
+            name (str): Any field of RECORD_FIELDS or PROFILE_FIELDS
+
+        Returns:
+            array or list: An int64 array for counts, a list otherwise
+        """
+        if name in self.counts:
+            return self.counts[name]
+        if name in self.raw:
+            return self.raw[name]
+        if name == 'video_url':
+            return self.video_urls
+        if name == 'scraped_at':
+            return self.scraped_at
+        if name in PROFILE_FIELDS:
+            position = PROFILE_FIELDS.index(name)
+            return [self.profiles[profile_id][position] if profile_id >= 0 else None
+                    for profile_id in self.profile_ids]
+        raise KeyError(name)
+
+    def rows(self, fieldnames):
+        """
+        Yield each row as a tuple of the given columns, for csv.writer.
+
+        Args:
+            fieldnames (list): Column names
+
+        Yields:
+            tuple: One value per column
+        """
+        return zip(*(self.column(name) for name in fieldnames))
+
+    def to_dicts(self, fieldnames=RECORD_FIELDS + PROFILE_FIELDS):
+        """Return the rows as dictionaries of the given columns."""
+        return [dict(zip(fieldnames, row)) for row in self.rows(fieldnames)]
+
+    def totals(self):
+        """
+        Sum the counts over all rows.
+
+        Returns:
+            dict: Total videos, views, likes, bookmarks and comments
+        """
+        totals = {'videos': len(self)}
+        for metric in METRIC_NAMES:
+            totals[metric] = sum(self.counts[metric])
+        return totals
+
+    def totals_by_profile(self):
+        """
+        Sum the counts per profile.
+
+        Returns:
+            dict: Profile name ('unknown' for untagged rows) to totals as for totals()
+        """
+        by_id = {}
+        for i, profile_id in enumerate(self.profile_ids):
+            stats = by_id.get(profile_id)
+            if stats is None:
+                stats = by_id[profile_id] = {'videos': 0, **{metric: 0 for metric in METRIC_NAMES}}
+            stats['videos'] += 1
+            for metric in METRIC_NAMES:
+                stats[metric] += self.counts[metric][i]
+
+        totals = {}
+        for profile_id, stats in by_id.items():
+            name = (self.profiles[profile_id][0] if profile_id >= 0 else None) or 'unknown'
+            if name in totals:
+                for key, value in stats.items():
+                    totals[name][key] += value
+            else:
+                totals[name] = stats
+        return totals
+
+class UpToDate(RecordBatch):
+    """
+    Result of an incremental scrape that found no new or stale videos.
+
+    It is empty like a failed scrape, but the profile was read successfully,
+    so callers count it as completed with 0 refreshed videos.
+    """
+
+    __slots__ = ()
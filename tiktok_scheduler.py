@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+TikTok Scrape Scheduler
+Non-interactive, job-file driven scraping for cron and long-running workers.
+
+A job file (YAML or JSON) lists the profiles to crawl with their priority and
+refresh interval, plus the output formats and concurrency. Each profile's
+next run is rescheduled from how fast its view counts moved since the last
+crawl: trending profiles come round sooner, quiet ones back off.
+
+Example job file:
+
+    workers: 2
+    format: [csv, sqlite]
+    separate_files: true
+    bulk: true
+    incremental: true
+    lean: true
+    refresh_hours: 6
+    metrics_prom: data/metrics/scheduler.prom
+    profiles:
+      - url: https://www.tiktok.com/@d4vdd
+        priority: 1
+        refresh_hours: 2
+      - https://www.tiktok.com/@username
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+
+import tiktok_scraper as scraper
+from tiktok_archive import PageArchive
+from tiktok_metrics import METRICS
+
+STATE_PATH = os.path.join('data', 'scheduler', 'state.json')
+DEFAULT_PRIORITY = 5  # Lower runs first among profiles that are due together
+DEFAULT_REFRESH_HOURS = 6.0  # Base interval between crawls of a profile
+MIN_REFRESH_HOURS = 0.5  # Shortest interval a fast-moving profile is rescheduled at
+MAX_REFRESH_HOURS = 72.0  # Longest interval a quiet profile backs off to
+TRENDING_RATE = 0.01  # View growth per hour (1%) at which a profile keeps its base interval
+IDLE_SLEEP_SECONDS = 60  # Longest sleep between checks for due profiles
+
+# Job options and their defaults; anything else in the job file is rejected
+JOB_DEFAULTS = {
+    'profiles': [],
+    'workers': scraper.DEFAULT_WORKERS,
+    'detail_workers': 0,
+    'stream': False,
+    'format': ['csv'],
+    'separate_files': True,
+    'batch_size': None,
+    'bulk': False,
+    'incremental': False,
+    'network': False,
+    'large_profile': False,
+    'memory_limit': scraper.MEMORY_LIMIT_MB,
+    'lean': False,
+    'jitter': list(scraper.POLITENESS_JITTER),
+    'rate': scraper.DEFAULT_RATE,
+    'burst': scraper.DEFAULT_BURST,
+    'stale_hours': scraper.INCREMENTAL_STALE_HOURS,
+    'priority': DEFAULT_PRIORITY,
+    'refresh_hours': DEFAULT_REFRESH_HOURS,
+    'min_refresh_hours': MIN_REFRESH_HOURS,
+    'max_refresh_hours': MAX_REFRESH_HOURS,
+    'trending_rate': TRENDING_RATE,
+    'state': STATE_PATH,
+    'archive': None,
+    'metrics_jsonl': None,
+    'metrics_prom': None,
+}
+
+def _require_yaml():
+    """
+    Import PyYAML, with an install hint if it is missing.
+
+    Returns:
+        module: The yaml module
+    """
+    try:
+        import yaml
+    except ImportError as e:
+        raise ImportError("YAML job files need PyYAML: pip install pyyaml (or use a .json job file)") from e
+    return yaml
+
+def load_job(path):
+    """
+    Load and validate a job file.
+
+    Profiles may be given as plain URLs or as mappings with 'url' and
+    optional 'priority' and 'refresh_hours', which default to the job-level
+    values.
+
+    Args:
+        path (str): Path to a .yaml/.yml or .json job file
+
+    Returns:
+        dict: Job options with every key of JOB_DEFAULTS filled in
+
+    Raises:
+        ValueError: If the job file is malformed
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            raw = _require_yaml().safe_load(f) or {}
+        else:
+            raw = json.load(f)
+
+    if not isinstance(raw, dict):
+        raise ValueError(f"{path}: job file must be a mapping")
+    unknown = set(raw) - set(JOB_DEFAULTS)
+    if unknown:
+        raise ValueError(f"{path}: unknown job option(s): {', '.join(sorted(unknown))}")
+
+    job = dict(JOB_DEFAULTS, **raw)
+    if isinstance(job['format'], str):
+        job['format'] = [job['format']]
+    bad_formats = [name for name in job['format'] if name not in scraper.SINKS]
+    if bad_formats:
+        raise ValueError(f"{path}: unknown format(s): {', '.join(bad_formats)}")
+    if job['detail_workers'] > 0 and (job['bulk'] or job['network']):
+        raise ValueError(f"{path}: bulk and network do not work with detail_workers (the pipeline opens every video page)")
+
+    profiles = []
+    for entry in job['profiles']:
+        if isinstance(entry, str):
+            entry = {'url': entry}
+        url = str(entry.get('url', '')).strip()
+        if not scraper.is_profile_url(url):
+            raise ValueError(f"{path}: not a TikTok profile URL: {url!r}")
+        profiles.append({
+            'url': url,
+            'priority': entry.get('priority', job['priority']),
+            'refresh_hours': float(entry.get('refresh_hours', job['refresh_hours'])),
+        })
+    if not profiles:
+        raise ValueError(f"{path}: no profiles listed")
+    job['profiles'] = profiles
+    return job
+
+class ScheduleState:
+    """
+    Per-profile schedule persisted between scheduler runs.
+
+    For every profile URL it keeps the last and next run times, the last
+    measured view growth rate and the latest view count of each video, which
+    the next crawl's counts are compared against.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.profiles = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.profiles = json.load(f).get('profiles', {})
+
+    def entry(self, url):
+        return self.profiles.setdefault(url, {'next_run': None, 'last_run': None, 'rate': None, 'views': {}})
+
+    def is_due(self, url, now):
+        next_run = self.entry(url)['next_run']
+        return next_run is None or datetime.fromisoformat(next_run) <= now
+
+    def next_run(self, url):
+        next_run = self.entry(url)['next_run']
+        return datetime.fromisoformat(next_run) if next_run else datetime.min
+
+    def record_run(self, url, video_data, now):
+        """
+        Store a finished crawl and measure how fast the profile's views moved.
+
+        The rate is the view gain of videos seen on both crawls relative to
+        their earlier total, per hour since the earlier crawl. Videos that
+        were not re-scraped (incremental mode) are left out of the
+        comparison. An up-to-date crawl that re-scraped nothing keeps the
+        previous rate.
+
+        Args:
+            url (str): Profile URL
+            video_data (list): Records returned by the crawl
+            now (datetime): Time the crawl finished
+
+        Returns:
+            float: Views gained per hour as a fraction, or None on a first crawl
+        """
+        entry = self.entry(url)
+        previous = entry['views']
+        current = {}
+        for record in video_data:
+            video_id = scraper.extract_video_id(record['video_url'])
+            if video_id:
+                current[video_id] = record['views']
+        if not current and entry['last_run']:
+            # Nothing was re-scraped, so there is nothing new to compare
+            return entry['rate']
+
+        before = after = 0
+        for video_id, views in current.items():
+            if video_id in previous:
+                before += previous[video_id]
+                after += views
+
+        rate = None
+        if entry['last_run'] and before:
+            hours = (now - datetime.fromisoformat(entry['last_run'])).total_seconds() / 3600
+            if hours > 0:
+                rate = max(0.0, (after - before) / before / hours)
+
+        previous.update(current)
+        entry['last_run'] = now.isoformat()
+        entry['rate'] = rate
+        return rate
+
+    def reschedule(self, url, next_run):
+        self.entry(url)['next_run'] = next_run.isoformat()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'profiles': self.profiles}, f)
+        os.replace(tmp_path, self.path)
+
+def refresh_interval(profile, rate, job):
+    """
+    Hours until a profile is crawled again.
+
+    A profile growing at the job's trending_rate keeps its base refresh
+    interval; faster growth shortens it proportionally and slower growth
+    lengthens it, clamped to [min_refresh_hours, max_refresh_hours].
+
+    Args:
+        profile (dict): Profile entry from the job
+        rate (float): Last measured growth rate, or None if unknown
+        job (dict): Job options
+
+    Returns:
+        float: Refresh interval in hours
+    """
+    hours = profile['refresh_hours']
+    if rate is not None:
+        hours *= job['trending_rate'] / max(rate, 1e-9)
+    return min(max(hours, job['min_refresh_hours']), job['max_refresh_hours'])
+
+def due_profiles(job, state, now):
+    """
+    Profiles due for a crawl, highest priority and fastest growing first.
+
+    Args:
+        job (dict): Job options
+        state (ScheduleState): Persisted schedule
+        now (datetime): Current time
+
+    Returns:
+        list: Profile entries from the job
+    """
+    due = [profile for profile in job['profiles'] if state.is_due(profile['url'], now)]
+    return sorted(due, key=lambda p: (p['priority'], -(state.entry(p['url'])['rate'] or 0.0)))
+
+def configure_scraper(job):
+    """Apply the job's browser, politeness and rate limit options to the scraper module."""
+    config = scraper.ScrapeConfig(lean=job['lean'], network=job['network'], memory_limit_mb=job['memory_limit'],
+                                  jitter=job['jitter'], stale_hours=job['stale_hours']).apply()
+    config.rate_limiter.configure(rate=max(0.0, job['rate']), burst=max(1, job['burst']))
+
+def run_cycle(job, state, profiles):
+    """
+    Crawl a batch of due profiles and reschedule each of them.
+
+    Args:
+        job (dict): Job options
+        state (ScheduleState): Persisted schedule, saved after every profile
+        profiles (list): Profile entries to crawl, in priority order
+
+    Returns:
+        int: Number of profiles crawled successfully
+    """
+    urls = [profile['url'] for profile in profiles]
+    by_url = {profile['url']: profile for profile in profiles}
+    sink = scraper.create_sink(job['format'], job['separate_files'], job['batch_size'])
+    scrape_options = {'bulk': job['bulk'], 'incremental': job['incremental'], 'network': job['network'],
+                      'large': job['large_profile'], 'sink': sink}
+    if job['archive']:
+        scrape_options['archive'] = PageArchive(job['archive'])
+    succeeded = 0
+
+    try:
+        if job['detail_workers'] > 0:
+            # Two-stage pipeline: 'workers' discover, 'detail_workers' fetch video pages
+            pipeline_options = {key: value for key, value in scrape_options.items() if key not in ('bulk', 'network')}
+            results = scraper.scrape_profiles_pipeline(urls, job['workers'], job['detail_workers'],
+                                                       stream=job['stream'], **pipeline_options)
+        elif job['workers'] > 1 and len(urls) > 1:
+            results = scraper.scrape_profiles_parallel(urls, job['workers'], **scrape_options)
+        else:
+            results = scraper.scrape_profiles_sequential(urls, **scrape_options)
+
+        for _, url, video_data, error in results:
+            profile = by_url[url]
+            now = datetime.now()
+            if error is not None:
+                # Failed crawls are retried after the base interval
+                METRICS.inc('profiles_total', result='error')
+                print(f"❌ {url}: {error}")
+                rate = None
+            else:
+                sink.end_profile(url)
+                rate = state.record_run(url, video_data, now)
+                if isinstance(video_data, scraper.UpToDate):
+                    METRICS.inc('profiles_total', result='up_to_date')
+                    print(f"✅ {url}: up to date, 0 videos refreshed")
+                else:
+                    METRICS.inc('profiles_total', result='completed')
+                succeeded += 1
+
+            hours = refresh_interval(profile, rate, job)
+            state.reschedule(url, now + timedelta(hours=hours))
+            state.save()
+            rate_text = f"{rate * 100:.2f}%/h" if rate is not None else "n/a"
+            print(f"🗓️  {url}: view growth {rate_text}, next crawl in {hours:.1f}h")
+            METRICS.export(job['metrics_jsonl'], job['metrics_prom'], profile=url)
+    finally:
+        sink.close()
+    return succeeded
+
+def run_job(job, once=False):
+    """
+    Run the scheduler for a job.
+
+    Args:
+        job (dict): Job options from load_job()
+        once (bool): Crawl the profiles that are due now and return, for
+            cron; otherwise keep running and crawl profiles as they come due
+    """
+    configure_scraper(job)
+    state = ScheduleState(job['state'])
+
+    while True:
+        now = datetime.now()
+        due = due_profiles(job, state, now)
+        if due:
+            print(f"\n🚀 {len(due)} profile(s) due at {now:%Y-%m-%d %H:%M:%S}")
+            succeeded = run_cycle(job, state, due)
+            print(f"✅ Cycle finished: {succeeded}/{len(due)} profiles crawled")
+        elif once:
+            print("ℹ️  No profiles due")
+        if once:
+            return
+
+        next_due = min(state.next_run(profile['url']) for profile in job['profiles'])
+        wait = (next_due - datetime.now()).total_seconds()
+        if wait > 0:
+            print(f"💤 Next profile due at {next_due:%Y-%m-%d %H:%M:%S}")
+            time.sleep(min(wait, IDLE_SLEEP_SECONDS))
+
+def main(argv=None):
+    """
+    Command line interface for running scrape jobs.
+
+    Args:
+        argv (list): Optional argument list, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(description="Run scheduled, non-interactive TikTok scrapes from a job file.")
+    parser.add_argument("job", help="Job file (.yaml, .yml or .json)")
+    parser.add_argument("--once", action="store_true",
+                        help="Crawl the profiles that are due now and exit (for cron)")
+    args = parser.parse_args(argv)
+
+    try:
+        job = load_job(args.job)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    print(f"📋 Job {args.job}: {len(job['profiles'])} profile(s), {job['workers']} worker(s), "
+          f"output {', '.join(job['format'])}")
+    try:
+        run_job(job, once=args.once)
+    except KeyboardInterrupt:
+        print("\n👋 Scheduler stopped - the schedule is saved in", job['state'])
+
+if __name__ == "__main__":
+    main()
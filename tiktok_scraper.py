@@ -7,11 +7,20 @@ A TikTok scraper that extracts video metrics and saves to CSV.
 import re
 import sys
 import csv
+import json
+import base64
 import time
+import queue
 import random
+import shutil
+import argparse
+import weakref
+import threading
+import subprocess
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
@@ -20,8 +29,256 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException,
 from webdriver_manager.chrome import ChromeDriverManager
 import os
 
+from tiktok_counts import parse_count_strict
+from tiktok_records import VideoRecord, RecordBatch, UpToDate
+from tiktok_metrics import METRICS
+from tiktok_throttle import RATE_LIMITER, DEFAULT_RATE, DEFAULT_BURST
+
 # Configuration
 MAX_VIDEOS_TO_SCRAPE = None  # Set to None for all videos, or a number like 50 to limit
+DEFAULT_WORKERS = 1  # Number of parallel browser sessions used by main()
+DEFAULT_DETAIL_WORKERS = 2  # Browser sessions opening video pages in pipeline mode
+VIDEO_QUEUE_SIZE = 500  # Video jobs buffered between the pipeline's discovery and detail stages
+POLITENESS_JITTER = (1.0, 2.0)  # Minimum random delay (seconds) kept before each browser action
+WAIT_TIMEOUT = 10  # Maximum seconds to wait for a page or element to appear
+SCROLL_WAIT_TIMEOUT = 6  # Maximum seconds to wait for new tiles after a scroll
+WAIT_POLL_INTERVAL = 0.25  # Seconds between checks while waiting
+DRIVER_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'tiktok-scraper', 'chromedriver.json')
+LEAN_BROWSER = False  # Headless, media/image/font-blocking sessions (see create_driver)
+LEAN_CACHE_BYTES = 32 * 1024 * 1024  # Disk and media cache cap for lean sessions
+NETWORK_CAPTURE = False  # Record performance logs so item-list API responses can be read (see NetworkCapture)
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Chrome switches for lean sessions: headless, no media autoplay, no images, capped caches
+LEAN_CHROME_ARGS = [
+    "--headless=new",
+    "--window-size=1280,2000",
+    "--disable-gpu",
+    "--mute-audio",
+    "--autoplay-policy=user-gesture-required",
+    "--blink-settings=imagesEnabled=false",
+    f"--disk-cache-size={LEAN_CACHE_BYTES}",
+    f"--media-cache-size={LEAN_CACHE_BYTES}",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--renderer-process-limit=2",
+]
+
+# Requests blocked in lean mode: images, video/audio streams and web fonts
+LEAN_BLOCKED_URLS = [
+    '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.heic', '*.svg', '*.ico',
+    '*.mp4', '*.webm', '*.m4s', '*.m3u8', '*.mp3', '*.m4a', '*.aac',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*/video/tos/*', '*mime_type=video*',
+]
+INDEX_DIR = os.path.join('data', 'index')  # Per-profile video indexes used by incremental mode
+INCREMENTAL_KNOWN_RUN = 12  # Stop scrolling once this many consecutive known videos are loaded
+INCREMENTAL_STALE_HOURS = 6.0  # Known videos scraped longer ago than this are re-fetched
+CHECKPOINT_PATH = os.path.join('data', 'checkpoints', 'journal.jsonl')  # Run journal used by --resume
+ARCHIVE_DIR = os.path.join('data', 'archive')  # Raw page archive used by --archive (see tiktok_archive.py)
+SINK_BATCH_SIZE = 50  # Records buffered by an output sink before they are flushed to disk
+SELECTOR_PROMOTE_AFTER = 3  # Consecutive fallback hits before a fallback selector is tried first
+MEMORY_LIMIT_MB = 3072  # Browser memory (RSS, or JS heap without psutil) at which MemoryWatchdog steps in
+MEMORY_CHECK_EVERY = 10  # Scrolls or videos between MemoryWatchdog samples
+
+# Output columns for per-profile and combined files
+CSV_FIELDNAMES = ['video_url', 'views', 'likes', 'bookmarks', 'comments',
+                  'views_raw', 'likes_raw', 'bookmarks_raw', 'comments_raw', 'scraped_at']
+COMBINED_CSV_FIELDNAMES = ['profile_name', 'profile_url'] + CSV_FIELDNAMES
+
+# Selectors for each metric, in the order they are tried
+METRIC_SELECTORS = {
+    'views': ['strong[data-e2e="video-views"]', 'strong.video-count'],
+    'likes': ['strong[data-e2e="browse-like-count"]', 'strong[data-e2e*="like"]'],
+    # TikTok uses "undefined-count" for bookmarks/saves - this is their internal naming!
+    'bookmarks': ['strong[data-e2e="undefined-count"]', 'strong[data-e2e*="bookmark"]',
+                  'strong[data-e2e*="collect"]', 'strong[data-e2e*="save"]'],
+    'comments': ['strong[data-e2e="browse-comment-count"]', 'strong[data-e2e*="comment"]'],
+}
+
+# Selectors for the profile grid's video tiles, in the order they are tried
+CONTAINER_SELECTORS = ['a[href*="/video/"]', 'a.css-1mdo0pl-AVideoContainer', '[data-e2e="user-post-item"]']
+
+# Initial selector order per page type and metric; SelectorRegistry reorders it per session
+SELECTOR_STRATEGIES = {
+    'tile': {'views': METRIC_SELECTORS['views']},
+    'video': METRIC_SELECTORS,
+    'grid': {'container': CONTAINER_SELECTORS},
+}
+
+# Element ids of the JSON state blobs TikTok embeds in its pages
+PAGE_STATE_SCRIPT_IDS = ['__UNIVERSAL_DATA_FOR_REHYDRATION__', 'SIGI_STATE', '__NEXT_DATA__']
+
+# API paths whose JSON responses page in a profile's videos, each item with its stats
+ITEM_LIST_API_PATHS = ['/api/post/item_list/', '/api/creator/item_list/']
+
+# Mapping from TikTok's item "stats" keys to our metric names
+STATE_STAT_KEYS = {
+    'views': 'playCount',
+    'likes': 'diggCount',
+    'bookmarks': 'collectCount',
+    'comments': 'commentCount',
+}
+
+# Collects every visible video tile and the embedded page state in a single round-trip
+HARVEST_TILES_SCRIPT = """
+const viewSelectors = arguments[0];
+const stateIds = arguments[1];
+const seen = new Set();
+const tiles = [];
+document.querySelectorAll('a[href*="/video/"]').forEach(a => {
+    const href = a.href;
+    if (!href || seen.has(href)) return;
+    seen.add(href);
+    let views = null;
+    let matched = null;
+    for (const sel of viewSelectors) {
+        const el = a.querySelector(sel);
+        if (el && el.textContent.trim()) { views = el.textContent.trim(); matched = sel; break; }
+    }
+    tiles.push({href: href, views: views, selector: matched});
+});
+let state = null;
+for (const id of stateIds) {
+    const el = document.getElementById(id);
+    if (el && el.textContent) { state = el.textContent; break; }
+}
+return {tiles: tiles, state: state};
+"""
+
+# Reads every metric on a video page (first matching selector wins) in a single round-trip
+VIDEO_METRICS_SCRIPT = """
+const selectors = arguments[0];
+const stateIds = arguments[1];
+const result = {matched: {}};
+for (const [metric, sels] of Object.entries(selectors)) {
+    result[metric] = null;
+    result.matched[metric] = null;
+    for (const sel of sels) {
+        const el = document.querySelector(sel);
+        if (el && el.textContent.trim()) {
+            result[metric] = el.textContent.trim();
+            result.matched[metric] = sel;
+            break;
+        }
+    }
+}
+result.state = null;
+for (const id of stateIds) {
+    const el = document.getElementById(id);
+    if (el && el.textContent) { result.state = el.textContent; break; }
+}
+return result;
+"""
+
+# Indexes the profile grid with the first container selector that matches anything.
+# Returns [tiles, selector]; each tile is {href, views, selector} in page order.
+INDEX_TILES_SCRIPT = """
+const containerSelectors = arguments[0];
+const viewSelectors = arguments[1];
+for (const sel of containerSelectors) {
+    const found = document.querySelectorAll(sel);
+    if (!found.length) continue;
+    const tiles = [];
+    found.forEach(el => {
+        const link = el.matches('a[href*="/video/"]') ? el : el.querySelector('a[href*="/video/"]');
+        if (!link || !link.href) return;
+        let views = null;
+        let matched = null;
+        for (const viewSel of viewSelectors) {
+            const viewEl = el.querySelector(viewSel);
+            if (viewEl && viewEl.textContent.trim()) { views = viewEl.textContent.trim(); matched = viewSel; break; }
+        }
+        tiles.push({href: link.href, views: views, selector: matched});
+    });
+    return [tiles, sel];
+}
+return [[], null];
+"""
+
+# Installs an in-page buffer that a MutationObserver fills with every video link the
+# grid renders, starting with the links already on the page. Does nothing if installed.
+TILE_STREAM_INSTALL_SCRIPT = """
+if (window.__tileStream) return false;
+const stream = window.__tileStream = {seen: new Set(), buffer: []};
+const add = link => {
+    if (!link.href || stream.seen.has(link.href)) return;
+    stream.seen.add(link.href);
+    stream.buffer.push(link);
+};
+const scan = node => {
+    if (node.matches('a[href*="/video/"]')) add(node);
+    node.querySelectorAll('a[href*="/video/"]').forEach(add);
+};
+scan(document.documentElement);
+new MutationObserver(mutations => {
+    for (const mutation of mutations) {
+        mutation.addedNodes.forEach(node => { if (node.nodeType === 1) scan(node); });
+    }
+}).observe(document.body, {childList: true, subtree: true});
+return true;
+"""
+
+# Empties the tile buffer, reading each tile's views now that it has had time to render.
+# Tiles without a view count yet stay buffered until the final drain (arguments[1]).
+# With arguments[2], drained tiles are collapsed: their media is released and they are
+# skipped by layout and paint, keeping their height so infinite scroll still triggers.
+# Returns null when the buffer is gone, i.e. the page was reloaded.
+TILE_STREAM_DRAIN_SCRIPT = """
+const stream = window.__tileStream;
+if (!stream) return null;
+const viewSelectors = arguments[0];
+const final = arguments[1];
+const prune = arguments[2];
+const ready = [];
+const drained = [];
+const waiting = [];
+for (const link of stream.buffer) {
+    const tile = link.closest('[data-e2e="user-post-item"]') || link;
+    let views = null;
+    let matched = null;
+    for (const sel of viewSelectors) {
+        const el = tile.querySelector(sel);
+        if (el && el.textContent.trim()) { views = el.textContent.trim(); matched = sel; break; }
+    }
+    if (views || final || !link.isConnected) {
+        ready.push({href: link.href, views: views, selector: matched});
+        drained.push(tile);
+    } else {
+        waiting.push(link);
+    }
+}
+stream.buffer = waiting;
+if (prune) {
+    // Read every height before writing any style, so layout runs once
+    const heights = drained.map(tile => tile.offsetHeight);
+    drained.forEach((tile, i) => {
+        tile.querySelectorAll('img, video, source').forEach(el => {
+            el.removeAttribute('srcset');
+            el.removeAttribute('src');
+        });
+        tile.style.contentVisibility = 'hidden';
+        tile.style.containIntrinsicSize = `auto ${heights[i]}px`;
+    });
+}
+return ready;
+"""
+
+# Text TikTok shows on captcha, rate-limit and error pages (matched lowercased)
+BLOCK_PAGE_PHRASES = ['verify to continue', 'too many attempts', 'too many requests',
+                      'access denied', 'something went wrong']
+
+# Returns why the open page looks like a block page ('captcha' or the phrase found), or null
+BLOCK_PAGE_SCRIPT = """
+if (document.querySelector('#captcha-verify-container, .captcha_verify_container, [class*="captcha-verify"], [id*="captcha"]')) {
+    return 'captcha';
+}
+const text = ((document.body && document.body.innerText) || '').slice(0, 5000).toLowerCase();
+for (const phrase of arguments[0]) {
+    if (text.includes(phrase)) return phrase;
+}
+return null;
+"""
 
 def random_delay(min_seconds=1.0, max_seconds=3.0):
     """
@@ -35,6 +292,430 @@ def random_delay(min_seconds=1.0, max_seconds=3.0):
     time.sleep(delay)
     return delay
 
+class ScrapeConfig:
+    """
+    Run-wide options chosen on the command line or in a scheduler job.
+    
+    apply() sets the module constants the Selenium engines read. Engines in
+    other modules (tiktok_async) take the object itself, so they see the same
+    options even when this file runs as a script and is not the module they
+    imported.
+    """
+    
+    def __init__(self, lean=None, network=None, memory_limit_mb=None, jitter=None, stale_hours=None,
+                 rate_limiter=None):
+        self.lean = LEAN_BROWSER if lean is None else lean
+        self.network = NETWORK_CAPTURE if network is None else network
+        self.memory_limit_mb = MEMORY_LIMIT_MB if memory_limit_mb is None else max(1, memory_limit_mb)
+        self.jitter = POLITENESS_JITTER if jitter is None else tuple(sorted(jitter))
+        self.stale_hours = INCREMENTAL_STALE_HOURS if stale_hours is None else stale_hours
+        self.rate_limiter = rate_limiter or RATE_LIMITER
+    
+    def apply(self):
+        """
+        Make these options the module defaults.
+        
+        Returns:
+            ScrapeConfig: self, for chaining
+        """
+        global LEAN_BROWSER, NETWORK_CAPTURE, MEMORY_LIMIT_MB, POLITENESS_JITTER, INCREMENTAL_STALE_HOURS
+        LEAN_BROWSER = self.lean
+        NETWORK_CAPTURE = self.network
+        MEMORY_LIMIT_MB = self.memory_limit_mb
+        POLITENESS_JITTER = self.jitter
+        INCREMENTAL_STALE_HOURS = self.stale_hours
+        return self
+
+class AdaptiveWaiter:
+    """
+    Waits for observable page changes instead of sleeping for a fixed time.
+    
+    Every wait returns as soon as its condition holds, but never earlier than
+    a random politeness jitter drawn from ``jitter``, so the jitter acts as a
+    floor rather than being added on top. How long each wait actually took is
+    recorded per label.
+    """
+    
+    def __init__(self, driver, jitter=None, timeout=None, poll_interval=None):
+        self.driver = driver
+        self.jitter = jitter if jitter is not None else POLITENESS_JITTER
+        self.timeout = timeout if timeout is not None else WAIT_TIMEOUT
+        self.poll_interval = poll_interval if poll_interval is not None else WAIT_POLL_INTERVAL
+        self.timings = defaultdict(list)
+        self.timeouts = defaultdict(int)
+    
+    def until(self, label, condition, timeout=None):
+        """
+        Wait until ``condition(driver)`` returns a truthy value.
+        
+        Args:
+            label (str): Name the timing is recorded under
+            condition (callable): Called with the driver on every poll
+            timeout (float): Optional override of the default timeout
+            
+        Returns:
+            The condition's truthy result, or False if it timed out
+        """
+        start = time.monotonic()
+        floor = random.uniform(*self.jitter)
+        
+        try:
+            result = WebDriverWait(self.driver, timeout or self.timeout, poll_frequency=self.poll_interval,
+                                   ignored_exceptions=(NoSuchElementException, WebDriverException)).until(condition)
+        except TimeoutException:
+            result = False
+            self.timeouts[label] += 1
+            METRICS.inc('wait_timeouts_total', label=label)
+        
+        remaining = floor - (time.monotonic() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+        
+        elapsed = time.monotonic() - start
+        self.timings[label].append(elapsed)
+        METRICS.observe('wait_seconds', elapsed, label=label)
+        return result
+    
+    def pause(self, label):
+        """
+        Sleep for the politeness jitter only.
+        
+        Args:
+            label (str): Name the timing is recorded under
+            
+        Returns:
+            float: Seconds slept
+        """
+        delay = random_delay(*self.jitter)
+        self.timings[label].append(delay)
+        METRICS.observe('wait_seconds', delay, label=label)
+        return delay
+    
+    def last(self, label):
+        """Return the duration of the most recent wait recorded under ``label``."""
+        return self.timings[label][-1] if self.timings[label] else 0.0
+    
+    def summary(self):
+        """
+        Summarise recorded waits.
+        
+        Returns:
+            dict: Per label count, total, mean and max seconds plus timeout count
+        """
+        return {
+            label: {
+                'count': len(values),
+                'total': sum(values),
+                'mean': sum(values) / len(values),
+                'max': max(values),
+                'timeouts': self.timeouts[label],
+            }
+            for label, values in self.timings.items() if values
+        }
+    
+    def print_summary(self):
+        """Print the recorded wait timings."""
+        summary = self.summary()
+        if not summary:
+            return
+        print("⏱️  Wait summary:")
+        for label, stats in summary.items():
+            print(f"   {label}: {stats['count']}x, avg {stats['mean']:.1f}s, max {stats['max']:.1f}s, "
+                  f"total {stats['total']:.1f}s, timeouts {stats['timeouts']}")
+
+class PhaseClock:
+    """
+    Accumulates wall-clock seconds per scrape phase.
+    
+    ``mark(name)`` ends the running phase and starts the next, so phase
+    boundaries can be dropped into long code paths without restructuring
+    them. Durations add up in the ``phases`` dict, which the caller may share
+    across profiles, and are recorded as ``phase_seconds`` metrics.
+    """
+    
+    def __init__(self, phases=None):
+        self.phases = phases if phases is not None else {}
+        self._current = None
+        self._started = None
+    
+    def mark(self, name):
+        """
+        End the running phase and start ``name`` (None just stops).
+        
+        Args:
+            name (str): Phase to start
+        """
+        now = time.monotonic()
+        if self._current is not None:
+            self.phases[self._current] = self.phases.get(self._current, 0.0) + now - self._started
+            METRICS.observe('phase_seconds', now - self._started, phase=self._current)
+        self._current, self._started = name, now
+    
+    def stop(self):
+        """End the running phase."""
+        self.mark(None)
+
+# Returns the de-duplicated hrefs of all loaded video tiles, in page order
+TILE_HREFS_SCRIPT = """
+const seen = new Set();
+const hrefs = [];
+document.querySelectorAll('a[href*="/video/"]').forEach(a => {
+    if (a.href && !seen.has(a.href)) { seen.add(a.href); hrefs.push(a.href); }
+});
+return hrefs;
+"""
+
+# Returns [scrollHeight, number of video tiles] in a single round-trip. While a tile
+# stream is installed its counter is used instead of querying the whole grid.
+PAGE_SIZE_SCRIPT = """
+if (window.__tileStream) return [document.body.scrollHeight, window.__tileStream.seen.size];
+let count = document.querySelectorAll('a[href*="/video/"]').length;
+if (count === 0) count = document.querySelectorAll('[data-e2e="user-post-item"]').length;
+return [document.body.scrollHeight, count];
+"""
+
+def get_page_size(driver):
+    """
+    Read the page height and loaded tile count.
+    
+    Args:
+        driver: Selenium WebDriver instance
+        
+    Returns:
+        tuple: (scroll_height, tile_count)
+    """
+    height, count = driver.execute_script(PAGE_SIZE_SCRIPT)
+    return height, count
+
+def page_grew(last_height, last_count):
+    """
+    Wait condition: the page got taller or gained video tiles.
+    
+    Args:
+        last_height (int): scrollHeight before the scroll
+        last_count (int): Tile count before the scroll
+        
+    Returns:
+        callable: Condition for AdaptiveWaiter.until
+    """
+    def condition(driver):
+        height, count = get_page_size(driver)
+        return height != last_height or count > last_count
+    return condition
+
+def tiles_present(driver):
+    """Wait condition: at least one video tile is rendered."""
+    return get_page_size(driver)[1] > 0
+
+def video_metrics_present(driver, registry=None):
+    """Wait condition: a video page has rendered its like or comment count."""
+    registry = registry or selector_registry(driver)
+    return driver.execute_script(
+        "return !!document.querySelector(arguments[0]);",
+        ', '.join(registry.ordered('video', 'likes')[:1] + registry.ordered('video', 'comments')[:1]),
+    )
+
+class SelectorRegistry:
+    """
+    Learns which fallback selector works, per page type and metric.
+    
+    Every lookup tries the selectors in the registry's order and reports the
+    one that matched. When a fallback keeps matching while the leading
+    selector misses (TikTok changed its markup), the fallback is moved to the
+    front after SELECTOR_PROMOTE_AFTER consecutive lookups, so later lookups
+    hit on the first try. Each browser session has its own registry (see
+    selector_registry()).
+    """
+    
+    def __init__(self, strategies=None):
+        strategies = strategies or SELECTOR_STRATEGIES
+        self._order = {page: {key: list(selectors) for key, selectors in by_key.items()}
+                       for page, by_key in strategies.items()}
+        self._streaks = defaultdict(int)
+    
+    def ordered(self, page, key):
+        """
+        Return the selectors for a metric in the order they should be tried.
+        
+        Args:
+            page (str): Page type ('tile', 'video' or 'grid')
+            key (str): Metric name ('container' for the grid)
+        """
+        return self._order[page][key]
+    
+    def ordered_map(self, page):
+        """Return ordered() for every metric of a page type, for the in-page lookup scripts."""
+        return self._order[page]
+    
+    def record(self, page, key, matched, count=1):
+        """
+        Record the outcome of ``count`` lookups and adapt the order.
+        
+        Args:
+            page (str): Page type
+            key (str): Metric name
+            matched (str): Selector that matched, or None if all missed
+            count (int): Number of lookups with this outcome
+        """
+        selectors = self._order[page][key]
+        for selector in selectors:
+            METRICS.inc('selector_lookups_total', count, page=page, metric=key, selector=selector,
+                        result='hit' if selector == matched else 'miss')
+            if selector == matched:
+                break
+        
+        streak_key = (page, key, matched)
+        if matched is None:
+            return
+        if matched == selectors[0]:
+            for other in selectors[1:]:
+                self._streaks.pop((page, key, other), None)
+            return
+        
+        self._streaks[streak_key] += count
+        if self._streaks[streak_key] >= SELECTOR_PROMOTE_AFTER:
+            selectors.remove(matched)
+            selectors.insert(0, matched)
+            self._streaks.pop(streak_key)
+            METRICS.inc('selector_promotions_total', page=page, metric=key, selector=matched)
+            print(f"   🔀 Selector for {key} ({page} page) now tried first: {matched}")
+    
+    def record_results(self, page, matched):
+        """Record a lookup script's ``matched`` dict (metric to selector or None)."""
+        for key, selector in (matched or {}).items():
+            self.record(page, key, selector)
+    
+    def record_tiles(self, tiles):
+        """Record the view selector of every harvested profile tile."""
+        outcomes = defaultdict(int)
+        for tile in tiles:
+            outcomes[tile.get('selector')] += 1
+        for matched, count in outcomes.items():
+            self.record('tile', 'views', matched, count)
+
+_session_registries = weakref.WeakKeyDictionary()
+_session_registries_lock = threading.Lock()
+
+def selector_registry(driver):
+    """
+    Return the SelectorRegistry of a browser session, creating it on first use.
+    
+    Args:
+        driver: Selenium WebDriver instance
+        
+    Returns:
+        SelectorRegistry: The session's registry
+    """
+    with _session_registries_lock:
+        registry = _session_registries.get(driver)
+        if registry is None:
+            registry = _session_registries[driver] = SelectorRegistry()
+        return registry
+
+def index_profile_videos(driver, registry=None):
+    """
+    Build an ordered index of the loaded profile grid by video ID.
+    
+    Every tile's link and view count are read in one script call, trying the
+    container selectors in the session registry's order. Tiles are keyed by
+    the ID in their /video/<id> link, so a video that appears twice (pinned
+    videos, re-rendered tiles) is only scraped once.
+    
+    Args:
+        driver: Selenium WebDriver positioned on a profile page
+        registry (SelectorRegistry): Optional registry, defaults to the session's
+        
+    Returns:
+        tuple: (videos, selector, duplicates) where videos is a list of
+            (video_id, video_url, raw_views) in grid order, selector is the
+            container selector that matched and duplicates counts dropped tiles
+    """
+    registry = registry or selector_registry(driver)
+    tiles, selector = driver.execute_script(
+        INDEX_TILES_SCRIPT, registry.ordered('grid', 'container'), registry.ordered('tile', 'views'))
+    registry.record('grid', 'container', selector)
+    registry.record_tiles(tiles or [])
+    
+    videos = []
+    seen = set()
+    duplicates = 0
+    for tile in tiles or []:
+        video_id = extract_video_id(tile.get('href'))
+        if not video_id:
+            continue
+        if video_id in seen:
+            duplicates += 1
+            continue
+        seen.add(video_id)
+        videos.append((video_id, tile['href'], tile.get('views')))
+    return videos, selector, duplicates
+
+class TileStream:
+    """
+    Streams video tiles out of a profile grid while it is being scrolled.
+    
+    start() installs an in-page MutationObserver that buffers every video
+    link the grid renders; drain() empties that buffer on each scroll
+    iteration and hands the new videos to ``on_videos``. Each video comes out
+    once, in render order, so it can be queued for extraction while the
+    scroll continues instead of after it. While installed, it also keeps the
+    tile count get_page_size() reads.
+    
+    With ``prune``, drained tiles are collapsed in the page (media released,
+    skipped by layout and paint), so a grid of thousands of videos costs
+    about as much per scroll as a grid of a few dozen.
+    """
+    
+    def __init__(self, driver, on_videos=None, registry=None, prune=False):
+        self.driver = driver
+        self.on_videos = on_videos
+        self.registry = registry or selector_registry(driver)
+        self.prune = prune
+        self.seen = set()
+        self.videos = []
+        self.duplicates = 0
+    
+    def start(self):
+        """Install the in-page buffer on the current page."""
+        self.driver.execute_script(TILE_STREAM_INSTALL_SCRIPT)
+    
+    def drain(self, final=False):
+        """
+        Hand every tile rendered since the last drain to ``on_videos``.
+        
+        Args:
+            final (bool): Also release tiles whose view count has not rendered
+            
+        Returns:
+            int: Number of new videos
+        """
+        tiles = self.driver.execute_script(TILE_STREAM_DRAIN_SCRIPT, self.registry.ordered('tile', 'views'), final,
+                                           self.prune)
+        if tiles is None:
+            # The page was reloaded; reinstalling rescans it and seen drops the repeats
+            self.start()
+            return 0
+        self.registry.record_tiles(tiles)
+        
+        videos = []
+        for tile in tiles:
+            video_id = extract_video_id(tile.get('href'))
+            if not video_id:
+                continue
+            if video_id in self.seen:
+                self.duplicates += 1
+                continue
+            self.seen.add(video_id)
+            videos.append((video_id, tile['href'], tile.get('views')))
+        self.videos.extend(videos)
+        if videos and self.on_videos is not None:
+            self.on_videos(videos)
+        return len(videos)
+    
+    def video_ids(self):
+        """Return the IDs of every streamed video, in render order."""
+        return [video_id for video_id, _, _ in self.videos]
+
 def validate_tiktok_url(url):
     """
     Validate if the provided URL is a valid TikTok URL.
@@ -55,6 +736,18 @@ def validate_tiktok_url(url):
     
     return any(re.match(pattern, url.strip()) for pattern in tiktok_patterns)
 
+def is_profile_url(url):
+    """
+    Check that a URL is a valid TikTok profile URL (not an individual video).
+    
+    Args:
+        url (str): The URL to check
+        
+    Returns:
+        bool: True if it is a profile URL
+    """
+    return validate_tiktok_url(url) and '/@' in url and '/video/' not in url
+
 def get_tiktok_urls():
     """
     Get multiple TikTok URLs from user input with validation.
@@ -135,383 +828,1819 @@ def parse_count(count_str):
         count_str (str): Count string from TikTok
         
     Returns:
-        int: Parsed count as integer
+        int: Parsed count as integer, 0 if the text is not a count
+            (see tiktok_counts.parse_count_strict to tell the two apart)
     """
-    if not count_str:
-        return 0
+    return parse_count_strict(count_str) or 0
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+def get_chrome_version():
+    """
+    Detect the installed Chrome version.
     
-    count_str = count_str.strip().upper()
+    Returns:
+        str: Version string such as "120.0.6099.109", or None if unknown
+    """
+    try:
+        from webdriver_manager.core.os_manager import OperationSystemManager, ChromeType
+        return OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+    except Exception:
+        return None
+
+def get_driver_version(driver_path):
+    """
+    Read the version of a ChromeDriver binary.
     
-    # Remove any non-numeric characters except K, M, B and decimal points
-    import re
-    clean_str = re.sub(r'[^0-9KMB.]', '', count_str)
+    Args:
+        driver_path (str): Path to the ChromeDriver executable
+        
+    Returns:
+        str: Version string, or None if it could not be run
+    """
+    try:
+        output = subprocess.run([driver_path, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'(\d+\.\d+\.\d+\.\d+)', output)
+    return match.group(1) if match else None
+
+def _major(version):
+    return version.split('.')[0] if version else None
+
+def load_driver_cache():
+    """
+    Read the cached ChromeDriver location and version stamp.
     
-    if 'K' in clean_str:
-        return int(float(clean_str.replace('K', '')) * 1000)
-    elif 'M' in clean_str:
-        return int(float(clean_str.replace('M', '')) * 1000000)
-    elif 'B' in clean_str:
-        return int(float(clean_str.replace('B', '')) * 1000000000)
-    else:
-        try:
-            return int(float(clean_str))
-        except:
-            return 0
+    Returns:
+        dict: Cache entry with 'path', 'driver_version', 'chrome_version', or None
+    """
+    try:
+        with open(DRIVER_CACHE_PATH, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if entry.get('path') else None
 
-def scrape_tiktok_profile(url):
+def provision_chromedriver(force=False):
     """
-    Scrape TikTok profile videos using Selenium.
+    Resolve ChromeDriver and cache its path with a version stamp.
+    
+    The cached driver is reused as long as the binary still exists and its
+    stamp matches the installed Chrome's major version, so no network access
+    or version check is needed. When the download fails (for example
+    offline), a previously cached driver or one on the PATH is used instead.
     
     Args:
-        url (str): TikTok profile URL
+        force (bool): Resolve again even if the cache is valid
         
     Returns:
-        list: List of video data dictionaries
+        str: Path to the ChromeDriver executable, or None to let Selenium
+            locate a driver itself
     """
-    print(f"\n🚀 Starting TikTok profile scraping...")
-    print(f"📱 Profile URL: {url}")
+    chrome_version = get_chrome_version()
+    cached = load_driver_cache()
     
-    video_data = []
-    driver = None
+    if cached and not force and os.path.exists(cached['path']):
+        if chrome_version is None or _major(chrome_version) == _major(cached.get('chrome_version')):
+            return cached['path']
+        print(f"🔄 Chrome updated to {chrome_version} - refreshing ChromeDriver...")
     
     try:
-        # Setup Chrome options
-        print("🌐 Launching browser...")
-        chrome_options = Options()
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-        
-        # Uncomment the next line for headless mode
-        # chrome_options.add_argument("--headless")
-        
-        # Initialize WebDriver with automatic ChromeDriver management
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        
-        wait = WebDriverWait(driver, 10)
-        
-        # Navigate to the profile page
-        print(f"📄 Navigating to profile...")
-        driver.get(url)
-        delay = random_delay(1, 2)  # Random delay for page load
-        print(f"   ⏱️  Waited {delay:.1f}s for page to load")
-        
-        # Automatic scrolling phase to load ALL videos
-        print("\n🤖 Starting automatic scrolling to load ALL videos...")
-        print("📜 This may take several minutes for profiles with many videos...")
-        
-        # Wait for initial page load
-        time.sleep(5)
-        
-        # Get initial state
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        scroll_attempts = 0
-        no_change_count = 0
-        max_no_change = 5  # More attempts before giving up
-        
-        print("📜 Scrolling to bottom repeatedly until all videos are loaded...")
-        
-        while no_change_count < max_no_change and scroll_attempts < 100:  # Higher limit for large profiles
-            scroll_attempts += 1
-            
-            # Get current video count for progress tracking
-            current_videos = len(driver.find_elements(By.CSS_SELECTOR, 'a[href*="/video/"]'))
-            if current_videos == 0:
-                current_videos = len(driver.find_elements(By.CSS_SELECTOR, '[data-e2e="user-post-item"]'))
-            
-            # Scroll all the way to the absolute bottom
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            
-            # Wait longer for TikTok's lazy loading to kick in
-            time.sleep(6)  # Longer wait for content to load
-            
-            # Get new height after scrolling
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            
-            # Get new video count
-            new_video_count = len(driver.find_elements(By.CSS_SELECTOR, 'a[href*="/video/"]'))
-            if new_video_count == 0:
-                new_video_count = len(driver.find_elements(By.CSS_SELECTOR, '[data-e2e="user-post-item"]'))
-            
-            if new_height == last_height:
-                no_change_count += 1
-                print(f"   📜 Scroll {scroll_attempts}: No height change ({no_change_count}/{max_no_change}) - Videos: {new_video_count}")
-            else:
-                no_change_count = 0  # Reset counter when new content loads
-                videos_loaded = new_video_count - current_videos
-                print(f"   📜 Scroll {scroll_attempts}: Page expanded! Videos: {new_video_count} (+{videos_loaded})")
-                last_height = new_height
-            
-            # Extra check: try a small additional scroll to trigger any remaining lazy loading
-            if no_change_count == 0:  # Only if we just loaded new content
-                driver.execute_script("window.scrollBy(0, 500);")
-                time.sleep(2)
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
-        
-        # Final count
-        final_video_count = len(driver.find_elements(By.CSS_SELECTOR, 'a[href*="/video/"]'))
-        if final_video_count == 0:
-            final_video_count = len(driver.find_elements(By.CSS_SELECTOR, '[data-e2e="user-post-item"]'))
-        
-        if scroll_attempts >= 100:
-            print(f"   ⚠️ Reached maximum scroll attempts (100) - may have more videos")
+        driver_path = ChromeDriverManager().install()
+    except Exception as e:
+        print(f"⚠️  Could not download ChromeDriver ({e})")
+        if cached and os.path.exists(cached['path']):
+            print(f"   Falling back to cached driver {cached['path']} ({cached.get('driver_version')})")
+            return cached['path']
+        driver_path = shutil.which('chromedriver')
+        if driver_path:
+            print(f"   Falling back to chromedriver on PATH: {driver_path}")
         else:
-            print(f"   ✅ Completed scrolling - no more content loading")
-            
-        print(f"🎯 FINAL RESULT: {final_video_count} videos loaded after {scroll_attempts} scroll attempts")
-        
-        # Scroll back to top to start scraping from the beginning
-        print("🔝 Scrolling back to top to start scraping...")
-        driver.execute_script("window.scrollTo(0, 0);")
-        time.sleep(3)
-        
-        print("🤖 Starting automated scraping phase...")
-        delay = random_delay(1, 2)  # Random delay before starting
-        print(f"   ⏱️  Waited {delay:.1f}s before starting automation")
-        
-        # Find all video containers
-        print("🔍 Finding video containers...")
-        video_containers = []
-        
-        try:
-            # Try TikTok's actual video link selectors
-            video_containers = driver.find_elements(By.CSS_SELECTOR, 'a[href*="/video/"]')
-            print(f"   ✅ Found video links: {len(video_containers)}")
-        except:
-            pass
+            print("   Letting Selenium locate a driver")
+        return driver_path
+    
+    entry = {
+        'path': driver_path,
+        'driver_version': get_driver_version(driver_path),
+        'chrome_version': chrome_version,
+        'resolved_at': datetime.now().isoformat(),
+    }
+    try:
+        os.makedirs(os.path.dirname(DRIVER_CACHE_PATH), exist_ok=True)
+        with open(DRIVER_CACHE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2)
+    except OSError as e:
+        print(f"⚠️  Could not write driver cache {DRIVER_CACHE_PATH}: {e}")
+    return driver_path
+
+def get_chromedriver_path():
+    """
+    Resolve the ChromeDriver binary once per process.
+    
+    Returns:
+        str: Path to the ChromeDriver executable, or None to let Selenium
+            locate a driver itself
+    """
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = provision_chromedriver() or ''
+        return _chromedriver_path or None
+
+def create_driver(lean=None, network=None):
+    """
+    Launch a new Chrome WebDriver session configured for scraping.
+    
+    Args:
+        lean (bool): Run headless and skip images, media streams and fonts,
+            with autoplay off and capped caches. Defaults to LEAN_BROWSER.
+        network (bool): Record the performance log for NetworkCapture.
+            Defaults to NETWORK_CAPTURE.
+    
+    Returns:
+        webdriver.Chrome: The new browser session
+    """
+    lean = LEAN_BROWSER if lean is None else lean
+    network = NETWORK_CAPTURE if network is None else network
+    chrome_options = Options()
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+    
+    # Uncomment the next line for headless mode (or use --lean)
+    # chrome_options.add_argument("--headless")
+    
+    if lean:
+        for argument in LEAN_CHROME_ARGS:
+            chrome_options.add_argument(argument)
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.sound": 2,
+        })
+    
+    if network:
+        # Network events (and with them the item-list API responses) go to the performance log
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    
+    # ChromeDriver is resolved once and shared by every session in this process
+    driver_path = get_chromedriver_path()
+    service = Service(driver_path) if driver_path else Service()
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    
+    if lean:
+        # Block heavy resources at the network layer so they are never downloaded
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+    return driver
+
+def get_session_memory(driver):
+    """
+    Measure the memory footprint of a browser session.
+    
+    The resident memory of Chrome's process tree is read with psutil when it
+    is installed; the page's JS heap is always read over CDP.
+    
+    Args:
+        driver: Selenium WebDriver instance
         
-        if not video_containers:
+    Returns:
+        dict: 'rss_mb' (None without psutil), 'processes' and 'js_heap_mb'
+    """
+    memory = {'rss_mb': None, 'processes': 0, 'js_heap_mb': None}
+    
+    try:
+        import psutil
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+        rss = 0
+        for process in processes:
             try:
-                # Try the specific video container class from TikTok
-                video_containers = driver.find_elements(By.CSS_SELECTOR, 'a.css-1mdo0pl-AVideoContainer')
-                print(f"   ✅ Found video containers by class: {len(video_containers)}")
-            except:
+                rss += process.memory_info().rss
+            except psutil.Error:
                 pass
+        memory['rss_mb'] = rss / (1024 * 1024)
+        memory['processes'] = len(processes)
+    except Exception:
+        pass
+    
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        metrics = driver.execute_cdp_cmd("Performance.getMetrics", {}).get('metrics', [])
+        for metric in metrics:
+            if metric.get('name') == 'JSHeapUsedSize':
+                memory['js_heap_mb'] = metric['value'] / (1024 * 1024)
+    except Exception:
+        pass
+    
+    return memory
+
+def print_session_memory(driver):
+    """Print the memory footprint of a browser session."""
+    memory = get_session_memory(driver)
+    parts = []
+    if memory['rss_mb'] is not None:
+        parts.append(f"RSS {memory['rss_mb']:.0f} MB across {memory['processes']} processes")
+    if memory['js_heap_mb'] is not None:
+        parts.append(f"JS heap {memory['js_heap_mb']:.0f} MB")
+    if parts:
+        print(f"🧠 Browser memory: {', '.join(parts)}")
+
+class MemoryWatchdog:
+    """
+    Watches a browser session's memory on very large profiles.
+    
+    check() samples the session every ``every`` calls (RSS with psutil,
+    otherwise the JS heap). Over ``limit_mb`` it asks Chrome to give memory
+    back (a critical memory-pressure signal and a garbage collection) and
+    returns True, so a caller at a checkpoint can recycle the session before
+    Chrome runs out of memory and crashes.
+    """
+    
+    def __init__(self, limit_mb=None, every=None):
+        self.limit_mb = limit_mb if limit_mb is not None else MEMORY_LIMIT_MB
+        self.every = max(1, every if every is not None else MEMORY_CHECK_EVERY)
+        self.calls = 0
+        self.peak_mb = 0.0
+    
+    def check(self, driver):
+        """
+        Count one scroll or video and sample the session when it is due.
         
-        if not video_containers:
+        Args:
+            driver: Selenium WebDriver instance
+            
+        Returns:
+            bool: True if the session was over the limit
+        """
+        self.calls += 1
+        if self.calls % self.every:
+            return False
+        
+        memory = get_session_memory(driver)
+        used = memory['rss_mb'] if memory['rss_mb'] is not None else memory['js_heap_mb']
+        if used is None:
+            return False
+        self.peak_mb = max(self.peak_mb, used)
+        if used < self.limit_mb:
+            return False
+        
+        print(f"   🧠 Browser memory at {used:.0f} MB (limit {self.limit_mb} MB) - releasing memory")
+        METRICS.inc('memory_pressure_total')
+        for command, params in (("Memory.simulatePressureNotification", {"level": "critical"}),
+                                ("HeapProfiler.collectGarbage", {})):
             try:
-                # Fallback to generic video containers
-                video_containers = driver.find_elements(By.CSS_SELECTOR, '[data-e2e="user-post-item"]')
-                print(f"   ✅ Found generic containers: {len(video_containers)}")
-            except:
+                driver.execute_cdp_cmd(command, params)
+            except WebDriverException:
                 pass
+        return True
+
+def is_session_alive(driver):
+    """
+    Check whether a WebDriver session is still usable.
+    
+    Args:
+        driver: Selenium WebDriver instance
         
-        video_count = len(video_containers)
-        print(f"📹 Found {video_count} videos to scrape")
+    Returns:
+        bool: True if the browser still responds to commands
+    """
+    try:
+        driver.execute_script("return 1")
+        return True
+    except Exception:
+        return False
+
+def extract_video_id(video_url):
+    """
+    Extract the numeric video ID from a TikTok video URL.
+    
+    Args:
+        video_url (str): URL containing /video/<id>
         
-        if video_count == 0:
-            print("❌ No videos found on this profile")
-            print("💡 Try scrolling down manually or check if the profile has videos")
-            return video_data
+    Returns:
+        str: The video ID, or None if the URL has none
+    """
+    match = re.search(r'/video/(\d+)', video_url or '')
+    return match.group(1) if match else None
+
+def build_video_record(video_url, views, likes, bookmarks, comments):
+    """
+    Build a video record from raw metric strings.
+    
+    Args:
+        video_url (str): Video URL
+        views (str): Raw view count text
+        likes (str): Raw like count text
+        bookmarks (str): Raw bookmark count text
+        comments (str): Raw comment count text
         
-        # Determine how many videos to scrape
-        videos_to_scrape = video_count if MAX_VIDEOS_TO_SCRAPE is None else min(video_count, MAX_VIDEOS_TO_SCRAPE)
+    Returns:
+        VideoRecord: Video record with parsed and raw values
+    """
+    return VideoRecord(
+        video_url,
+        views=parse_count(views),
+        likes=parse_count(likes),
+        bookmarks=parse_count(bookmarks),
+        comments=parse_count(comments),
+        views_raw=views,
+        likes_raw=likes,
+        bookmarks_raw=bookmarks,
+        comments_raw=comments,
+        scraped_at=datetime.now().isoformat(),
+    )
+
+def parse_page_state_stats(state_text):
+    """
+    Pull per-video metrics out of a page's embedded state JSON.
+    
+    The state layout differs between TikTok page versions, so this walks the
+    whole document and picks up any object that has both an ``id`` and a
+    ``stats`` mapping.
+    
+    Args:
+        state_text (str): Raw JSON text of the embedded state script
+        
+    Returns:
+        dict: Mapping of video ID to a dict of raw metric strings
+    """
+    if not state_text:
+        return {}
+    
+    try:
+        state = json.loads(state_text)
+    except (ValueError, TypeError):
+        return {}
+    
+    found = {}
+    stack = [state]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stats = node.get('stats')
+            video_id = node.get('id')
+            if isinstance(stats, dict) and video_id is not None:
+                metrics = {}
+                for metric, key in STATE_STAT_KEYS.items():
+                    if stats.get(key) is not None:
+                        metrics[metric] = str(stats[key])
+                if metrics:
+                    found.setdefault(str(video_id), {}).update(metrics)
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    
+    return found
+
+class NetworkCapture:
+    """
+    Reads video metrics from TikTok's item-list API responses.
+    
+    While a profile scrolls, the grid pages in its videos through JSON API
+    calls whose items already carry play, like, comment and collect counts.
+    The session's performance log records those responses; drain() picks
+    out the item-list ones, fetches their bodies over CDP and decodes them
+    with parse_page_state_stats(). The session must have been created with
+    network capture on (see create_driver). With an archive, every decoded
+    response body is archived as an 'item_list' page of ``profile_url``.
+    """
+    
+    def __init__(self, driver, archive=None, profile_url=None):
+        self.driver = driver
+        self.archive = archive
+        self.profile_url = profile_url
+        self.stats = {}
+        self.responses = 0
+        self._pending = {}
+        # Drop log entries left over from earlier pages of this session
+        self._read_log()
+    
+    def _read_log(self):
+        try:
+            return self.driver.get_log('performance')
+        except WebDriverException:
+            return []
+    
+    def drain(self):
+        """
+        Decode every item-list response logged since the last call.
+        
+        Returns:
+            int: Number of videos seen for the first time
+        """
+        before = len(self.stats)
+        for entry in self._read_log():
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError, TypeError):
+                continue
+            method = message.get('method')
+            params = message.get('params') or {}
+            request_id = params.get('requestId')
+            if method == 'Network.responseReceived':
+                response_url = (params.get('response') or {}).get('url', '')
+                if any(path in response_url for path in ITEM_LIST_API_PATHS):
+                    self._pending[request_id] = response_url
+            elif method == 'Network.loadingFinished' and request_id in self._pending:
+                # The body can only be fetched once the response has fully loaded
+                self._read_body(request_id, self._pending.pop(request_id))
+        return len(self.stats) - before
+    
+    def _read_body(self, request_id, response_url):
+        try:
+            response = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except WebDriverException as e:
+            METRICS.inc('errors_total', stage='network_capture')
+            print(f"   ⚠️  Could not read an item-list response: {e}")
+            return
+        body = response.get('body') or ''
+        if response.get('base64Encoded'):
+            body = base64.b64decode(body).decode('utf-8', 'replace')
+        self.responses += 1
+        METRICS.inc('item_list_responses_total')
+        if self.archive is not None:
+            self.archive.put(response_url, 'item_list', body, self.profile_url)
+        for video_id, metrics in parse_page_state_stats(body).items():
+            self.stats.setdefault(video_id, {}).update(metrics)
+
+def harvest_profile_tiles(driver):
+    """
+    Collect every loaded video tile on a profile page in one script call.
+    
+    Args:
+        driver: Selenium WebDriver positioned on a profile page
+        
+    Returns:
+        tuple: (tiles, state_stats) where tiles is an ordered list of
+            {'href', 'views'} dicts and state_stats maps video ID to raw metrics
+    """
+    registry = selector_registry(driver)
+    result = driver.execute_script(HARVEST_TILES_SCRIPT, registry.ordered('tile', 'views'), PAGE_STATE_SCRIPT_IDS) or {}
+    tiles = result.get('tiles') or []
+    registry.record_tiles(tiles)
+    return tiles, parse_page_state_stats(result.get('state'))
+
+def query_video_page(driver):
+    """
+    Look up every metric on the open video page in one script call.
+    
+    Selectors are tried in the session registry's order and the outcome is
+    recorded there.
+    
+    Args:
+        driver: Selenium WebDriver positioned on a video page
+        
+    Returns:
+        dict: Raw metric text per metric (None when missing), the selector
+            that matched each metric under 'matched', and the page's embedded
+            state JSON under 'state'
+    """
+    registry = selector_registry(driver)
+    result = driver.execute_script(VIDEO_METRICS_SCRIPT, registry.ordered_map('video'), PAGE_STATE_SCRIPT_IDS) or {}
+    registry.record_results('video', result.get('matched'))
+    return result
+
+def detect_block_page(driver):
+    """
+    Check whether the open page is a captcha or rate-limit page.
+    
+    Args:
+        driver: Selenium WebDriver instance
+        
+    Returns:
+        str: 'captcha' or the block phrase found, None for a normal page
+    """
+    try:
+        return driver.execute_script(BLOCK_PAGE_SCRIPT, BLOCK_PAGE_PHRASES)
+    except WebDriverException:
+        return None
+
+def report_page_load(driver, url, has_content):
+    """
+    Tell the shared rate limiter how a page load turned out.
+    
+    Pages with content are 'ok'. Pages without are checked for block
+    markers and reported as 'blocked' or 'empty'.
+    
+    Args:
+        driver: Selenium WebDriver that loaded the page
+        url (str): URL that was loaded
+        has_content (bool): Whether the page showed what was expected
+        
+    Returns:
+        str: The reported outcome
+    """
+    reason = None
+    if has_content:
+        outcome = 'ok'
+    else:
+        reason = detect_block_page(driver)
+        outcome = 'blocked' if reason else 'empty'
+    RATE_LIMITER.report(url, outcome, driver, reason=reason)
+    return outcome
+
+def read_video_page_metrics(driver):
+    """
+    Read all metrics from the currently open video page in one script call.
+    
+    Args:
+        driver: Selenium WebDriver positioned on a video page
+        
+    Returns:
+        dict: Raw metric strings keyed by metric name (missing metrics are None)
+    """
+    result = query_video_page(driver)
+    metrics = {metric: result.get(metric) for metric in METRIC_SELECTORS}
+    
+    # Prefer exact numbers from the embedded state when the page has them
+    video_id = extract_video_id(driver.current_url)
+    state_metrics = parse_page_state_stats(result.get('state')).get(video_id, {})
+    for metric, value in state_metrics.items():
+        metrics[metric] = value
+    return metrics
+
+def scrape_profile_bulk(driver, waiter=None, index=None, emit=None, skip_positions=None, clock=None,
+                        captured_stats=None, archive=None, profile_url=None):
+    """
+    Scrape the loaded profile grid in bulk.
+    
+    Tile hrefs, view counts and any embedded page state are read in a single
+    script call. Individual video pages are only opened for videos whose
+    metrics are still incomplete after that.
+    
+    Args:
+        driver: Selenium WebDriver positioned on a fully scrolled profile page
+        waiter (AdaptiveWaiter): Optional waiter shared with the caller
+        index (ProfileIndex): Optional index; videos that don't need a refresh are skipped
+        emit (callable): Optional ``emit(position, record)`` called for every
+            scraped video instead of collecting the records
+        skip_positions (set): Grid positions that were already scraped
+        clock (PhaseClock): Optional clock the discovery and extraction
+            phases are timed on
+        captured_stats (dict): Optional metrics per video ID captured from
+            the item-list API responses (see NetworkCapture)
+        archive (PageArchive): Optional archive every visited video page is stored in
+        profile_url (str): Profile the archived pages belong to
+        
+    Returns:
+        RecordBatch: Scraped video records (empty when ``emit`` is given)
+    """
+    waiter = waiter or AdaptiveWaiter(driver)
+    collected = RecordBatch()
+    emit = emit or (lambda position, record: collected.append(record))
+    skip_positions = skip_positions or set()
+    clock = clock or PhaseClock()
+    
+    clock.mark('discovery')
+    print("⚡ Harvesting video tiles in bulk...")
+    tiles, state_stats = harvest_profile_tiles(driver)
+    print(f"   ✅ Found {len(tiles)} tiles, {len(state_stats)} with embedded metrics")
+    if captured_stats:
+        for video_id, metrics in captured_stats.items():
+            state_stats[video_id] = dict(metrics, **state_stats.get(video_id, {}))
+        print(f"   📡 {len(captured_stats)} videos with metrics captured from the network")
+    
+    positioned = list(enumerate(tiles))
+    if MAX_VIDEOS_TO_SCRAPE is not None:
+        positioned = positioned[:MAX_VIDEOS_TO_SCRAPE]
+    
+    if skip_positions:
+        positioned = [(position, tile) for position, tile in positioned if position not in skip_positions]
+        print(f"⏯️  {len(positioned)} videos left after skipping already checkpointed ones")
+    
+    if index is not None:
+        total = len(positioned)
+        positioned = [(position, tile) for position, tile in positioned
+                      if index.needs_refresh(extract_video_id(tile['href']))]
+        print(f"📇 {len(positioned)} of {total} videos are new or stale")
+    
+    pending = []
+    for position, tile in positioned:
+        metrics = dict(state_stats.get(extract_video_id(tile['href']), {}))
+        if tile.get('views') and 'views' not in metrics:
+            metrics['views'] = tile['views']
+        pending.append((position, tile['href'], metrics))
+    
+    missing = sum(1 for _, _, metrics in pending if any(m not in metrics for m in METRIC_SELECTORS))
+    print(f"🎯 {len(pending) - missing} videos complete from the profile page, {missing} need a video page visit")
+    
+    clock.mark('extraction')
+    visited = 0
+    for position, video_url, metrics in pending:
+        if any(m not in metrics for m in METRIC_SELECTORS):
+            visited += 1
+            print(f"\n📹 Fetching missing metrics {visited}/{missing}: {video_url}")
+            try:
+                RATE_LIMITER.acquire(video_url, driver)
+                with METRICS.timer('video_navigation_seconds', mode='direct'):
+                    driver.get(video_url)
+                    waiter.until('video_load', video_metrics_present)
+                print(f"   ⏱️  Video load wait: {waiter.last('video_load'):.1f}s")
+                page_metrics = read_video_page_metrics(driver)
+                report_page_load(driver, video_url, any(page_metrics.values()))
+                if archive is not None:
+                    archive.put(video_url, 'video', driver.page_source, profile_url)
+                for metric, value in page_metrics.items():
+                    if value and metric not in metrics:
+                        metrics[metric] = value
+            except Exception as e:
+                RATE_LIMITER.report(video_url, 'error', driver)
+                METRICS.inc('errors_total', stage='video_fetch')
+                print(f"❌ Error fetching {video_url}: {e}")
+        
+        emit(position, build_video_record(
+            video_url,
+            metrics.get('views') or "0",
+            metrics.get('likes') or "0",
+            metrics.get('bookmarks') or "0",
+            metrics.get('comments') or "0",
+        ))
+    
+    print(f"✅ Bulk extraction finished: {len(pending)} videos, {visited} video page visits")
+    return collected
+
+class RunJournal:
+    """
+    Append-only checkpoint journal for a scrape run.
+    
+    Every scraped video is appended as one JSON line the moment it is
+    scraped, together with markers for the run's queue and for completed
+    profiles. A run that crashes or is interrupted can be resumed from the
+    journal: completed profiles are skipped and partially scraped profiles
+    only redo the videos that were not journaled yet.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.urls = []
+        self.separate_files = False
+        self.finished = False
+        self.completed_profiles = {}
+        self._positions = defaultdict(set)
+        self._video_ids = defaultdict(set)
+        self._lock = threading.Lock()
+        self._file = None
+    
+    @classmethod
+    def start(cls, path, urls, separate_files):
+        """
+        Begin a new journal, replacing any previous one at ``path``.
+        
+        Args:
+            path (str): Journal file path
+            urls (list): Queued profile URLs
+            separate_files (bool): Output choice of the run
+            
+        Returns:
+            RunJournal: The open journal
+        """
+        journal = cls(path)
+        journal.urls = list(urls)
+        journal.separate_files = separate_files
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        journal._file = open(path, 'w', encoding='utf-8')
+        journal._append({'type': 'run', 'urls': journal.urls, 'separate_files': separate_files,
+                         'started_at': datetime.now().isoformat()})
+        return journal
+    
+    @classmethod
+    def resume(cls, path):
+        """
+        Reopen an unfinished journal.
+        
+        Args:
+            path (str): Journal file path
+            
+        Returns:
+            RunJournal: The reopened journal, or None if there is nothing to resume
+        """
+        if not os.path.exists(path):
+            return None
+        
+        journal = cls(path)
+        line = ''
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash can leave a partially written last line
+                    continue
+                kind = entry.get('type')
+                if kind == 'run':
+                    journal.urls = entry['urls']
+                    journal.separate_files = entry['separate_files']
+                elif kind == 'video':
+                    journal._positions[entry['profile_url']].add(entry['position'])
+                    video_id = extract_video_id(entry['record'].get('video_url'))
+                    if video_id:
+                        journal._video_ids[entry['profile_url']].add(video_id)
+                elif kind == 'profile_done':
+                    journal.completed_profiles[entry['profile_url']] = entry['videos']
+                elif kind == 'run_done':
+                    journal.finished = True
+        
+        if journal.finished or not journal.urls:
+            return None
+        
+        journal._file = open(path, 'a', encoding='utf-8')
+        if line and not line.endswith('\n'):
+            # Terminate a partially written last line before appending
+            journal._file.write('\n')
+        return journal
+    
+    def _append(self, entry):
+        with self._lock:
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+    
+    def record_video(self, profile_url, position, record):
+        """
+        Journal one scraped video.
+        
+        Args:
+            profile_url (str): Profile the video belongs to
+            position (int): Position of the video in the profile grid
+            record (VideoRecord): Video record
+        """
+        self._append({'type': 'video', 'profile_url': profile_url, 'position': position, 'record': dict(record)})
+    
+    def complete_profile(self, profile_url, video_count):
+        """Mark a profile as fully scraped and written to its output."""
+        self.completed_profiles[profile_url] = video_count
+        self._append({'type': 'profile_done', 'profile_url': profile_url, 'videos': video_count})
+    
+    def is_profile_complete(self, profile_url):
+        """Return True if the profile finished in an earlier attempt."""
+        return profile_url in self.completed_profiles
+    
+    def completed_positions(self, profile_url):
+        """Return the grid positions journaled for a profile by earlier attempts."""
+        return set(self._positions.get(profile_url, ()))
+    
+    def completed_video_ids(self, profile_url):
+        """Return the IDs of the videos journaled for a profile by earlier attempts."""
+        return set(self._video_ids.get(profile_url, ()))
+    
+    def records(self, profile_url):
+        """
+        Read back the records journaled for a profile by earlier attempts.
+        
+        Records are re-read from the journal file rather than kept in memory,
+        so a long run's memory use does not grow with the journal.
+        
+        Args:
+            profile_url (str): Profile URL
+            
+        Returns:
+            RecordBatch: Video records in grid order
+        """
+        videos = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('type') == 'video' and entry.get('profile_url') == profile_url:
+                    if entry['position'] in self._positions.get(profile_url, ()):
+                        # Keyed by video ID where there is one, as grid positions
+                        # can shift between attempts when new videos are posted
+                        key = extract_video_id(entry['record'].get('video_url')) or entry['position']
+                        videos[key] = (entry['position'], entry['record'])
+        return RecordBatch(record for _, record in sorted(videos.values(), key=lambda item: item[0]))
+    
+    def finish(self):
+        """Mark the run as finished and close the journal."""
+        self._append({'type': 'run_done', 'finished_at': datetime.now().isoformat()})
+        self.close()
+    
+    def close(self):
+        """Close the journal file."""
+        if self._file:
+            self._file.close()
+            self._file = None
+
+class ProfileIndex:
+    """
+    Persisted index of the videos already scraped for one profile.
+    
+    Stored as ``data/index/<profile>.json`` and maps each video ID to the last
+    record scraped for it. Incremental runs use it to stop scrolling once they
+    reach videos that are already known and to skip videos that were scraped
+    recently.
+    """
+    
+    def __init__(self, profile_name, stale_hours=None):
+        self.profile_name = profile_name
+        self.stale_hours = stale_hours if stale_hours is not None else INCREMENTAL_STALE_HOURS
+        self.path = os.path.join(INDEX_DIR, f"{profile_name}.json")
+        self.videos = {}
+        self._load()
+    
+    @classmethod
+    def for_url(cls, url, stale_hours=None):
+        """
+        Load the index for a profile URL.
+        
+        Args:
+            url (str): TikTok profile URL
+            stale_hours (float): Optional override of INCREMENTAL_STALE_HOURS
+            
+        Returns:
+            ProfileIndex: The profile's index (empty if never scraped)
+        """
+        return cls(get_profile_name(url, 0), stale_hours)
+    
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.videos = json.load(f).get('videos', {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read index {self.path}, starting fresh: {e}")
+            self.videos = {}
+    
+    def __len__(self):
+        return len(self.videos)
+    
+    def is_known(self, video_id):
+        """Return True if the video has been scraped before."""
+        return video_id in self.videos
+    
+    def needs_refresh(self, video_id):
+        """
+        Check whether a video should be (re-)scraped.
+        
+        Args:
+            video_id (str): TikTok video ID
+            
+        Returns:
+            bool: True for new videos and for known videos older than the stale threshold
+        """
+        entry = self.videos.get(video_id)
+        if entry is None:
+            return True
+        try:
+            scraped_at = datetime.fromisoformat(entry['scraped_at'])
+        except (KeyError, TypeError, ValueError):
+            return True
+        return (datetime.now() - scraped_at).total_seconds() > self.stale_hours * 3600
+    
+    def known_run(self, video_ids):
+        """
+        Count how many of the most recently loaded videos are already known.
+        
+        Args:
+            video_ids (list): Loaded video IDs in page order
+            
+        Returns:
+            int: Length of the trailing run of known IDs
+        """
+        run = 0
+        for video_id in reversed(video_ids):
+            if not self.is_known(video_id):
+                break
+            run += 1
+        return run
+    
+    def update(self, record):
+        """
+        Store the latest metrics for a scraped video.
+        
+        Args:
+            record (dict): Video data dictionary
+        """
+        video_id = extract_video_id(record.get('video_url'))
+        if video_id:
+            self.videos[video_id] = dict(record)
+    
+    def save(self):
+        """Write the index atomically."""
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'profile_name': self.profile_name, 'updated_at': datetime.now().isoformat(),
+                       'videos': self.videos}, f)
+        os.replace(tmp_path, self.path)
+
+class ProfileError(Exception):
+    """A profile could not be scraped: its page was blocked or empty, or every video failed."""
+
+def profile_result(video_data, failed=0, incremental=False):
+    """
+    Decide the result of a profile whose grid loaded.
+    
+    Args:
+        video_data (RecordBatch): Records the scrape produced
+        failed (int): Number of videos that could not be scraped
+        incremental (bool): Whether only new or stale videos were scraped
+        
+    Returns:
+        RecordBatch: video_data, or UpToDate when an incremental scrape had
+            nothing new or stale to refresh
+        
+    Raises:
+        ProfileError: Every video that was tried failed
+    """
+    if failed and not video_data:
+        raise ProfileError(f"All {failed} videos failed")
+    if incremental and not video_data:
+        print("📇 Every video is up to date - nothing to refresh")
+        return UpToDate()
+    return video_data
+
+def get_tile_video_ids(driver):
+    """
+    Read the IDs of all loaded video tiles in page order.
+    
+    Args:
+        driver: Selenium WebDriver positioned on a profile page
+        
+    Returns:
+        list: Video IDs
+    """
+    ids = []
+    for href in driver.execute_script(TILE_HREFS_SCRIPT) or []:
+        video_id = extract_video_id(href)
+        if video_id:
+            ids.append(video_id)
+    return ids
+
+def load_profile_grid(driver, url, waiter, index=None, clock=None, capture=None, stream=None, watchdog=None):
+    """
+    Open a profile and scroll until its whole video grid is loaded.
+    
+    Args:
+        driver: Selenium WebDriver instance
+        url (str): TikTok profile URL
+        waiter (AdaptiveWaiter): Waiter for the page load and scrolls
+        index (ProfileIndex): Optional index; scrolling stops at a run of
+            already-known videos
+        clock (PhaseClock): Optional clock the load and scroll phases are timed on
+        capture (NetworkCapture): Optional capture drained after every scroll,
+            so item-list responses are read while their bodies are available
+        stream (TileStream): Optional stream drained after every scroll, so
+            tiles are handed on as soon as they render
+        watchdog (MemoryWatchdog): Optional watchdog checked after every scroll.
+            The first time the session is over its limit, buffered tiles are
+            pruned without waiting for their view counts; if it is still over
+            the limit at a later check, scrolling stops with the tiles loaded
+            so far rather than crashing the browser.
+        
+    Returns:
+        int: Number of video tiles loaded
+    """
+    clock = clock or PhaseClock()
+    
+    # Navigate to the profile page
+    clock.mark('load')
+    print(f"📄 Navigating to profile...")
+    RATE_LIMITER.acquire(url, driver)
+    try:
+        driver.get(url)
+        loaded = waiter.until('profile_load', tiles_present)
+    except Exception:
+        RATE_LIMITER.report(url, 'error', driver)
+        raise
+    print(f"   ⏱️  Waited {waiter.last('profile_load'):.1f}s for page to load")
+    if report_page_load(driver, url, loaded) == 'blocked':
+        # Scrolling a captcha page loads nothing; the limiter is already backing off
+        print("   🚧 Profile page is blocked - skipping")
+        return 0
+    if stream is not None:
+        stream.start()
+        stream.drain()
+    
+    # Automatic scrolling phase to load ALL videos
+    clock.mark('scroll')
+    print("\n🤖 Starting automatic scrolling to load ALL videos...")
+    print("📜 This may take several minutes for profiles with many videos...")
+    
+    # Get initial state
+    last_height, _ = get_page_size(driver)
+    scroll_attempts = 0
+    no_change_count = 0
+    max_no_change = 5  # More attempts before giving up
+    memory_pressure = 0
+    
+    print("📜 Scrolling to bottom repeatedly until all videos are loaded...")
+    
+    while no_change_count < max_no_change and scroll_attempts < 100:  # Higher limit for large profiles
+        scroll_attempts += 1
+        
+        # Get current height and video count for progress tracking
+        current_height, current_videos = get_page_size(driver)
+        
+        # Scroll all the way to the absolute bottom
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        
+        # Wait until TikTok's lazy loading adds tiles or grows the page
+        waiter.until('scroll', page_grew(current_height, current_videos), timeout=SCROLL_WAIT_TIMEOUT)
+        
+        # Get new height and video count after scrolling
+        new_height, new_video_count = get_page_size(driver)
+        if capture is not None:
+            capture.drain()
+        if stream is not None:
+            stream.drain()
+        if watchdog is not None and watchdog.check(driver):
+            memory_pressure += 1
+            if memory_pressure > 1:
+                # Pruning did not bring the session under its limit: keep what has loaded
+                METRICS.inc('scrolls_total', outcome='memory_stop')
+                print(f"   🧠 Still over the memory limit - stopping the scroll at {new_video_count} videos")
+                break
+            if stream is not None and stream.prune:
+                # Prune harder: collapse buffered tiles too, even before their view counts render
+                stream.drain(final=True)
+        
+        if new_height == last_height:
+            no_change_count += 1
+            METRICS.inc('scrolls_total', outcome='unchanged')
+            print(f"   📜 Scroll {scroll_attempts}: No height change ({no_change_count}/{max_no_change}) - Videos: {new_video_count} ({waiter.last('scroll'):.1f}s)")
+        else:
+            no_change_count = 0  # Reset counter when new content loads
+            videos_loaded = new_video_count - current_videos
+            METRICS.inc('scrolls_total', outcome='grew')
+            if videos_loaded > 0:
+                METRICS.inc('tiles_loaded_total', videos_loaded)
+            print(f"   📜 Scroll {scroll_attempts}: Page expanded! Videos: {new_video_count} (+{videos_loaded}) ({waiter.last('scroll'):.1f}s)")
+            last_height = new_height
+        
+        # Incremental mode: everything past a run of known videos was seen on an earlier run
+        if index is not None and len(index):
+            video_ids = stream.video_ids() if stream is not None else get_tile_video_ids(driver)
+            known_run = index.known_run(video_ids)
+            if known_run >= INCREMENTAL_KNOWN_RUN:
+                print(f"   📇 Reached {known_run} consecutive known videos - stopping scroll")
+                break
+        
+        # Extra check: nudge the viewport to trigger any remaining lazy loading
+        if no_change_count == 0:  # Only if we just loaded new content
+            driver.execute_script("window.scrollBy(0, -500); window.scrollTo(0, document.body.scrollHeight);")
+    
+    # Final count
+    _, final_video_count = get_page_size(driver)
+    if stream is not None:
+        stream.drain(final=True)
+        print(f"📬 Streamed {len(stream.seen)} videos while scrolling"
+              + (f", {stream.duplicates} duplicate tiles dropped" if stream.duplicates else ""))
+    if capture is not None:
+        capture.drain()
+        print(f"📡 Captured metrics for {len(capture.stats)} videos from {capture.responses} item-list responses")
+    
+    if memory_pressure > 1:
+        print(f"   ⚠️ Stopped scrolling to stay under the memory limit - may have more videos")
+    elif scroll_attempts >= 100:
+        print(f"   ⚠️ Reached maximum scroll attempts (100) - may have more videos")
+    else:
+        print(f"   ✅ Completed scrolling - no more content loading")
+        
+    print(f"🎯 FINAL RESULT: {final_video_count} videos loaded after {scroll_attempts} scroll attempts")
+    return final_video_count
+
+def scrape_video_page(driver, waiter, video_url, view_count=None, archive=None, profile_url=None):
+    """
+    Open a video page directly and read its metrics.
+    
+    Args:
+        driver: Selenium WebDriver instance
+        waiter (AdaptiveWaiter): Waiter for the page load
+        video_url (str): Video URL
+        view_count (str): Raw view count from the profile grid, if known
+        archive (PageArchive): Optional archive the page is stored in
+        profile_url (str): Profile the archived page belongs to
+        
+    Returns:
+        VideoRecord: The video's record
+    """
+    if view_count:
+        print(f"   ✅ Found profile view count: {view_count}")
+    else:
+        view_count = "0"
+        print(f"   ⚠️  No view count found on profile page")
+    
+    # Open the video page directly and wait for it to render its metrics
+    RATE_LIMITER.acquire(video_url, driver)
+    try:
+        with METRICS.timer('video_navigation_seconds', mode='direct'):
+            driver.get(video_url)
+            waiter.until('video_load', video_metrics_present)
+    except Exception:
+        RATE_LIMITER.report(video_url, 'error', driver)
+        raise
+    print(f"   ⏱️  Video load wait: {waiter.last('video_load'):.1f}s")
+    
+    # Extract every metric from the video page in one script call.
+    # Each metric's selectors (TikTok's data-e2e names first, then
+    # broader fallbacks) are tried in the registry's order.
+    # Note: TikTok actually uses "undefined-count" for bookmarks/saves - this is their internal naming!
+    print(f"   🔍 Extracting metrics from video page...")
+    page = query_video_page(driver)
+    matched = page.get('matched') or {}
+    report_page_load(driver, video_url, any(matched.values()) or bool(page.get('state')))
+    if archive is not None:
+        archive.put(video_url, 'video', driver.page_source, profile_url)
+    
+    likes = page.get('likes') or "0"
+    bookmarks = page.get('bookmarks') or "0"
+    comments = page.get('comments') or "0"
+    for metric, value in (('likes', likes), ('bookmarks', bookmarks), ('comments', comments)):
+        if matched.get(metric):
+            print(f"   ✅ Found {metric}: {value} ({matched[metric]})")
+        else:
+            print(f"   ⚠️  No {metric} found")
+    
+    # Try to get view count from individual video page if we didn't get it from profile
+    if view_count == "0":
+        if page.get('views'):
+            view_count = page['views']
+            print(f"   ✅ Found views on video page: {view_count}")
+        else:
+            print(f"   ⚠️  No view count found on video page either")
+    
+    # The record is keyed by the indexed URL, so it cannot end up
+    # attributed to another video
+    video_info = build_video_record(video_url, view_count, likes, bookmarks, comments)
+    
+    print(f"   👁️  Views: {view_count} ({video_info['views']:,})")
+    print(f"   ❤️  Likes: {likes} ({video_info['likes']:,})")
+    print(f"   🔖 Bookmarks: {bookmarks} ({video_info['bookmarks']:,})")
+    print(f"   💬 Comments: {comments} ({video_info['comments']:,})")
+    return video_info
+
+def scrape_tiktok_profile(url, driver=None, bulk=False, incremental=False, journal=None, sink=None, phases=None,
+                          network=False, archive=None, large=False, pool=None):
+    """
+    Scrape TikTok profile videos using Selenium.
+    
+    Args:
+        url (str): TikTok profile URL
+        driver: Optional existing WebDriver session to reuse. When given, the
+            caller owns the session and it is left open afterwards.
+        bulk (bool): Harvest the profile grid in one pass and only open video
+            pages for metrics that are missing (see scrape_profile_bulk)
+        incremental (bool): Use the profile's ProfileIndex to stop scrolling at
+            already-known videos and only scrape new or stale ones
+        journal (RunJournal): Optional checkpoint journal. Every video is
+            journaled as it is scraped, and videos journaled by an earlier
+            attempt are skipped and returned from the journal.
+        sink (RecordSink): Optional output sink every record is streamed into
+            as soon as it is scraped
+        phases (dict): Optional dict that seconds spent per phase (launch,
+            load, scroll, discovery, extraction) are added to
+        network (bool): Read metrics from the item-list API responses captured
+            while scrolling and extract in bulk, so video pages are only
+            opened for videos the capture missed. Needs a session created
+            with network capture on.
+        archive (PageArchive): Optional archive the profile page, the video
+            pages and captured responses are stored in for offline
+            re-extraction (see tiktok_archive.py)
+        large (bool): Large-profile mode: tiles are indexed while scrolling
+            and collapsed once harvested (see TileStream), and a
+            MemoryWatchdog recycles the browser between videos when it
+            outgrows MEMORY_LIMIT_MB
+        pool (BrowserPool): Optional pool the session is taken from when no
+            driver is given and returned to afterwards; a recycled session is
+            replaced through the pool
+        
+    Returns:
+        RecordBatch: Scraped video records (only new or re-fetched videos in
+            incremental mode), or UpToDate when incremental mode found
+            nothing to refresh
+        
+    Raises:
+        ProfileError: The profile page was blocked, no videos were found, or
+            every video failed
+    """
+    print(f"\n🚀 Starting TikTok profile scraping...")
+    print(f"📱 Profile URL: {url}")
+    
+    video_data = RecordBatch()
+    owns_driver = driver is None and pool is None
+    waiter = None
+    index = None
+    clock = PhaseClock(phases)
+    failed = 0
+    
+    done_positions = set()
+    
+    if incremental:
+        index = ProfileIndex.for_url(url)
+        print(f"📇 Incremental mode: {len(index)} videos already indexed")
+    
+    if journal is not None:
+        done_positions = journal.completed_positions(url)
+        if done_positions:
+            print(f"⏯️  Resuming: {len(done_positions)} videos already checkpointed for this profile")
+            for record in journal.records(url):
+                video_data.append(record)
+                if sink is not None:
+                    sink.write(url, record)
+    
+    def emit(position, record):
+        video_data.append(record)
+        METRICS.inc('videos_scraped_total', mode='network' if network else 'bulk' if bulk else 'legacy')
+        if sink is not None:
+            sink.write(url, record)
+        if index is not None:
+            index.update(record)
+        if journal is not None:
+            journal.record_video(url, position, record)
+    
+    try:
+        if driver is None:
+            clock.mark('launch')
+            if pool is not None:
+                driver = pool.acquire()
+            else:
+                print("🌐 Launching browser...")
+                driver = create_driver(network=network or None)
+        
+        waiter = AdaptiveWaiter(driver)
+        registry = selector_registry(driver)
+        capture = NetworkCapture(driver, archive, url) if network else None
+        stream = TileStream(driver, registry=registry, prune=True) if large else None
+        watchdog = MemoryWatchdog() if large else None
+        
+        if not load_profile_grid(driver, url, waiter, index, clock, capture, stream, watchdog):
+            raise ProfileError("No videos loaded on this profile")
+        if archive is not None:
+            archive.put(url, 'profile', driver.page_source)
+        
+        if bulk or network:
+            scrape_profile_bulk(driver, waiter, index, emit, done_positions, clock,
+                                capture.stats if capture is not None else None, archive, url)
+            return profile_result(video_data, incremental=incremental)
+        
+        # Index the loaded grid by video ID: one script call reads every
+        # tile's link and view count, in page order and without duplicates
+        clock.mark('discovery')
+        if stream is not None:
+            # Already indexed while scrolling, without another pass over the grid
+            video_index = stream.videos
+        else:
+            print("🔍 Indexing video tiles...")
+            video_index, container_selector, duplicates = index_profile_videos(driver, registry)
+            if video_index:
+                print(f"   ✅ Indexed {len(video_index)} videos ({container_selector})"
+                      + (f", {duplicates} duplicate tiles dropped" if duplicates else ""))
+        
+        video_count = len(video_index)
+        print(f"📹 Found {video_count} videos to scrape")
+        
+        if video_count == 0:
+            print("💡 Try scrolling down manually or check if the profile has videos")
+            raise ProfileError("No videos found on this profile")
+        
+        # Determine how many videos to scrape
+        videos_to_scrape = video_count if MAX_VIDEOS_TO_SCRAPE is None else min(video_count, MAX_VIDEOS_TO_SCRAPE)
         
         if MAX_VIDEOS_TO_SCRAPE is None:
             print(f"🎯 Will scrape all {videos_to_scrape} videos found")
         else:
             print(f"🎯 Will scrape {videos_to_scrape} videos (limited by MAX_VIDEOS_TO_SCRAPE = {MAX_VIDEOS_TO_SCRAPE})")
         
-        for i in range(videos_to_scrape):
+        clock.mark('extraction')
+        done_ids = journal.completed_video_ids(url) if journal is not None else set()
+        navigated = False
+        for i, (video_id, video_url, view_count) in enumerate(video_index[:videos_to_scrape]):
+            if video_id in done_ids:
+                continue
+            
+            # Incremental mode: skip videos that were scraped recently
+            if index is not None and not index.needs_refresh(video_id):
+                print(f"   📇 Video {i + 1}/{videos_to_scrape} is up to date - skipping")
+                continue
+            
+            # Every scraped video is checkpointed and the next one is opened by
+            # URL, so this is a safe point to swap in a fresh browser. A session
+            # the caller passed in is theirs, so it only gets the memory release.
+            if watchdog is not None and watchdog.check(driver) and (pool is not None or owns_driver):
+                if pool is not None:
+                    driver = pool.replace(driver)
+                else:
+                    print("♻️  Recycling browser session to free memory...")
+                    METRICS.inc('retries_total', stage='memory_recycle')
+                    try:
+                        driver.quit()
+                    except Exception:
+                        pass
+                    driver = create_driver(network=network or None)
+                waiter.driver = driver
+            
+            try:
+                # Add a random delay between videos (except before the first navigation)
+                if navigated:
+                    between_videos_delay = waiter.pause('between_videos')
+                    print(f"   ⏱️  Inter-video delay: {between_videos_delay:.1f}s")
+                
+                print(f"\n📹 Processing video {i + 1}/{videos_to_scrape}: {video_id}")
+                navigated = True
+                emit(i, scrape_video_page(driver, waiter, video_url, view_count, archive, url))
+                
+            except Exception as e:
+                # The next video is opened by URL, so no recovery navigation is needed
+                failed += 1
+                METRICS.inc('errors_total', stage='video')
+                print(f"❌ Error processing video {i + 1} ({video_id}): {e}")
+                continue
+        
+    except Exception as e:
+        METRICS.inc('errors_total', stage='profile')
+        print(f"❌ Error during scraping: {e}")
+        raise
+    
+    finally:
+        clock.stop()
+        if index is not None and video_data:
+            index.save()
+            print(f"📇 Index updated: {len(index)} videos known for this profile")
+        if waiter:
+            waiter.print_summary()
+        if driver:
+            print_session_memory(driver)
+        if driver and owns_driver:
+            print("🔒 Closing browser...")
+            driver.quit()
+        elif driver and pool is not None:
+            pool.release(driver)
+    
+    return profile_result(video_data, failed, incremental)
+
+class BrowserPool:
+    """
+    A fixed-size pool of long-lived WebDriver sessions.
+    
+    Sessions are launched lazily the first time a worker needs one and are
+    reused across profiles, so Chrome start-up and driver resolution are paid
+    once per session instead of once per profile. Sessions that die while
+    scraping are replaced on release.
+    """
+    
+    def __init__(self, size):
+        self.size = max(1, size)
+        self._idle = queue.Queue()
+        self._sessions = []
+        self._launched = 0
+        self._lock = threading.Lock()
+    
+    def _launch(self):
+        driver = create_driver()
+        with self._lock:
+            self._sessions.append(driver)
+        return driver
+    
+    def acquire(self):
+        """
+        Take an idle session, launching a new one while under capacity.
+        
+        Returns:
+            webdriver.Chrome: A browser session owned by the caller until released
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            can_launch = self._launched < self.size
+            if can_launch:
+                self._launched += 1
+        
+        if can_launch:
+            print("🌐 Launching pooled browser session...")
+            try:
+                return self._launch()
+            except Exception:
+                with self._lock:
+                    self._launched -= 1
+                raise
+        return self._idle.get()
+    
+    def release(self, driver):
+        """
+        Return a session to the pool, replacing it if the browser has died.
+        
+        Args:
+            driver: Session previously obtained from acquire()
+        """
+        if is_session_alive(driver):
+            self._idle.put(driver)
+            return
+        
+        print("♻️  Browser session died, replacing it...")
+        METRICS.inc('retries_total', stage='browser_restart')
+        with self._lock:
+            if driver in self._sessions:
+                self._sessions.remove(driver)
+            self._launched -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    def recycle(self, driver):
+        """
+        Quit a session that has grown too large; the next acquire() launches a fresh one.
+        
+        Args:
+            driver: Session previously obtained from acquire()
+        """
+        print("♻️  Recycling browser session to free memory...")
+        METRICS.inc('retries_total', stage='memory_recycle')
+        with self._lock:
+            if driver in self._sessions:
+                self._sessions.remove(driver)
+            self._launched -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    def replace(self, driver):
+        """
+        Recycle a session and take a fresh one in its place.
+        
+        Args:
+            driver: Session previously obtained from acquire()
+            
+        Returns:
+            webdriver.Chrome: The new session, owned by the caller until released
+        """
+        self.recycle(driver)
+        return self.acquire()
+    
+    def close(self):
+        """Quit every session owned by the pool."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+            self._launched = 0
+        for driver in sessions:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        print(f"🔒 Closed {len(sessions)} pooled browser session(s)")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def scrape_profiles_parallel(urls, workers=DEFAULT_WORKERS, **scrape_options):
+    """
+    Scrape several profiles concurrently using a pool of warm browser sessions.
+    
+    Args:
+        urls (list): TikTok profile URLs
+        workers (int): Number of concurrent browser sessions
+        **scrape_options: Keyword options passed to scrape_tiktok_profile()
+        
+    Yields:
+        tuple: (index, url, video_data, error) as each profile finishes, where
+            index is the 1-based queue position and error is None on success
+    """
+    workers = max(1, min(workers, len(urls)))
+    
+    # A combined output keeps queue order, as a sequential run would write it
+    ordered = None
+    sink = scrape_options.get('sink')
+    if sink is not None and not sink.separate_files:
+        ordered = QueueOrderSink(sink, urls)
+        scrape_options = dict(scrape_options, sink=ordered)
+    
+    with BrowserPool(workers) as pool:
+        def run(position, url):
+            try:
+                return scrape_tiktok_profile(url, pool=pool, **scrape_options)
+            finally:
+                if ordered is not None:
+                    ordered.finish(position)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(run, i - 1, url): (i, url) for i, url in enumerate(urls, 1)}
+                for future in as_completed(futures):
+                    i, url = futures[future]
+                    try:
+                        yield i, url, future.result(), None
+                    except Exception as e:
+                        yield i, url, [], e
+        finally:
+            if ordered is not None:
+                ordered.release()
+
+def scrape_profiles_sequential(urls, **scrape_options):
+    """
+    Scrape profiles one at a time, reusing a single browser session.
+    
+    Args:
+        urls (list): TikTok profile URLs
+        **scrape_options: Keyword options passed to scrape_tiktok_profile()
+        
+    Yields:
+        tuple: (index, url, video_data, error) for each profile in order
+    """
+    with BrowserPool(1) as pool:
+        for i, url in enumerate(urls, 1):
+            print(f"\n📱 Processing Profile {i}/{len(urls)}")
+            print(f"🔗 URL: {url}")
+            print("-" * 40)
+            
             try:
-                # Add a random delay between videos (except for the first one)
-                if i > 0:
-                    between_videos_delay = random_delay(1, 2)
-                    print(f"   ⏱️  Inter-video delay: {between_videos_delay:.1f}s")
-                
-                print(f"\n📹 Processing video {i + 1}/{videos_to_scrape}...")
-                
-                # Re-find video containers (they might change after navigation)
-                try:
-                    video_containers = driver.find_elements(By.CSS_SELECTOR, 'a[href*="/video/"]')
-                    if not video_containers:
-                        video_containers = driver.find_elements(By.CSS_SELECTOR, 'a.css-1mdo0pl-AVideoContainer')
-                    if not video_containers:
-                        video_containers = driver.find_elements(By.CSS_SELECTOR, '[data-e2e="user-post-item"]')
-                except:
-                    print(f"❌ Could not find video containers after navigation")
-                    break
-                
-                if i >= len(video_containers):
-                    print(f"❌ Video {i + 1} not found in updated container list")
-                    break
-                
-                video_container = video_containers[i]
-                
-                # Extract view count from the profile page using TikTok's actual selector
-                view_count = "0"
+                yield i, url, scrape_tiktok_profile(url, pool=pool, **scrape_options), None
+            except Exception as e:
+                yield i, url, [], e
+            
+            # Add delay between profiles if there are more to process
+            if i < len(urls):
+                print(f"\n⏳ Waiting before next profile...")
+                between_profiles_delay = random_delay(*POLITENESS_JITTER)
+                print(f"   ⏱️  Inter-profile delay: {between_profiles_delay:.1f}s")
+
+def discover_profile_videos(url, driver, index=None, skip_ids=None, archive=None, on_videos=None, large=False):
+    """
+    Stage one of the pipeline: load a profile's grid and list the videos to fetch.
+    
+    Args:
+        url (str): TikTok profile URL
+        driver: Selenium WebDriver instance
+        index (ProfileIndex): Optional index; videos that don't need a refresh are left out
+        skip_ids (set): Video IDs that were already scraped
+        archive (PageArchive): Optional archive the loaded profile page is stored in
+        on_videos (callable): Optional ``on_videos(videos)``. When given, tiles
+            are streamed while the grid scrolls (see TileStream) and every
+            batch of videos to fetch is passed on as soon as it renders.
+        large (bool): Index tiles while scrolling and collapse them once
+            harvested, and keep the browser's memory in check (see
+            scrape_tiktok_profile)
+        
+    Returns:
+        list: (position, video_id, video_url, raw_views) per video, in grid order
+        
+    Raises:
+        ProfileError: The profile page was blocked or no video tiles loaded
+    """
+    waiter = AdaptiveWaiter(driver)
+    skip_ids = skip_ids or set()
+    positions = []
+    selected = []
+    
+    def select(videos):
+        # Positions continue across streamed batches
+        batch = []
+        for video_id, video_url, views in videos:
+            position = len(positions)
+            positions.append(video_id)
+            if MAX_VIDEOS_TO_SCRAPE is not None and position >= MAX_VIDEOS_TO_SCRAPE:
+                continue
+            if video_id in skip_ids or (index is not None and not index.needs_refresh(video_id)):
+                continue
+            batch.append((position, video_id, video_url, views))
+        selected.extend(batch)
+        return batch
+    
+    def stream_batch(videos):
+        batch = select(videos)
+        if batch:
+            on_videos(batch)
+    
+    stream = None
+    if on_videos is not None or large:
+        stream = TileStream(driver, stream_batch if on_videos is not None else None, prune=large)
+    watchdog = MemoryWatchdog() if large else None
+    if not load_profile_grid(driver, url, waiter, index, stream=stream, watchdog=watchdog):
+        raise ProfileError("No videos loaded on this profile")
+    if archive is not None:
+        archive.put(url, 'profile', driver.page_source)
+    
+    if stream is None:
+        videos, container_selector, duplicates = index_profile_videos(driver)
+        print(f"   ✅ Indexed {len(videos)} videos ({container_selector})"
+              + (f", {duplicates} duplicate tiles dropped" if duplicates else ""))
+        select(videos)
+    elif on_videos is None:
+        select(stream.videos)
+    return selected
+
+def scrape_profiles_pipeline(urls, workers=DEFAULT_WORKERS, detail_workers=DEFAULT_DETAIL_WORKERS,
+                             incremental=False, journal=None, sink=None, archive=None, stream=False, large=False):
+    """
+    Scrape profiles in two stages connected by a shared queue of video jobs.
+    
+    Discovery workers load each profile's grid and queue one job per video.
+    Detail workers, each with its own browser session, take jobs from any
+    profile and open the video URL directly. The two stages are sized
+    independently, so a few sessions can keep discovering while many fetch
+    video pages. The queue is bounded by VIDEO_QUEUE_SIZE, which holds
+    discovery back when the detail stage falls behind.
+    
+    Args:
+        urls (list): TikTok profile URLs
+        workers (int): Browser sessions discovering profiles
+        detail_workers (int): Browser sessions opening video pages
+        incremental (bool): Only fetch new or stale videos (see ProfileIndex)
+        journal (RunJournal): Optional checkpoint journal
+        sink (RecordSink): Optional output sink records are streamed into; a
+            combined output is written in queue order (see QueueOrderSink)
+        archive (PageArchive): Optional archive for the raw pages
+        stream (bool): Queue each video as its tile renders while the profile
+            scrolls, so detail workers start before discovery has finished
+        large (bool): Large-profile mode (see scrape_tiktok_profile); detail
+            sessions are recycled when they outgrow MEMORY_LIMIT_MB
+        
+    Yields:
+        tuple: (index, url, video_data, error) as each profile's last video
+            is fetched, with the same contract as scrape_profiles_parallel()
+    """
+    workers = max(1, min(workers, len(urls)))
+    detail_workers = max(1, detail_workers)
+    jobs = queue.Queue(maxsize=VIDEO_QUEUE_SIZE)
+    results = queue.Queue()
+    profiles = {}
+    lock = threading.Lock()
+    stopping = threading.Event()
+    
+    # Detail workers finish videos of many profiles at once; a combined output keeps queue order
+    ordered = None
+    if sink is not None and not sink.separate_files:
+        sink = ordered = QueueOrderSink(sink, urls)
+    
+    def finish_if_done(url):
+        # Called with the lock held
+        state = profiles[url]
+        if state['discovered'] and state['pending'] == 0:
+            if state['index'] is not None and state['data']:
+                state['index'].save()
+            data, error = state['data'], state['error']
+            if error is None:
                 try:
-                    # Use TikTok's exact selector for video views
-                    view_element = video_container.find_element(By.CSS_SELECTOR, 'strong[data-e2e="video-views"]')
-                    view_count = view_element.text
-                    print(f"   ✅ Found profile view count: {view_count}")
-                except:
+                    data = profile_result(data, state['failed'], incremental)
+                except ProfileError as e:
+                    data, error = RecordBatch(), e
+            if ordered is not None:
+                ordered.finish(state['position'] - 1)
+            results.put((state['position'], url, data, error))
+    
+    def discover(i, url, pool):
+        state = {'position': i, 'data': RecordBatch(), 'pending': 0, 'discovered': False, 'index': None,
+                 'failed': 0, 'error': None}
+        with lock:
+            profiles[url] = state
+        
+        def enqueue(videos):
+            with lock:
+                state['pending'] += len(videos)
+            for position, video_id, video_url, views in videos:
+                # Wait while the queue is full, unless the run is being stopped
+                while not stopping.is_set():
                     try:
-                        # Alternative selector with class
-                        view_element = video_container.find_element(By.CSS_SELECTOR, 'strong.video-count')
-                        view_count = view_element.text
-                        print(f"   ✅ Found profile view count (alt): {view_count}")
-                    except:
-                        print(f"   ⚠️  No view count found on profile page")
+                        jobs.put((url, position, video_id, video_url, views), timeout=1)
+                        break
+                    except queue.Full:
                         pass
-                
-                # Click on the video to open detailed view
-                click_delay = random_delay(1, 2)  # Random delay before click
-                print(f"   ⏱️  Pre-click delay: {click_delay:.1f}s")
-                
-                driver.execute_script("arguments[0].click();", video_container)
-                
-                # Random delay for video page to load
-                load_delay = random_delay(1, 2)  # Longer delay for video loading
-                print(f"   ⏱️  Video load delay: {load_delay:.1f}s")
-                
-                # Extract detailed metrics from the video page
-                likes = "0"
-                bookmarks = "0" 
-                comments = "0"
-                
-                print(f"   🔍 Extracting metrics from video page...")
-                
-                # Use TikTok's exact selectors for individual video page metrics
-                # These selectors are based on the actual TikTok HTML structure
-                
-                # Extract likes using TikTok's browse-like-count selector
-                try:
-                    like_element = driver.find_element(By.CSS_SELECTOR, 'strong[data-e2e="browse-like-count"]')
-                    likes = like_element.text.strip()
-                    print(f"   ✅ Found likes: {likes} (TikTok selector: browse-like-count)")
-                except:
-                    print(f"   ⚠️  No likes found with TikTok selector")
-                
-                # Extract bookmarks using TikTok's undefined-count selector 
-                # Note: TikTok actually uses "undefined-count" for bookmarks/saves - this is their internal naming!
-                try:
-                    bookmark_element = driver.find_element(By.CSS_SELECTOR, 'strong[data-e2e="undefined-count"]')
-                    bookmarks = bookmark_element.text.strip()
-                    print(f"   ✅ Found bookmarks: {bookmarks} (TikTok selector: undefined-count)")
-                except:
-                    print(f"   ⚠️  No bookmarks found with TikTok selector")
-                
-                # Extract comments using TikTok's browse-comment-count selector
-                try:
-                    comment_element = driver.find_element(By.CSS_SELECTOR, 'strong[data-e2e="browse-comment-count"]')
-                    comments = comment_element.text.strip()
-                    print(f"   ✅ Found comments: {comments} (TikTok selector: browse-comment-count)")
-                except:
-                    print(f"   ⚠️  No comments found with TikTok selector")
-                
-                # Try to get view count from individual video page if we didn't get it from profile
-                if view_count == "0":
-                    try:
-                        # Try to find view count on the individual video page
-                        view_element = driver.find_element(By.CSS_SELECTOR, 'strong[data-e2e="video-views"]')
-                        view_count = view_element.text.strip()
-                        print(f"   ✅ Found views on video page: {view_count}")
-                    except:
-                        print(f"   ⚠️  No view count found on video page either")
-                
-                # If any metrics are still missing, try fallback selectors (but TikTok's selectors should work)
-                if likes == "0" or comments == "0" or bookmarks == "0":
-                    print(f"   🔄 Some metrics missing, trying fallback selectors...")
-                    
-                    if likes == "0":
-                        try:
-                            # Fallback like selectors
-                            fallback_like = driver.find_element(By.CSS_SELECTOR, 'strong[data-e2e*="like"]')
-                            likes = fallback_like.text.strip()
-                            print(f"   ✅ Found likes (fallback): {likes}")
-                        except:
-                            pass
-                    
-                    if comments == "0":
-                        try:
-                            # Fallback comment selectors
-                            fallback_comment = driver.find_element(By.CSS_SELECTOR, 'strong[data-e2e*="comment"]')
-                            comments = fallback_comment.text.strip()
-                            print(f"   ✅ Found comments (fallback): {comments}")
-                        except:
-                            pass
-                    
-                    if bookmarks == "0":
-                        try:
-                            # Fallback bookmark selectors
-                            fallback_bookmark = driver.find_element(By.CSS_SELECTOR, 'strong[data-e2e*="bookmark"], strong[data-e2e*="collect"], strong[data-e2e*="save"]')
-                            bookmarks = fallback_bookmark.text.strip()
-                            print(f"   ✅ Found bookmarks (fallback): {bookmarks}")
-                        except:
-                            pass
-                
-                # Get video URL
-                current_url = driver.current_url
-                
-                # Parse the counts
-                parsed_views = parse_count(view_count)
-                parsed_likes = parse_count(likes)
-                parsed_bookmarks = parse_count(bookmarks)
-                parsed_comments = parse_count(comments)
-                
-                video_info = {
-                    'video_url': current_url,
-                    'views': parsed_views,
-                    'likes': parsed_likes,
-                    'bookmarks': parsed_bookmarks,
-                    'comments': parsed_comments,
-                    'views_raw': view_count,
-                    'likes_raw': likes,
-                    'bookmarks_raw': bookmarks,
-                    'comments_raw': comments,
-                    'scraped_at': datetime.now().isoformat()
-                }
-                
-                video_data.append(video_info)
-                
-                print(f"   👁️  Views: {view_count} ({parsed_views:,})")
-                print(f"   ❤️  Likes: {likes} ({parsed_likes:,})")
-                print(f"   🔖 Bookmarks: {bookmarks} ({parsed_bookmarks:,})")
-                print(f"   💬 Comments: {comments} ({parsed_comments:,})")
-                
-                # Go back to profile
-                driver.back()
-                back_delay = random_delay(1, 2)  # Random delay after going back
-                print(f"   ⏱️  Back navigation delay: {back_delay:.1f}s")
-                
-            except Exception as e:
-                print(f"❌ Error processing video {i + 1}: {e}")
-                try:
-                    driver.back()
-                    error_delay = random_delay(1, 2)  # Random delay after error
-                    print(f"   ⏱️  Error recovery delay: {error_delay:.1f}s")
-                except:
-                    pass
+        
+        videos = []
+        try:
+            print(f"\n🔎 Discovering profile {i}/{len(urls)}: {url}")
+            if incremental:
+                state['index'] = ProfileIndex.for_url(url)
+            skip_ids = set()
+            if journal is not None:
+                skip_ids = journal.completed_video_ids(url)
+                for record in journal.records(url):
+                    state['data'].append(record)
+                    if sink is not None:
+                        sink.write(url, record)
+            
+            driver = pool.acquire()
+            try:
+                # Streamed videos are queued during the scroll, the others once it is done
+                videos = discover_profile_videos(url, driver, state['index'], skip_ids, archive,
+                                                 enqueue if stream else None, large)
+            finally:
+                pool.release(driver)
+            if not stream:
+                enqueue(videos)
+            print(f"📬 Queued {len(videos)} videos from {url}")
+        except Exception as e:
+            METRICS.inc('errors_total', stage='profile')
+            print(f"❌ Error discovering {url}: {e}")
+            state['error'] = e
+        
+        with lock:
+            state['discovered'] = True
+            finish_if_done(url)
+    
+    def fetch_videos(pool):
+        driver = None
+        waiter = None
+        watchdog = MemoryWatchdog() if large else None
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            url, position, video_id, video_url, views = job
+            if stopping.is_set():
                 continue
+            record = None
+            try:
+                if driver is None:
+                    driver = pool.acquire()
+                    waiter = AdaptiveWaiter(driver)
+                else:
+                    waiter.pause('between_videos')
+                print(f"\n📹 @{get_profile_name(url, 0)} video {position + 1}: {video_id}")
+                record = scrape_video_page(driver, waiter, video_url, views, archive, url)
+            except Exception as e:
+                METRICS.inc('errors_total', stage='video')
+                print(f"❌ Error processing video {video_id}: {e}")
+                if driver is not None and not is_session_alive(driver):
+                    pool.release(driver)
+                    driver = None
+            
+            if driver is not None and watchdog is not None and watchdog.check(driver):
+                pool.recycle(driver)
+                driver = None
+            
+            with lock:
+                state = profiles[url]
+                if record is None:
+                    state['failed'] += 1
+                else:
+                    state['data'].append(record)
+                    METRICS.inc('videos_scraped_total', mode='pipeline')
+                    if sink is not None:
+                        sink.write(url, record)
+                    if state['index'] is not None:
+                        state['index'].update(record)
+                    if journal is not None:
+                        journal.record_video(url, position, record)
+                state['pending'] -= 1
+                finish_if_done(url)
         
-    except Exception as e:
-        print(f"❌ Error during scraping: {e}")
+        if driver is not None:
+            pool.release(driver)
     
-    finally:
-        if driver:
-            print("🔒 Closing browser...")
-            driver.quit()
+    with BrowserPool(workers) as discovery_pool, BrowserPool(detail_workers) as detail_pool:
+        fetchers = [threading.Thread(target=fetch_videos, args=(detail_pool,), name=f'tiktok-detail-{n}', daemon=True)
+                    for n in range(detail_workers)]
+        for thread in fetchers:
+            thread.start()
+        
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            for i, url in enumerate(urls, 1):
+                executor.submit(discover, i, url, discovery_pool)
+            for _ in urls:
+                yield results.get()
+        finally:
+            # On an early exit, queued jobs are dropped rather than fetched
+            stopping.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            for _ in fetchers:
+                jobs.put(None)
+            for thread in fetchers:
+                thread.join()
+            if ordered is not None:
+                ordered.release()
+
+def get_profile_name(url, index):
+    """
+    Derive a profile name from a TikTok profile URL.
     
-    return video_data
+    Args:
+        url (str): TikTok profile URL
+        index (int): Queue position, used when the URL has no @username
+        
+    Returns:
+        str: Profile name
+    """
+    return url.split('/@')[1].split('?')[0].split('/')[0] if '/@' in url else f"profile_{index}"
 
 def save_to_csv(video_data, filename=None):
     """
     Save video data to CSV file.
     
     Args:
-        video_data (list): List of video data dictionaries
+        video_data (RecordBatch): Video records (any iterable of records works)
         filename (str): Optional filename, defaults to timestamp-based name
     """
     if not video_data:
         print("❌ No data to save")
         return
+    if not isinstance(video_data, RecordBatch):
+        video_data = RecordBatch(video_data)
     
     if not filename:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -524,40 +2653,37 @@ def save_to_csv(video_data, filename=None):
     filepath = os.path.join('data', filename)
     
     with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['video_url', 'views', 'likes', 'bookmarks', 'comments', 
-                     'views_raw', 'likes_raw', 'bookmarks_raw', 'comments_raw', 'scraped_at']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.writer(csvfile)
         
-        writer.writeheader()
-        for video in video_data:
-            writer.writerow(video)
+        writer.writerow(CSV_FIELDNAMES)
+        writer.writerows(video_data.rows(CSV_FIELDNAMES))
     
     print(f"✅ Saved {len(video_data)} videos to {filepath}")
     
     # Print summary
-    total_views = sum(video['views'] for video in video_data)
-    total_likes = sum(video['likes'] for video in video_data)
-    total_bookmarks = sum(video['bookmarks'] for video in video_data)
-    total_comments = sum(video['comments'] for video in video_data)
+    totals = video_data.totals()
     
     print(f"\n📊 Scraping Summary:")
-    print(f"   📹 Videos scraped: {len(video_data)}")
-    print(f"   👁️  Total views: {total_views:,}")
-    print(f"   ❤️  Total likes: {total_likes:,}")
-    print(f"   🔖 Total bookmarks: {total_bookmarks:,}")
-    print(f"   💬 Total comments: {total_comments:,}")
+    print(f"   📹 Videos scraped: {totals['videos']}")
+    print(f"   👁️  Total views: {totals['views']:,}")
+    print(f"   ❤️  Total likes: {totals['likes']:,}")
+    print(f"   🔖 Total bookmarks: {totals['bookmarks']:,}")
+    print(f"   💬 Total comments: {totals['comments']:,}")
 
 def save_to_csv_combined(video_data, filename=None):
     """
     Save combined video data from multiple profiles to CSV file.
     
     Args:
-        video_data (list): List of video data dictionaries with profile info
+        video_data (RecordBatch): Video records tagged with their profile
+            (any iterable of records with profile fields works)
         filename (str): Optional filename, defaults to timestamp-based name
     """
     if not video_data:
         print("❌ No data to save")
         return
+    if not isinstance(video_data, RecordBatch):
+        video_data = RecordBatch(video_data)
     
     if not filename:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -570,33 +2696,15 @@ def save_to_csv_combined(video_data, filename=None):
     filepath = os.path.join('data', filename)
     
     with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['profile_name', 'profile_url', 'video_url', 'views', 'likes', 'bookmarks', 'comments', 
-                     'views_raw', 'likes_raw', 'bookmarks_raw', 'comments_raw', 'scraped_at']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.writer(csvfile)
         
-        writer.writeheader()
-        for video in video_data:
-            writer.writerow(video)
+        writer.writerow(COMBINED_CSV_FIELDNAMES)
+        writer.writerows(video_data.rows(COMBINED_CSV_FIELDNAMES))
     
     print(f"✅ Saved {len(video_data)} videos from multiple profiles to {filepath}")
     
     # Print summary by profile
-    profiles = {}
-    for video in video_data:
-        profile_name = video.get('profile_name', 'unknown')
-        if profile_name not in profiles:
-            profiles[profile_name] = {
-                'videos': 0,
-                'views': 0,
-                'likes': 0,
-                'bookmarks': 0,
-                'comments': 0
-            }
-        profiles[profile_name]['videos'] += 1
-        profiles[profile_name]['views'] += video.get('views', 0)
-        profiles[profile_name]['likes'] += video.get('likes', 0)
-        profiles[profile_name]['bookmarks'] += video.get('bookmarks', 0)
-        profiles[profile_name]['comments'] += video.get('comments', 0)
+    profiles = video_data.totals_by_profile()
     
     print(f"\n📊 Combined Scraping Summary by Profile:")
     for profile_name, stats in profiles.items():
@@ -607,91 +2715,646 @@ def save_to_csv_combined(video_data, filename=None):
         print(f"      🔖 Bookmarks: {stats['bookmarks']:,}")
         print(f"      💬 Comments: {stats['comments']:,}")
 
-def main():
+class RecordSink:
     """
-    Main function to run the TikTok scraper.
+    Streaming output for scraped video records.
+    
+    Records are written as they are scraped, buffered column-wise in a
+    RecordBatch of ``batch_size`` rows. Only running per-profile totals are
+    kept in memory,
+    so memory use depends on the number of profiles rather than the number of
+    videos. With ``separate_files`` each profile gets its own file, which is
+    closed by end_profile(); otherwise all profiles share one combined file.
+    Subclasses implement the file format.
     """
-    try:
-        # Step 1: Get TikTok URLs from user
-        tiktok_urls = get_tiktok_urls()
+    
+    extension = None
+    default_batch_size = SINK_BATCH_SIZE
+    
+    def __init__(self, separate_files=False, batch_size=None, output_dir='data'):
+        self.separate_files = separate_files
+        self.batch_size = max(1, batch_size or self.default_batch_size)
+        self.output_dir = output_dir
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.profiles = {}
+        self.closed = False
+        self.announce = True
+        self._outputs = {}
+        self._lock = threading.Lock()
+    
+    def _path_for(self, profile_name):
+        if self.separate_files:
+            filename = f"{profile_name}_{self.timestamp}.{self.extension}"
+        else:
+            filename = f"tiktok_scrape_combined_{self.timestamp}.{self.extension}"
+        return os.path.join(self.output_dir, filename)
+    
+    def _output_for(self, profile_name):
+        key = profile_name if self.separate_files else None
+        output = self._outputs.get(key)
+        if output is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = self._path_for(profile_name)
+            fieldnames = CSV_FIELDNAMES if self.separate_files else COMBINED_CSV_FIELDNAMES
+            output = {'path': path, 'rows': 0, 'buffer': RecordBatch(), 'handle': self._open(path, fieldnames)}
+            self._outputs[key] = output
+        return output
+    
+    def _flush_output(self, output):
+        if output['buffer']:
+            with METRICS.timer('sink_write_seconds', format=self.extension):
+                self._write_rows(output['handle'], output['buffer'])
+            METRICS.inc('sink_rows_total', len(output['buffer']), format=self.extension)
+            output['rows'] += len(output['buffer'])
+            output['buffer'] = RecordBatch()
+    
+    def write(self, profile_url, record):
+        """
+        Add one video record to the output.
+        
+        Args:
+            profile_url (str): Profile the video belongs to
+            record (VideoRecord): Video record
+        """
+        profile_name = get_profile_name(profile_url, 0)
+        
+        with self._lock:
+            stats = self.profiles.get(profile_name)
+            if stats is None:
+                stats = self.profiles[profile_name] = {'videos': 0, 'views': 0, 'likes': 0, 'bookmarks': 0, 'comments': 0}
+            stats['videos'] += 1
+            for metric in ('views', 'likes', 'bookmarks', 'comments'):
+                stats[metric] += record.get(metric, 0)
+            
+            output = self._output_for(profile_name)
+            output['buffer'].append(record, profile_name, profile_url)
+            if len(output['buffer']) >= self.batch_size:
+                self._flush_output(output)
+    
+    def end_profile(self, profile_url):
+        """
+        Finish a profile: in separate-file mode its file is flushed and closed.
         
-        if not tiktok_urls:
-            print("❌ No URLs provided")
+        Args:
+            profile_url (str): Profile URL
+        """
+        if not self.separate_files:
             return
         
-        # Step 2: Ask user for output preference
-        print("\n📂 Output Options:")
-        print("  1. Separate CSV file for each profile")
-        print("  2. Combined CSV file for all profiles")
+        profile_name = get_profile_name(profile_url, 0)
+        with self._lock:
+            output = self._outputs.pop(profile_name, None)
+            if output is None:
+                return
+            self._flush_output(output)
+            self._close(output['handle'])
+            stats = self.profiles[profile_name]
         
-        while True:
-            try:
-                choice = input("Choose option (1 or 2): ").strip()
-                if choice == '1':
-                    separate_files = True
-                    break
-                elif choice == '2':
-                    separate_files = False
-                    break
-                else:
-                    print("❌ Please enter 1 or 2")
-            except KeyboardInterrupt:
-                print("\n👋 Goodbye!")
+        if not self.announce:
+            return
+        print(f"✅ Saved {output['rows']} videos to {output['path']}")
+        print(f"\n📊 Scraping Summary:")
+        self._print_stats(stats, indent="   ")
+    
+    def flush(self):
+        """Write every buffered record to disk."""
+        with self._lock:
+            for output in self._outputs.values():
+                self._flush_output(output)
+    
+    def close(self):
+        """Flush and close every open output."""
+        with self._lock:
+            if self.closed:
                 return
+            self.closed = True
+            outputs, self._outputs = list(self._outputs.values()), {}
+            for output in outputs:
+                self._flush_output(output)
+                self._close(output['handle'])
         
-        # Step 3: Process each URL
-        all_video_data = []
-        successful_scrapes = 0
+        if self.announce and not self.separate_files:
+            for output in outputs:
+                print(f"✅ Saved {output['rows']} videos from multiple profiles to {output['path']}")
+            if self.profiles:
+                print(f"\n📊 Combined Scraping Summary by Profile:")
+                for profile_name, stats in self.profiles.items():
+                    print(f"   👤 @{profile_name}:")
+                    self._print_stats(stats, indent="      ")
+    
+    def totals(self):
+        """
+        Sum the running totals over all profiles.
         
-        print(f"\n🚀 Starting to process {len(tiktok_urls)} profile(s)...")
-        print("=" * 60)
+        Returns:
+            dict: Total videos, views, likes, bookmarks and comments
+        """
+        totals = {'videos': 0, 'views': 0, 'likes': 0, 'bookmarks': 0, 'comments': 0}
+        with self._lock:
+            for stats in self.profiles.values():
+                for key in totals:
+                    totals[key] += stats[key]
+        return totals
+    
+    @staticmethod
+    def _print_stats(stats, indent):
+        print(f"{indent}📹 Videos: {stats['videos']}")
+        print(f"{indent}👁️  Views: {stats['views']:,}")
+        print(f"{indent}❤️  Likes: {stats['likes']:,}")
+        print(f"{indent}🔖 Bookmarks: {stats['bookmarks']:,}")
+        print(f"{indent}💬 Comments: {stats['comments']:,}")
+    
+    def _open(self, path, fieldnames):
+        raise NotImplementedError
+    
+    def _write_rows(self, handle, batch):
+        raise NotImplementedError
+    
+    def _close(self, handle):
+        raise NotImplementedError
+
+class CsvSink(RecordSink):
+    """Streams records to CSV files with the same columns as save_to_csv()."""
+    
+    extension = 'csv'
+    
+    def _open(self, path, fieldnames):
+        f = open(path, 'w', newline='', encoding='utf-8')
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        return f, writer, fieldnames
+    
+    def _write_rows(self, handle, batch):
+        f, writer, fieldnames = handle
+        writer.writerows(batch.rows(fieldnames))
+        f.flush()
+    
+    def _close(self, handle):
+        handle[0].close()
+
+class NdjsonSink(RecordSink):
+    """Streams records as newline-delimited JSON, one object per video."""
+    
+    extension = 'ndjson'
+    
+    def _open(self, path, fieldnames):
+        return open(path, 'w', encoding='utf-8'), fieldnames
+    
+    def _write_rows(self, handle, batch):
+        f, fieldnames = handle
+        f.write(''.join(json.dumps(dict(zip(fieldnames, row))) + '\n' for row in batch.rows(fieldnames)))
+        f.flush()
+    
+    def _close(self, handle):
+        handle[0].close()
+
+class ParquetSink(RecordSink):
+    """
+    Appends records as metric snapshots to the Parquet snapshot store.
+    
+    Each flushed batch becomes a row group of a part file in the date
+    partition of each row's scrape time in tiktok_store.SnapshotStore. Part
+    files are moved into place when closed, and every scrape adds to the same
+    queryable dataset instead of creating a disconnected file. When the sink
+    is closed the dashboard's growth analytics are recomputed from the store
+    (see tiktok_analytics). Needs pyarrow.
+    """
+    
+    extension = 'parquet'
+    default_batch_size = 1000
+    
+    def __init__(self, separate_files=False, batch_size=None, output_dir=None):
+        import tiktok_store
+        self.store = tiktok_store.SnapshotStore(output_dir or tiktok_store.SNAPSHOT_DIR)
+        super().__init__(separate_files, batch_size, self.store.root)
+    
+    def _path_for(self, profile_name):
+        return self.store.part_path(profile_name if self.separate_files else 'combined')
+    
+    def _open(self, path, fieldnames):
+        return self.store.open_writer(path)
+    
+    def _write_rows(self, handle, batch):
+        handle.write_rows(batch)
+    
+    def _close(self, handle):
+        handle.close()
+    
+    def close(self):
+        """Close the part files, then recompute the growth analytics served by the dashboard."""
+        if self.closed:
+            return
+        super().close()
+        try:
+            import tiktok_analytics
+            print("📈 Recomputing growth analytics...")
+            tiktok_analytics.refresh_analytics(self.store)
+        except ImportError as e:
+            print(f"⚠️  Growth analytics skipped: {e}")
+        except Exception as e:
+            # The snapshots are already written; stale analytics must not fail the scrape
+            METRICS.inc('errors_total', stage='analytics')
+            print(f"⚠️  Growth analytics failed: {e}")
+
+class SqliteSink(RecordSink):
+    """
+    Writes records into the SQLite metrics database (see tiktok_db).
+    
+    There is always a single database, whatever the separate/combined choice.
+    When the sink is closed the dashboard rollups are rebuilt and exported.
+    """
+    
+    extension = 'db'
+    default_batch_size = 500
+    
+    def __init__(self, separate_files=False, batch_size=None, output_dir=None):
+        import tiktok_db
+        self.db_path = os.path.join(output_dir, os.path.basename(tiktok_db.DB_PATH)) if output_dir else tiktok_db.DB_PATH
+        super().__init__(False, batch_size, os.path.dirname(self.db_path) or '.')
+    
+    def _path_for(self, profile_name):
+        return self.db_path
+    
+    def _open(self, path, fieldnames):
+        import tiktok_db
+        return tiktok_db.MetricsDatabase(path)
+    
+    def _write_rows(self, handle, batch):
+        rows = batch.to_dicts()
+        for row in rows:
+            row['video_id'] = extract_video_id(row['video_url'])
+        handle.insert_snapshots([row for row in rows if row['video_id']])
+    
+    def _close(self, handle):
+        print("🗄️  Rebuilding dashboard rollups...")
+        handle.rebuild()
+        handle.close()
+
+class MultiSink:
+    """
+    Fans records out to several sinks.
+    
+    Only the first sink prints summaries, and totals() comes from it.
+    """
+    
+    def __init__(self, sinks):
+        self.sinks = sinks
+        self.separate_files = sinks[0].separate_files
+        for sink in sinks[1:]:
+            sink.announce = False
+    
+    def write(self, profile_url, record):
+        for sink in self.sinks:
+            sink.write(profile_url, record)
+    
+    def end_profile(self, profile_url):
+        for sink in self.sinks:
+            sink.end_profile(profile_url)
+    
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+    
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+    
+    def totals(self):
+        return self.sinks[0].totals()
+
+class QueueOrderSink:
+    """
+    Writes profiles that are scraped concurrently in queue order.
+    
+    Records of the profile at the head of the queue go straight to the
+    wrapped sink. Records of later profiles are held until every profile
+    queued before them has finished, so a combined file lists profiles in
+    the order they were queued. Only profiles that finish ahead of their
+    turn are held in memory.
+    """
+    
+    def __init__(self, sink, urls):
+        self.sink = sink
+        self.separate_files = sink.separate_files
+        self.urls = list(urls)
+        self.head = 0
+        self.finished = set()
+        self.held = {}
+        self._lock = threading.Lock()
+    
+    def write(self, profile_url, record):
+        with self._lock:
+            if self.head < len(self.urls) and profile_url == self.urls[self.head]:
+                self.sink.write(profile_url, record)
+            else:
+                self.held.setdefault(profile_url, []).append(record)
+    
+    def finish(self, position):
+        """
+        Mark a profile as finished and write the held profiles that are now next in line.
         
-        for i, url in enumerate(tiktok_urls, 1):
-            print(f"\n📱 Processing Profile {i}/{len(tiktok_urls)}")
-            print(f"🔗 URL: {url}")
-            print("-" * 40)
+        Args:
+            position (int): 0-based queue position of the profile
+        """
+        with self._lock:
+            self.finished.add(position)
+            while self.head in self.finished:
+                self.head += 1
+                if self.head < len(self.urls):
+                    url = self.urls[self.head]
+                    for record in self.held.pop(url, []):
+                        self.sink.write(url, record)
+    
+    def release(self):
+        """Write whatever is still held, in queue order (e.g. after an interruption)."""
+        with self._lock:
+            for url in self.urls[self.head:]:
+                for record in self.held.pop(url, []):
+                    self.sink.write(url, record)
+    
+    def end_profile(self, profile_url):
+        self.sink.end_profile(profile_url)
+    
+    def flush(self):
+        self.sink.flush()
+    
+    def close(self):
+        self.release()
+        self.sink.close()
+    
+    def totals(self):
+        return self.sink.totals()
+
+SINKS = {
+    'csv': CsvSink,
+    'ndjson': NdjsonSink,
+    'parquet': ParquetSink,
+    'sqlite': SqliteSink,
+}
+
+def create_sink(formats, separate_files=False, batch_size=None):
+    """
+    Build the output sink for one or more formats.
+    
+    Args:
+        formats (list): Keys of SINKS
+        separate_files (bool): One file per profile instead of a combined file
+        batch_size (int): Optional records per flush, defaults per format
+        
+    Returns:
+        RecordSink or MultiSink: The sink main() streams records into
+    """
+    sinks = [SINKS[name](separate_files=separate_files, batch_size=batch_size)
+             for name in dict.fromkeys(formats)]
+    return sinks[0] if len(sinks) == 1 else MultiSink(sinks)
+
+def parse_args(argv=None):
+    """
+    Parse command line options.
+    
+    Args:
+        argv (list): Optional argument list, defaults to sys.argv
+        
+    Returns:
+        argparse.Namespace: Parsed options
+    """
+    parser = argparse.ArgumentParser(description="Scrape TikTok profile video metrics to CSV.")
+    parser.add_argument("--install-driver", action="store_true",
+                        help="Resolve ChromeDriver, cache its path with a version stamp and exit")
+    parser.add_argument("--url", action="append", dest="urls", metavar="URL",
+                        help="Profile URL to scrape without prompting (repeat for several)")
+    parser.add_argument("--output", choices=["separate", "combined"],
+                        help="Output file layout, skipping the prompt")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of parallel browser sessions (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--jitter", type=float, nargs=2, metavar=("MIN", "MAX"), default=POLITENESS_JITTER,
+                        help="Politeness delay range in seconds kept as a floor for every wait "
+                             f"(default: {POLITENESS_JITTER[0]} {POLITENESS_JITTER[1]})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="Page loads per second per host, shared by every worker and backed off "
+                             f"automatically on captcha or empty pages; 0 disables it (default: {DEFAULT_RATE})")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST,
+                        help=f"Page loads per host allowed back to back before --rate applies "
+                             f"(default: {DEFAULT_BURST})")
+    parser.add_argument("--engine", choices=["selenium", "pipeline", "async"], default="selenium",
+                        help="Scraping engine: one Selenium session per worker; a two-stage pipeline "
+                             "where --workers sessions discover videos and --detail-workers sessions "
+                             "fetch them from a shared queue; or many CDP tabs driven from one asyncio "
+                             "event loop (needs websockets; default: selenium)")
+    parser.add_argument("--detail-workers", type=int, default=DEFAULT_DETAIL_WORKERS,
+                        help=f"With --engine pipeline, browser sessions opening video pages "
+                             f"(default: {DEFAULT_DETAIL_WORKERS})")
+    parser.add_argument("--stream", action="store_true",
+                        help="With --engine pipeline, queue each video as its tile renders while the profile "
+                             "scrolls, so video pages are fetched during the scroll")
+    parser.add_argument("--tabs", type=int, default=8,
+                        help="With --engine async, tabs kept in flight at once (default: 8)")
+    parser.add_argument("--lean", action="store_true",
+                        help="Run headless browsers that skip images, video streams and fonts, "
+                             "with autoplay off and capped caches")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Harvest metrics from the profile grid in one pass and only open "
+                             "video pages for metrics that are missing")
+    parser.add_argument("--network", action="store_true",
+                        help="Read metrics from the item-list API responses the profile page fetches while "
+                             "scrolling, so video pages are only opened for videos the capture missed "
+                             "(selenium engine)")
+    parser.add_argument("--large-profile", action="store_true",
+                        help="For profiles with thousands of videos: index tiles while scrolling, collapse "
+                             "harvested tiles and recycle browsers that outgrow --memory-limit "
+                             "(selenium and pipeline engines)")
+    parser.add_argument("--memory-limit", type=int, default=MEMORY_LIMIT_MB, metavar="MB",
+                        help=f"With --large-profile, browser memory at which a session is recycled "
+                             f"(default: {MEMORY_LIMIT_MB})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Stop scrolling at already-indexed videos and only scrape new or stale ones")
+    parser.add_argument("--format", nargs="+", choices=sorted(SINKS), default=['csv'],
+                        help="One or more outputs to write (default: csv)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help=f"Records buffered before each write to the output file "
+                             f"(default: {SINK_BATCH_SIZE}, {ParquetSink.default_batch_size} for parquet, "
+                             f"{SqliteSink.default_batch_size} for sqlite)")
+    parser.add_argument("--archive", nargs="?", const=ARCHIVE_DIR, metavar="DIR",
+                        help="Store every profile and video page read in a compressed archive for offline "
+                             f"re-extraction with tiktok_archive.py (default DIR: {ARCHIVE_DIR})")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume the last unfinished run from its checkpoint journal")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH,
+                        help=f"Checkpoint journal path (default: {CHECKPOINT_PATH})")
+    parser.add_argument("--stale-hours", type=float, default=INCREMENTAL_STALE_HOURS,
+                        help="In incremental mode, re-fetch known videos scraped longer ago than this "
+                             f"(default: {INCREMENTAL_STALE_HOURS})")
+    parser.add_argument("--metrics-jsonl", metavar="PATH",
+                        help="Append run metrics (timings, selector hit/miss, errors) to a JSON lines "
+                             "file after every profile")
+    parser.add_argument("--metrics-prom", metavar="PATH",
+                        help="Rewrite run metrics as a Prometheus text file after every profile")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    Main function to run the TikTok scraper.
+    
+    Args:
+        argv (list): Optional argument list, defaults to sys.argv
+    """
+    args = parse_args(argv)
+    
+    if args.install_driver:
+        driver_path = provision_chromedriver(force=True)
+        if not driver_path:
+            print("❌ ChromeDriver could not be provisioned")
+            sys.exit(1)
+        print(f"✅ ChromeDriver cached: {driver_path}")
+        return
+    
+    config = ScrapeConfig(lean=args.lean, network=args.network, memory_limit_mb=args.memory_limit,
+                          jitter=args.jitter, stale_hours=args.stale_hours).apply()
+    config.rate_limiter.configure(rate=max(0.0, args.rate), burst=max(1, args.burst))
+    workers = max(1, args.workers)
+    scrape_options = {'bulk': args.bulk, 'incremental': args.incremental, 'network': args.network,
+                      'large': args.large_profile}
+    if args.engine == 'pipeline' and (args.bulk or args.network):
+        print("❌ --bulk and --network do not work with --engine pipeline, whose detail workers open every video page")
+        sys.exit(2)
+    if args.network and args.engine == 'async':
+        print("ℹ️  --network only applies to the selenium engine; the async engine reads the DOM")
+    if args.stream and args.engine != 'pipeline':
+        print("ℹ️  --stream only applies to --engine pipeline")
+    if args.large_profile and args.engine == 'async':
+        print("ℹ️  --large-profile only applies to the selenium and pipeline engines")
+    journal = None
+    sink = None
+    archive = None
+    if args.archive:
+        from tiktok_archive import PageArchive
+        archive = scrape_options['archive'] = PageArchive(args.archive)
+        print(f"🗄️  Archiving raw pages to {args.archive} (run {archive.run_id})")
+    
+    def export_metrics(**context):
+        METRICS.export(args.metrics_jsonl, args.metrics_prom, **context)
+    
+    try:
+        if args.resume:
+            journal = RunJournal.resume(args.checkpoint)
+            if journal is None:
+                print(f"ℹ️  No unfinished run found in {args.checkpoint} - starting a new one")
+        
+        if journal is not None:
+            # Resume the queue and output choice of the interrupted run
+            tiktok_urls = journal.urls
+            separate_files = journal.separate_files
+            print(f"⏯️  Resuming run from {args.checkpoint}: {len(journal.completed_profiles)}/{len(tiktok_urls)} profiles already completed")
+        else:
+            # Step 1: Get TikTok URLs from the command line or the user
+            if args.urls:
+                tiktok_urls = []
+                for url in args.urls:
+                    url = url.strip()
+                    if not is_profile_url(url):
+                        print(f"❌ Not a TikTok profile URL: {url}")
+                        sys.exit(2)
+                    tiktok_urls.append(url)
+            else:
+                tiktok_urls = get_tiktok_urls()
             
-            try:
-                # Scrape this profile
-                video_data = scrape_tiktok_profile(url)
-                
-                if video_data:
-                    successful_scrapes += 1
-                    
-                    if separate_files:
-                        # Save each profile to its own file
-                        profile_name = url.split('/@')[1].split('?')[0].split('/')[0] if '/@' in url else f"profile_{i}"
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        filename = f"{profile_name}_{timestamp}.csv"
-                        save_to_csv(video_data, filename)
-                    else:
-                        # Add to combined data
-                        # Add profile info to each video record
-                        profile_name = url.split('/@')[1].split('?')[0].split('/')[0] if '/@' in url else f"profile_{i}"
-                        for video in video_data:
-                            video['profile_name'] = profile_name
-                            video['profile_url'] = url
-                        all_video_data.extend(video_data)
-                    
-                    print(f"✅ Profile {i} completed: {len(video_data)} videos scraped")
-                else:
-                    print(f"❌ Profile {i} failed: No data extracted")
+            if not tiktok_urls:
+                print("❌ No URLs provided")
+                return
+            
+            # Step 2: Ask user for output preference
+            if args.output:
+                separate_files = args.output == 'separate'
+            else:
+                print("\n📂 Output Options:")
+                print("  1. Separate CSV file for each profile")
+                print("  2. Combined CSV file for all profiles")
                 
-            except Exception as e:
-                print(f"❌ Error processing profile {i}: {e}")
-                continue
+                while True:
+                    try:
+                        choice = input("Choose option (1 or 2): ").strip()
+                        if choice == '1':
+                            separate_files = True
+                            break
+                        elif choice == '2':
+                            separate_files = False
+                            break
+                        else:
+                            print("❌ Please enter 1 or 2")
+                    except KeyboardInterrupt:
+                        print("\n👋 Goodbye!")
+                        return
             
-            # Add delay between profiles if there are more to process
-            if i < len(tiktok_urls):
-                print(f"\n⏳ Waiting before next profile...")
-                between_profiles_delay = random_delay(1, 2)
-                print(f"   ⏱️  Inter-profile delay: {between_profiles_delay:.1f}s")
+            journal = RunJournal.start(args.checkpoint, tiktok_urls, separate_files)
         
-        # Step 4: Handle combined output if needed
-        if not separate_files and all_video_data:
+        # Step 3: Process each URL, streaming records into the output sink
+        sink = create_sink(args.format, separate_files, args.batch_size)
+        successful_scrapes = 0
+        
+        # Profiles completed by an earlier attempt are not scraped again
+        pending = []
+        for i, url in enumerate(tiktok_urls, 1):
+            if journal.is_profile_complete(url):
+                successful_scrapes += 1
+                if not separate_files:
+                    # Their rows belong in the new combined file too
+                    for record in journal.records(url):
+                        sink.write(url, record)
+                print(f"⏭️  Profile {i} already completed: {url}")
+            else:
+                pending.append((i, url))
+        
+        pending_urls = [url for _, url in pending]
+        scrape_options['journal'] = journal
+        scrape_options['sink'] = sink
+        
+        print(f"\n🚀 Starting to process {len(pending_urls)} profile(s)...")
+        print("=" * 60)
+        
+        if args.engine == 'async' and pending_urls:
+            from tiktok_async import scrape_profiles_async
+            print(f"⚡ Async engine: up to {max(1, args.tabs)} tabs in flight")
+            results = scrape_profiles_async(pending_urls, args.tabs, config, **scrape_options)
+        elif args.engine == 'pipeline' and pending_urls:
+            print(f"🏭 Pipeline mode: {min(workers, len(pending_urls))} discovery and "
+                  f"{max(1, args.detail_workers)} detail browser sessions"
+                  + (", streaming tiles while scrolling" if args.stream else ""))
+            pipeline_options = {key: value for key, value in scrape_options.items() if key not in ('bulk', 'network')}
+            results = scrape_profiles_pipeline(pending_urls, workers, args.detail_workers, stream=args.stream,
+                                               **pipeline_options)
+        elif workers > 1 and len(pending_urls) > 1:
+            print(f"🧵 Parallel mode: {min(workers, len(pending_urls))} browser sessions")
+            results = scrape_profiles_parallel(pending_urls, workers, **scrape_options)
+        elif pending_urls:
+            results = scrape_profiles_sequential(pending_urls, **scrape_options)
+        else:
+            results = []
+        
+        for n, url, video_data, error in results:
+            i = pending[n - 1][0]
+            if error is not None:
+                METRICS.inc('profiles_total', result='error')
+                print(f"❌ Error processing profile {i}: {error}")
+            else:
+                # Any profile that finished without an error is done, even with 0 videos
+                successful_scrapes += 1
+                # In separate-file mode this closes the profile's own file
+                sink.end_profile(url)
+                journal.complete_profile(url, len(video_data))
+                if isinstance(video_data, UpToDate):
+                    METRICS.inc('profiles_total', result='up_to_date')
+                    print(f"✅ Profile {i} is up to date: 0 videos refreshed")
+                else:
+                    METRICS.inc('profiles_total', result='completed')
+                    print(f"✅ Profile {i} completed: {len(video_data)} videos scraped")
+            export_metrics(profile=url)
+        
+        # Step 4: Close the outputs (writes the combined file's remaining rows)
+        if not separate_files:
             print(f"\n💾 Saving combined data from all profiles...")
-            # Update CSV fieldnames to include profile info
-            save_to_csv_combined(all_video_data)
+        # Finish the journal first: closing the sink can run slow post-processing
+        journal.finish()
+        sink.close()
         
         # Step 5: Final summary
         print("\n" + "=" * 60)
@@ -702,18 +3365,13 @@ def main():
         print(f"   ✅ Successfully processed: {successful_scrapes}")
         print(f"   ❌ Failed: {len(tiktok_urls) - successful_scrapes}")
         
-        if not separate_files and all_video_data:
-            total_videos = len(all_video_data)
-            total_views = sum(video['views'] for video in all_video_data)
-            total_likes = sum(video['likes'] for video in all_video_data)
-            total_bookmarks = sum(video['bookmarks'] for video in all_video_data)
-            total_comments = sum(video['comments'] for video in all_video_data)
-            
-            print(f"   📹 Total videos scraped: {total_videos}")
-            print(f"   👁️  Total views: {total_views:,}")
-            print(f"   ❤️  Total likes: {total_likes:,}")
-            print(f"   🔖 Total bookmarks: {total_bookmarks:,}")
-            print(f"   💬 Total comments: {total_comments:,}")
+        totals = sink.totals()
+        if not separate_files and totals['videos']:
+            print(f"   📹 Total videos scraped: {totals['videos']}")
+            print(f"   👁️  Total views: {totals['views']:,}")
+            print(f"   ❤️  Total likes: {totals['likes']:,}")
+            print(f"   🔖 Total bookmarks: {totals['bookmarks']:,}")
+            print(f"   💬 Total comments: {totals['comments']:,}")
         
         if successful_scrapes == 0:
             print("❌ No data was extracted from any profile")
@@ -721,9 +3379,22 @@ def main():
         
         print("\n🎉 All profiles processed successfully!")
         
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted - progress is checkpointed, continue with --resume")
+        sys.exit(130)
     except Exception as e:
         print(f"❌ An error occurred: {e}")
+        if journal is not None:
+            print("💡 Progress is checkpointed, continue with --resume")
         sys.exit(1)
+    finally:
+        if journal is not None:
+            journal.close()
+        if sink is not None:
+            sink.close()
+        if archive is not None:
+            print(f"🗄️  Archived {archive.pages} pages ({archive.new_objects} new) in {args.archive}")
+        export_metrics(final=True)
 
 if __name__ == "__main__":
     main()
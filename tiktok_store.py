@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+TikTok Snapshot Store
+Append-only, date-partitioned Parquet store of per-video metric snapshots.
+
+Every scrape appends one row per video (video_id, scraped_at, views, likes,
+bookmarks, comments, ...) to data/snapshots/scrape_date=YYYY-MM-DD/. The query
+helpers answer "latest metrics per video" and "change between two points in
+time" without re-parsing the CSV history.
+
+Requires pyarrow (pip install pyarrow).
+"""
+
+import os
+import re
+import csv
+import sys
+import uuid
+import argparse
+from collections import defaultdict
+from datetime import datetime
+
+from tiktok_counts import LOCALES, renormalize_rows
+from tiktok_records import RecordBatch
+
+SNAPSHOT_DIR = os.path.join('data', 'snapshots')
+METRICS = ['views', 'likes', 'bookmarks', 'comments']
+IMPORT_BATCH_SIZE = 50000  # Rows per Parquet file written by import-csv
+
+# Separate-file CSVs are named <profile>_<YYYYmmdd_HHMMSS>.csv
+_PROFILE_FILE_RE = re.compile(r'^(?P<profile>.+)_\d{8}_\d{6}\.csv$')
+_VIDEO_ID_RE = re.compile(r'/video/(\d+)')
+
+def _require_pyarrow():
+    """
+    Import pyarrow, with an install hint if it is missing.
+
+    Returns:
+        module: The pyarrow module
+    """
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The snapshot store needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+def snapshot_schema():
+    """
+    Schema of one snapshot row.
+
+    Returns:
+        pyarrow.Schema: The snapshot schema
+    """
+    pa = _require_pyarrow()
+    fields = [
+        ('profile_name', pa.dictionary(pa.int32(), pa.string())),
+        ('video_id', pa.string()),
+        ('video_url', pa.string()),
+        ('scraped_at', pa.timestamp('us')),
+    ]
+    fields += [(metric, pa.int64()) for metric in METRICS]
+    fields += [(f"{metric}_raw", pa.string()) for metric in METRICS]
+    return pa.schema(fields)
+
+def delta_schema():
+    """
+    Schema of the table returned by SnapshotStore.delta_between().
+
+    Returns:
+        pyarrow.Schema: The delta schema
+    """
+    pa = _require_pyarrow()
+    snapshot = snapshot_schema()
+    fields = [
+        snapshot.field('video_id'),
+        snapshot.field('profile_name'),
+        ('scraped_at_before', pa.timestamp('us')),
+        ('scraped_at_after', pa.timestamp('us')),
+    ]
+    for metric in METRICS:
+        fields += [(f"{metric}_before", pa.int64()), (f"{metric}_after", pa.int64()), (f"{metric}_delta", pa.int64())]
+    return pa.schema(fields)
+
+def video_id_from_url(video_url):
+    """Return the numeric video ID of a TikTok video URL, or None."""
+    match = _VIDEO_ID_RE.search(video_url or '')
+    return match.group(1) if match else None
+
+def profile_from_csv_name(path):
+    """
+    Profile name encoded in a separate-file CSV's name (<profile>_<timestamp>.csv).
+
+    Returns:
+        str: The profile name, or None for combined CSVs and other file names
+    """
+    name = os.path.basename(path)
+    match = _PROFILE_FILE_RE.match(name)
+    return match.group('profile') if match and not name.startswith('tiktok_scrape_') else None
+
+def _to_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+def _to_bound(value):
+    """
+    Parse a query time bound.
+
+    Aware datetimes are converted to naive local time, the way the scraper
+    records scraped_at.
+
+    Raises:
+        ValueError: The value is not an ISO timestamp
+    """
+    when = _to_datetime(value)
+    if when is None:
+        raise ValueError(f"Not an ISO timestamp: {value!r}")
+    if when.tzinfo is not None:
+        when = when.astimezone().replace(tzinfo=None)
+    return when
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+def rows_to_table(rows):
+    """
+    Convert scraped video records to a snapshot table.
+
+    Args:
+        rows (list): Video data dictionaries, optionally with profile_name,
+            or a RecordBatch, whose count arrays are used as they are
+
+    Returns:
+        pyarrow.Table: Rows in snapshot_schema() layout
+    """
+    pa = _require_pyarrow()
+    schema = snapshot_schema()
+
+    if isinstance(rows, RecordBatch):
+        columns = {
+            'profile_name': rows.column('profile_name'),
+            'video_id': [video_id_from_url(url) for url in rows.video_urls],
+            'video_url': rows.video_urls,
+            'scraped_at': [_to_datetime(value) for value in rows.scraped_at],
+        }
+        for metric in METRICS:
+            columns[metric] = rows.counts[metric]
+            columns[f"{metric}_raw"] = [None if raw is None else str(raw) for raw in rows.raw[f"{metric}_raw"]]
+        return pa.Table.from_pydict(columns, schema=schema)
+
+    columns = {name: [] for name in schema.names}
+
+    for row in rows:
+        columns['profile_name'].append(row.get('profile_name'))
+        columns['video_id'].append(row.get('video_id') or video_id_from_url(row.get('video_url')))
+        columns['video_url'].append(row.get('video_url'))
+        columns['scraped_at'].append(_to_datetime(row.get('scraped_at')))
+        for metric in METRICS:
+            columns[metric].append(_to_int(row.get(metric)))
+            raw = row.get(f"{metric}_raw")
+            columns[f"{metric}_raw"].append(None if raw is None else str(raw))
+
+    return pa.Table.from_pydict(columns, schema=schema)
+
+def _as_timestamp(value):
+    pa = _require_pyarrow()
+    return pa.scalar(_to_datetime(value), type=pa.timestamp('us'))
+
+class SnapshotWriter:
+    """
+    Writes snapshot rows to part files, one row group per batch and date.
+
+    Every row goes to the date partition of its own ``scraped_at``, so a run
+    that crosses midnight still lands in the right partitions. Part files
+    are written under a hidden ``.<name>.part`` name, which dataset scans
+    skip, and only moved into place once close() has written their footer:
+    a crash leaves no unreadable file behind in the dataset.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Part file path from SnapshotStore.part_path(); each
+                partition gets a file of the same name
+        """
+        self.path = path
+        self.root = os.path.dirname(os.path.dirname(path))
+        self.filename = os.path.basename(path)
+        self.paths = []
+        self.rows = 0
+        self._parts = {}
+
+    def _writer_for(self, day):
+        part = self._parts.get(day)
+        if part is None:
+            pa = _require_pyarrow()
+            directory = os.path.join(self.root, f"scrape_date={day}")
+            os.makedirs(directory, exist_ok=True)
+            temp = os.path.join(directory, f".{self.filename}.part")
+            writer = pa.parquet.ParquetWriter(temp, snapshot_schema(), compression='zstd')
+            part = self._parts[day] = (writer, temp, os.path.join(directory, self.filename))
+        return part[0]
+
+    def write_rows(self, rows):
+        """Append a batch of video records (list or RecordBatch), split by scrape date."""
+        if not rows:
+            return
+        pa = _require_pyarrow()
+        pc = pa.compute
+        table = rows_to_table(rows)
+        days = pc.fill_null(pc.strftime(table['scraped_at'], format='%Y-%m-%d'), datetime.now().strftime('%Y-%m-%d'))
+        unique = pc.unique(days).to_pylist()
+        if len(unique) == 1:
+            self._writer_for(unique[0]).write_table(table)
+        else:
+            for day in unique:
+                self._writer_for(day).write_table(table.filter(pc.equal(days, day)))
+        self.rows += len(rows)
+
+    def close(self):
+        """Finish every part file and move it into the dataset."""
+        parts, self._parts = self._parts, {}
+        for writer, temp, path in parts.values():
+            writer.close()
+            os.replace(temp, path)
+            self.paths.append(path)
+
+class SnapshotStore:
+    """
+    Date-partitioned Parquet dataset of video metric snapshots.
+
+    Files live in ``<root>/scrape_date=YYYY-MM-DD/`` and are never rewritten;
+    appending always adds a new file. Readers scan the whole dataset and
+    prune partitions by date where a query has an upper time bound.
+    """
+
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+
+    def part_path(self, label, when=None):
+        """
+        Build the path of a new part file.
+
+        Args:
+            label (str): Name prefix, e.g. a profile name or "combined"
+            when (datetime): Partition date, defaults to now
+
+        Returns:
+            str: Path inside the matching date partition
+        """
+        when = when or datetime.now()
+        filename = f"{label}_{when.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.parquet"
+        return os.path.join(self.root, f"scrape_date={when.strftime('%Y-%m-%d')}", filename)
+
+    def open_writer(self, path):
+        """Open a SnapshotWriter for a part file path."""
+        return SnapshotWriter(path)
+
+    def append(self, rows, label='batch'):
+        """
+        Write a batch of video records as a new part file.
+
+        Rows are partitioned by the date of their own ``scraped_at``.
+
+        Args:
+            rows (list): Video data dictionaries
+            label (str): Name prefix of the part files
+
+        Returns:
+            int: Number of rows written
+        """
+        writer = self.open_writer(self.part_path(label))
+        try:
+            writer.write_rows(rows)
+        finally:
+            writer.close()
+        return len(rows)
+
+    def dataset(self):
+        """
+        Open the store as a pyarrow dataset.
+
+        Returns:
+            pyarrow.dataset.Dataset: The dataset, including the scrape_date partition column
+        """
+        pa = _require_pyarrow()
+        partitioning = pa.dataset.partitioning(pa.schema([('scrape_date', pa.string())]), flavor='hive')
+        return pa.dataset.dataset(self.root, format='parquet', schema=snapshot_schema().append(
+            pa.field('scrape_date', pa.string())), partitioning=partitioning)
+
+    def read(self, columns=None, until=None, since=None):
+        """
+        Read snapshots, optionally limited to a time range.
+
+        Args:
+            columns (list): Columns to load, defaults to all
+            until (datetime|str): Only snapshots scraped at or before this time
+            since (datetime|str): Only snapshots scraped at or after this time
+
+        Returns:
+            pyarrow.Table: Matching snapshot rows
+
+        Raises:
+            ValueError: A bound is not an ISO timestamp
+        """
+        pa = _require_pyarrow()
+        until = None if until is None else _to_bound(until)
+        since = None if since is None else _to_bound(since)
+        if not os.path.isdir(self.root):
+            return snapshot_schema().empty_table()
+
+        field = pa.dataset.field
+        condition = None
+        if until is not None:
+            condition = (field('scrape_date') <= until.strftime('%Y-%m-%d')) & (field('scraped_at') <= _as_timestamp(until))
+        if since is not None:
+            lower = (field('scrape_date') >= since.strftime('%Y-%m-%d')) & (field('scraped_at') >= _as_timestamp(since))
+            condition = lower if condition is None else condition & lower
+
+        return self.dataset().to_table(columns=columns, filter=condition)
+
+    def latest_per_video(self, as_of=None, columns=None):
+        """
+        Latest snapshot of every video.
+
+        Args:
+            as_of (datetime|str): Ignore snapshots scraped after this time
+            columns (list): Columns to return, defaults to all
+
+        Returns:
+            pyarrow.Table: One row per video ID
+        """
+        pa = _require_pyarrow()
+        pc = pa.compute
+        if columns is not None:
+            columns = list(dict.fromkeys(['video_id', 'scraped_at'] + list(columns)))
+
+        table = self.read(columns=columns, until=as_of)
+        table = table.filter(pc.is_valid(table['video_id']))
+        if table.num_rows == 0:
+            return table
+
+        # Newest snapshot first within each video, then keep the first row per video
+        order = pc.sort_indices(table, sort_keys=[('video_id', 'ascending'), ('scraped_at', 'descending')])
+        table = table.take(order)
+        ids = table['video_id'].combine_chunks()
+        first = pc.not_equal(ids.slice(1), ids.slice(0, len(ids) - 1))
+        return table.filter(pa.concat_arrays([pa.array([True]), first]))
+
+    def delta_between(self, start, end):
+        """
+        Change in every metric between two points in time.
+
+        Compares each video's latest snapshot as of ``start`` with its latest
+        snapshot as of ``end``. Videos without a snapshot at both points are
+        left out.
+
+        Args:
+            start (datetime|str): Earlier point in time
+            end (datetime|str): Later point in time
+
+        Returns:
+            pyarrow.Table: Rows in delta_schema() layout: video_id,
+                profile_name, scraped_at_before, scraped_at_after and
+                <metric>_before/_after/_delta columns
+        """
+        pa = _require_pyarrow()
+        pc = pa.compute
+        columns = ['video_id', 'profile_name', 'scraped_at'] + METRICS
+        before = self.latest_per_video(as_of=start, columns=columns)
+        after = self.latest_per_video(as_of=end, columns=columns)
+
+        # latest_per_video() reorders columns, so select them by name before renaming
+        before = before.select(['video_id', 'scraped_at'] + METRICS).rename_columns(
+            ['video_id', 'scraped_at_before'] + [f"{metric}_before" for metric in METRICS])
+        after = after.select(['video_id', 'profile_name', 'scraped_at'] + METRICS).rename_columns(
+            ['video_id', 'profile_name', 'scraped_at_after'] + [f"{metric}_after" for metric in METRICS])
+        joined = after.join(before, keys='video_id', join_type='inner')
+
+        result = {
+            'video_id': joined['video_id'],
+            'profile_name': joined['profile_name'],
+            'scraped_at_before': joined['scraped_at_before'],
+            'scraped_at_after': joined['scraped_at_after'],
+        }
+        for metric in METRICS:
+            result[f"{metric}_before"] = joined[f"{metric}_before"]
+            result[f"{metric}_after"] = joined[f"{metric}_after"]
+            result[f"{metric}_delta"] = pc.subtract(joined[f"{metric}_after"], joined[f"{metric}_before"])
+
+        table = pa.table(result)
+        if not table.schema.equals(delta_schema()):
+            raise TypeError(f"Unexpected delta columns:\n{table.schema}")
+        return table
+
+def import_csv_files(paths, store, renormalize=False, locale='auto'):
+    """
+    Load existing scrape CSVs into the snapshot store.
+
+    Combined CSVs carry their own profile_name column; for per-profile CSVs
+    the profile name is taken from the file name.
+
+    Args:
+        paths (list): CSV file paths
+        store (SnapshotStore): Destination store
+        renormalize (bool): Re-parse the metrics from the *_raw columns
+            (see tiktok_counts) instead of trusting the stored numbers
+        locale (str): Decimal separator convention used when renormalizing
+
+    Returns:
+        int: Number of rows imported
+    """
+    imported = 0
+    invalid = defaultdict(int)
+
+    def flush(batch):
+        if renormalize:
+            for metric, count in renormalize_rows(batch, locale).items():
+                invalid[metric] += count
+        return store.append(batch, label='import')
+
+    for path in paths:
+        default_profile = profile_from_csv_name(path)
+
+        batch = []
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if not row.get('profile_name'):
+                    row['profile_name'] = default_profile
+                batch.append(row)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    imported += flush(batch)
+                    batch = []
+        if batch:
+            imported += flush(batch)
+        print(f"   ✅ {path}")
+    if any(invalid.values()):
+        print("   ⚠️  Raw values that did not parse (stored numbers kept): " +
+              ', '.join(f"{metric} {count:,}" for metric, count in invalid.items() if count))
+    return imported
+
+def _print_table(table, limit):
+    rows = table.slice(0, limit).to_pylist()
+    if not rows:
+        print("(no rows)")
+        return
+    writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    if table.num_rows > limit:
+        print(f"... {table.num_rows - limit} more rows")
+
+def main(argv=None):
+    """
+    Command line interface for importing and querying snapshots.
+
+    Args:
+        argv (list): Optional argument list, defaults to sys.argv
+    """
+    parser = argparse.ArgumentParser(description="Query and maintain the TikTok metric snapshot store.")
+    parser.add_argument("--root", default=SNAPSHOT_DIR, help=f"Store directory (default: {SNAPSHOT_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import-csv", help="Import scrape CSV files")
+    import_parser.add_argument("paths", nargs="+", help="CSV files to import")
+    import_parser.add_argument("--renormalize", action="store_true",
+                               help="Re-parse metrics from the *_raw columns")
+    import_parser.add_argument("--locale", choices=LOCALES, default='auto',
+                               help="Decimal separator convention of the raw text (default: auto)")
+
+    latest_parser = subparsers.add_parser("latest", help="Latest snapshot per video")
+    latest_parser.add_argument("--as-of", help="ISO timestamp upper bound")
+    latest_parser.add_argument("--limit", type=int, default=20)
+
+    delta_parser = subparsers.add_parser("delta", help="Metric change between two times")
+    delta_parser.add_argument("start", help="ISO timestamp of the earlier point")
+    delta_parser.add_argument("end", help="ISO timestamp of the later point")
+    delta_parser.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args(argv)
+    store = SnapshotStore(args.root)
+
+    if args.command == "import-csv":
+        print(f"📥 Importing {len(args.paths)} CSV file(s) into {args.root}...")
+        imported = import_csv_files(args.paths, store, args.renormalize, args.locale)
+        print(f"✅ Imported {imported:,} snapshots")
+    elif args.command == "latest":
+        try:
+            _print_table(store.latest_per_video(as_of=args.as_of), args.limit)
+        except ValueError as e:
+            parser.error(str(e))
+    elif args.command == "delta":
+        try:
+            _print_table(store.delta_between(args.start, args.end), args.limit)
+        except ValueError as e:
+            parser.error(str(e))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+TikTok Request Throttling
+A rate limiter shared by every scraping worker: a token bucket per host,
+adaptive backoff when TikTok serves block or empty pages, and a circuit
+breaker per browser session.
+
+Workers call acquire() (or await the delay from reserve()) before each page
+load and report() how the page turned out:
+
+    'ok'       the page had content
+    'empty'    the page loaded but had no metrics
+    'blocked'  a captcha or rate-limit page
+    'error'    the load failed
+
+A blocked page pauses the whole host and halves its rate. A run of empty
+pages counts as a block. Successful loads raise the rate back step by step.
+Consecutive failures on one session open its circuit, and that session
+waits out a cooldown that doubles on every repeated trip.
+"""
+
+import time
+import random
+import threading
+import weakref
+from urllib.parse import urlparse
+
+from tiktok_metrics import METRICS
+
+DEFAULT_RATE = 1.0  # Page loads per second per host (0 disables the limit)
+DEFAULT_BURST = 3  # Page loads a host may take back to back
+MIN_RATE = 0.05  # Lowest rate backoff reduces a host to
+BACKOFF_BASE = 30.0  # Seconds a host is paused after its first block page
+BACKOFF_MAX = 15 * 60.0  # Longest host pause
+EMPTY_PAGES_AS_BLOCK = 3  # Consecutive empty pages treated like a block page
+CIRCUIT_FAILURES = 5  # Consecutive failed loads that open a session's circuit
+CIRCUIT_COOLDOWN = 60.0  # Seconds an open circuit waits before a trial load
+CIRCUIT_COOLDOWN_MAX = 30 * 60.0  # Longest cooldown after repeated trips
+WAIT_NOTICE_SECONDS = 5.0  # Waits at least this long are announced
+
+OUTCOMES = ('ok', 'empty', 'blocked', 'error')
+
+class TokenBucket:
+    """
+    Token bucket allowing ``rate`` loads per second with bursts of ``burst``.
+
+    reserve() always takes a token and lets the balance go negative, so
+    callers queue up fairly: each one gets the time its token will exist.
+    Not thread-safe on its own; RateLimiter guards it.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def reserve(self, now):
+        """
+        Take a token.
+
+        Args:
+            now (float): time.monotonic() value
+
+        Returns:
+            float: Seconds to wait before the token may be used
+        """
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one browser session.
+
+    Closed: loads go through. After CIRCUIT_FAILURES consecutive failures it
+    opens and loads wait for the cooldown. Then one trial load is let
+    through (half open). Success closes the circuit, failure opens it again
+    with a doubled cooldown.
+    """
+
+    def __init__(self, failures=CIRCUIT_FAILURES, cooldown=CIRCUIT_COOLDOWN):
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+
+    def wait(self, now):
+        """Return the seconds a load has to wait for, moving to half open once the cooldown is over."""
+        if self.state == 'open':
+            if now < self.open_until:
+                return self.open_until - now
+            self.state = 'half_open'
+        return 0.0
+
+    def record(self, ok, now):
+        """
+        Record a load.
+
+        Returns:
+            float: Cooldown in seconds if this load opened the circuit, else 0
+        """
+        if ok:
+            self.failures = 0
+            self.trips = 0
+            self.state = 'closed'
+            return 0.0
+
+        self.failures += 1
+        if self.state == 'half_open' or self.failures >= self.threshold:
+            self.trips += 1
+            cooldown = min(CIRCUIT_COOLDOWN_MAX, self.cooldown * 2 ** (self.trips - 1))
+            self.state = 'open'
+            self.open_until = now + cooldown
+            self.failures = 0
+            return cooldown
+        return 0.0
+
+class _Host:
+    __slots__ = ('bucket', 'backoff_until', 'strikes', 'empties')
+
+    def __init__(self, rate, burst):
+        self.bucket = TokenBucket(rate, burst)
+        self.backoff_until = 0.0
+        self.strikes = 0
+        self.empties = 0
+
+class RateLimiter:
+    """
+    Per-host token buckets with adaptive backoff, plus per-session circuit breakers.
+
+    One instance (RATE_LIMITER) is shared by every worker thread; sessions
+    are any hashable, weak-referenceable object (a WebDriver, an async
+    engine).
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._hosts = {}
+        self._breakers = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def configure(self, rate=None, burst=None):
+        """
+        Change the configured rate and burst.
+
+        Per-host state (including any backoff) is only reset when a value
+        actually changes, so reapplying the same settings is harmless.
+
+        Args:
+            rate (float): Page loads per second per host, 0 for no limit
+            burst (int): Page loads a host may take back to back
+        """
+        with self._lock:
+            rate = self.rate if rate is None else rate
+            burst = self.burst if burst is None else burst
+            if (rate, burst) != (self.rate, self.burst):
+                self.rate, self.burst = rate, burst
+                self._hosts.clear()
+
+    @staticmethod
+    def host_for(url):
+        return urlparse(url or '').netloc.lower()
+
+    def _host(self, url):
+        host = self.host_for(url)
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _Host(self.rate, self.burst)
+        return host, state
+
+    def _breaker(self, session):
+        breaker = self._breakers.get(session)
+        if breaker is None:
+            breaker = self._breakers[session] = CircuitBreaker()
+        return breaker
+
+    def reserve(self, url, session=None):
+        """
+        Claim a page load and return how long to wait before doing it.
+
+        Args:
+            url (str): URL about to be loaded
+            session: Optional browser session the load goes through
+
+        Returns:
+            float: Seconds to wait
+        """
+        now = time.monotonic()
+        with self._lock:
+            _, host = self._host(url)
+            wait = max(host.bucket.reserve(now), host.backoff_until - now)
+            if session is not None:
+                wait = max(wait, self._breaker(session).wait(now))
+        if wait > 0:
+            METRICS.observe('rate_limit_wait_seconds', wait)
+        return wait
+
+    def acquire(self, url, session=None):
+        """
+        Wait until a page load is allowed.
+
+        Returns:
+            float: Seconds waited
+        """
+        wait = self.reserve(url, session)
+        if wait >= WAIT_NOTICE_SECONDS:
+            print(f"   ⏳ Rate limit: waiting {wait:.0f}s before loading {self.host_for(url)}")
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def report(self, url, outcome, session=None, reason=None):
+        """
+        Report how a page load turned out and adapt.
+
+        Args:
+            url (str): URL that was loaded
+            outcome (str): One of OUTCOMES
+            session: Optional browser session the load went through
+            reason (str): Optional detail for block pages (e.g. 'captcha')
+        """
+        now = time.monotonic()
+        METRICS.inc('page_loads_total', outcome=outcome)
+        messages = []
+        with self._lock:
+            name, host = self._host(url)
+            if outcome == 'ok':
+                host.empties = 0
+                host.strikes = max(0, host.strikes - 1)
+                if self.rate > 0:
+                    # Additive increase back towards the configured rate
+                    host.bucket.rate = min(self.rate, host.bucket.rate + self.rate * 0.1)
+            elif outcome == 'empty':
+                host.empties += 1
+                if host.empties >= EMPTY_PAGES_AS_BLOCK:
+                    outcome, reason = 'blocked', reason or f'{host.empties} empty pages in a row'
+                    host.empties = 0
+            if outcome == 'blocked':
+                pause = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** host.strikes) * random.uniform(0.8, 1.2)
+                host.strikes += 1
+                host.backoff_until = max(host.backoff_until, now + pause)
+                if self.rate > 0:
+                    # Multiplicative decrease
+                    host.bucket.rate = max(MIN_RATE, host.bucket.rate / 2)
+                METRICS.inc('backoffs_total', host=name)
+                messages.append(f"🚧 {name}: {reason or 'block page'} - backing off {pause:.0f}s"
+                                + (f", rate now {host.bucket.rate:.2f}/s" if self.rate > 0 else ""))
+
+            if session is not None:
+                cooldown = self._breaker(session).record(outcome == 'ok', now)
+                if cooldown:
+                    METRICS.inc('circuit_trips_total')
+                    messages.append(f"🔌 Session circuit open for {cooldown:.0f}s after repeated failures")
+        for message in messages:
+            print(f"   {message}")
+
+    def is_open(self, session):
+        """Return True while a session's circuit is open."""
+        with self._lock:
+            breaker = self._breakers.get(session)
+            return breaker is not None and breaker.state == 'open' and time.monotonic() < breaker.open_until
+
+RATE_LIMITER = RateLimiter()